@@ -4,18 +4,30 @@ from __future__ import annotations
 
 import datetime as dt
 import fnmatch
+import heapq
 import logging
 import random
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import re
+from collections import defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator
 
-from plex_shuffler.models import MediaGroup, MediaItem
-from plex_shuffler.plex_client import PlexClient
+from plex_shuffler.models import LibrarySection, MediaGroup, MediaItem
+from plex_shuffler.plex_client import PlexClient, PlexError
 from plex_shuffler.shuffle import interleave_movies, shuffle_groups
-from plex_shuffler.utils import cutoff_from_days, ensure_list, parse_query_string
+from plex_shuffler.utils import cutoff_from_days, ensure_list, normalize_title, parse_query_string
 
 LOGGER = logging.getLogger(__name__)
 
+# One section-wide episode query beats per-show requests once enough shows match and they
+# make up most of the section; otherwise it downloads episodes that are thrown away.
+SECTION_EPISODES_MIN_SHOWS = 8
+SECTION_EPISODES_MIN_FRACTION = 0.5
+
+# Exact (wildcard-free) titles plus a compiled alternation of the glob patterns.
+TitleMatcher = tuple[frozenset[str], re.Pattern[str] | None]
+
 
 @dataclass(frozen=True)
 class BuildStats:
@@ -26,117 +38,242 @@ class BuildStats:
     total_items: int
 
 
+@dataclass(frozen=True)
+class PlaylistPlan:
+    """Playlist settings derived once from config so scheduled runs skip re-parsing."""
+
+    tv_library: str
+    tv_query: tuple[tuple[str, str], ...]
+    tv_include: TitleMatcher | None
+    tv_exclude: TitleMatcher | None
+    tv_max_per_show: int
+    tv_exclude_watched_days: int | float | None
+    tv_unwatched_only: bool
+    tv_strategy: str
+    tv_chunk_size: int
+    tv_seed: str | None
+    movies_enabled: bool
+    movie_library: str
+    movie_query: tuple[tuple[str, str], ...]
+    collections_as_shows: bool
+    movie_include: TitleMatcher | None
+    movie_exclude: TitleMatcher | None
+    movie_exclude_watched_days: int | float | None
+    movie_unwatched_only: bool
+    movie_strategy: str
+    movie_chunk_size: int
+    movie_seed: str | None
+    every_episodes: int
+    max_movies: int
+    limit_items: int
+
+
+def plan_playlist(playlist_config: dict) -> PlaylistPlan:
+    """Precompute parsed queries, title matchers, and numeric options for a playlist config."""
+    tv_config = playlist_config.get("tv", {})
+    movie_config = playlist_config.get("movies", {})
+    output_config = playlist_config.get("output", {})
+    episode_filters = tv_config.get("episode_filters", {})
+    tv_order = tv_config.get("order", {})
+    movie_order = movie_config.get("order", {})
+    movie_filters = movie_config.get("filters", {})
+    ratio = movie_config.get("ratio", {})
+
+    return PlaylistPlan(
+        tv_library=tv_config.get("library", ""),
+        tv_query=parse_query_string(tv_config.get("query", "") or ""),
+        tv_include=_title_matcher(tv_config.get("include_titles")),
+        tv_exclude=_title_matcher(tv_config.get("exclude_titles")),
+        tv_max_per_show=int(episode_filters.get("max_per_show", 0) or 0),
+        tv_exclude_watched_days=episode_filters.get("exclude_watched_days"),
+        tv_unwatched_only=bool(episode_filters.get("unwatched_only")),
+        tv_strategy=tv_order.get("strategy", "rounds"),
+        tv_chunk_size=int(tv_order.get("chunk_size", 1) or 1),
+        tv_seed=tv_order.get("seed"),
+        movies_enabled=bool(movie_config.get("enabled")),
+        movie_library=movie_config.get("library", ""),
+        movie_query=parse_query_string(movie_config.get("query", "") or ""),
+        collections_as_shows=bool(movie_config.get("collections_as_shows")),
+        movie_include=_title_matcher(movie_config.get("include_collections")),
+        movie_exclude=_title_matcher(movie_config.get("exclude_collections")),
+        movie_exclude_watched_days=movie_filters.get("exclude_watched_days"),
+        movie_unwatched_only=bool(movie_filters.get("unwatched_only")),
+        movie_strategy=movie_order.get("strategy", "rounds"),
+        movie_chunk_size=int(movie_order.get("chunk_size", 1) or 1),
+        movie_seed=movie_order.get("seed"),
+        every_episodes=int(ratio.get("every_episodes", 0) or 0),
+        max_movies=int(ratio.get("max_movies", 0) or 0),
+        limit_items=int(output_config.get("limit_items", 0) or 0),
+    )
+
+
 def build_playlist_items(
     client: PlexClient,
-    playlist_config: dict,
+    playlist_config: dict | PlaylistPlan,
     now: dt.datetime,
+    sections: dict[str, LibrarySection] | None = None,
 ) -> tuple[list[MediaItem], BuildStats]:
-    tv_config = playlist_config.get("tv", {})
-    movie_config = playlist_config.get("movies", {})
-    output_config = playlist_config.get("output", {})
+    """Build the ordered playlist items.
+
+    ``sections`` optionally maps lowered library titles to sections (see ``index_sections``)
+    so several playlists can share one ``/library/sections`` lookup.
+    """
+    plan = playlist_config if isinstance(playlist_config, PlaylistPlan) else plan_playlist(playlist_config)
 
-    tv_groups = _build_tv_groups(client, tv_config, now)
-    tv_rng = _create_rng(tv_config.get("order", {}).get("seed"), now)
+    tv_groups = _build_tv_groups(client, plan, now, sections)
+    tv_rng = _create_rng(plan.tv_seed, now)
     tv_items = shuffle_groups(
         tv_groups,
         tv_rng,
-        strategy=tv_config.get("order", {}).get("strategy", "rounds"),
-        chunk_size=int(tv_config.get("order", {}).get("chunk_size", 1) or 1),
+        strategy=plan.tv_strategy,
+        chunk_size=plan.tv_chunk_size,
     )
 
     movie_items: list[MediaItem] = []
     collections_count = 0
-    if movie_config.get("enabled"):
-        movie_groups, collections_count = _build_movie_groups(client, movie_config, now)
-        movie_rng = _create_rng(movie_config.get("order", {}).get("seed"), now)
+    if plan.movies_enabled:
+        movie_groups, collections_count = _build_movie_groups(client, plan, now, sections)
+        movie_rng = _create_rng(plan.movie_seed, now)
         movie_items = shuffle_groups(
             movie_groups,
             movie_rng,
-            strategy=movie_config.get("order", {}).get("strategy", "rounds"),
-            chunk_size=int(movie_config.get("order", {}).get("chunk_size", 1) or 1),
+            strategy=plan.movie_strategy,
+            chunk_size=plan.movie_chunk_size,
         )
-        ratio = int(movie_config.get("ratio", {}).get("every_episodes", 0) or 0)
-        max_movies = int(movie_config.get("ratio", {}).get("max_movies", 0) or 0)
-        if max_movies > 0:
-            movie_items = movie_items[:max_movies]
-        tv_items = interleave_movies(tv_items, movie_items, ratio)
+        if plan.max_movies > 0:
+            movie_items = movie_items[: plan.max_movies]
+        tv_items = interleave_movies(tv_items, movie_items, plan.every_episodes, max_items=plan.limit_items)
+
+    if plan.limit_items > 0 and len(tv_items) > plan.limit_items:
+        tv_items = tv_items[: plan.limit_items]
 
-    limit = int(output_config.get("limit_items", 0) or 0)
-    if limit > 0:
-        tv_items = tv_items[:limit]
+    episodes = movies = 0
+    for item in tv_items:
+        item_type = item.type
+        if item_type == "episode":
+            episodes += 1
+        elif item_type == "movie":
+            movies += 1
 
     stats = BuildStats(
         shows=len(tv_groups),
-        episodes=sum(1 for item in tv_items if item.type == "episode"),
-        movies=sum(1 for item in tv_items if item.type == "movie"),
+        episodes=episodes,
+        movies=movies,
         collections=collections_count,
         total_items=len(tv_items),
     )
     return tv_items, stats
 
 
-def _build_tv_groups(client: PlexClient, tv_config: dict, now: dt.datetime) -> list[MediaGroup]:
-    section = client.get_section_by_title(tv_config.get("library", ""))
-    query = parse_query_string(tv_config.get("query", ""))
+def index_sections(sections: Iterable[LibrarySection]) -> dict[str, LibrarySection]:
+    """Key library sections by normalized title for reuse across playlist builds.
 
-    shows = client.get_shows(section.key, query=query)
-    shows = _filter_titles(
-        shows,
-        include=ensure_list(tv_config.get("include_titles")),
-        exclude=ensure_list(tv_config.get("exclude_titles")),
-    )
+    The first section wins on a title clash, like ``PlexClient.get_section_by_title``.
+    """
+    index: dict[str, LibrarySection] = {}
+    for section in sections:
+        index.setdefault(normalize_title(section.title), section)
+    return index
 
-    episode_filters = tv_config.get("episode_filters", {})
-    max_per_show = int(episode_filters.get("max_per_show", 0) or 0)
-    cutoff = cutoff_from_days(episode_filters.get("exclude_watched_days"), now)
-    unwatched_only = bool(episode_filters.get("unwatched_only"))
+
+def _resolve_section(
+    client: PlexClient,
+    title: str,
+    sections: dict[str, LibrarySection] | None,
+) -> LibrarySection:
+    if sections is None:
+        return client.get_section_by_title(title)
+    section = sections.get(normalize_title(title))
+    if section is None:
+        raise PlexError(f"Library section not found: {title}")
+    return section
+
+
+def _build_tv_groups(
+    client: PlexClient,
+    plan: PlaylistPlan,
+    now: dt.datetime,
+    sections: dict[str, LibrarySection] | None = None,
+) -> list[MediaGroup]:
+    section = _resolve_section(client, plan.tv_library, sections)
+
+    shows = client.get_shows(section.key, query=plan.tv_query)
+    section_shows = len(shows)
+    shows = _apply_title_matchers(shows, plan.tv_include, plan.tv_exclude)
+
+    max_per_show = plan.tv_max_per_show
+    cutoff = cutoff_from_days(plan.tv_exclude_watched_days, now)
+    unwatched_only = plan.tv_unwatched_only
 
     groups: list[MediaGroup] = []
     if not shows:
         return groups
 
-    max_workers = min(8, max(1, len(shows)))
     LOGGER.info("Fetching episodes for %s shows", len(shows))
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(client.get_show_episodes, show.rating_key, None): show
-            for show in shows
-        }
-        for future in as_completed(futures):
-            show = futures[future]
-            try:
-                episodes = future.result()
-            except Exception as exc:  # pragma: no cover - defensive
-                LOGGER.warning("Failed to fetch episodes for %s: %s", show.title, exc)
-                continue
-            filtered = _filter_watched(episodes, cutoff, unwatched_only)
+    episodes_by_show = None
+    if _use_section_episodes(len(shows), section_shows, bool(plan.tv_query)):
+        episodes_by_show = _fetch_section_episodes(client, section.key, shows)
+    if episodes_by_show is None:
+        episodes_by_show = client.get_episodes_bulk(show.rating_key for show in shows)
+
+    for show in shows:
+        episodes = episodes_by_show.get(show.rating_key)
+        if not episodes:
+            continue
+        filtered = _filter_watched(episodes, cutoff, unwatched_only)
+        if max_per_show > 0:
+            ordered = heapq.nsmallest(max_per_show, filtered, key=_episode_sort_key)
+        else:
             ordered = sorted(filtered, key=_episode_sort_key)
-            if max_per_show > 0:
-                ordered = ordered[:max_per_show]
-            if not ordered:
-                continue
-            groups.append(MediaGroup(name=show.title, items=ordered, source="show"))
+        if not ordered:
+            continue
+        groups.append(MediaGroup(name=show.title, items=ordered, source="show"))
     return groups
 
 
+def _use_section_episodes(kept: int, listed: int, queried: bool) -> bool:
+    """Whether one section-wide episode query is cheaper than fetching ``kept`` shows."""
+    # A server-side query means ``listed`` is not the section's size, so the share of the
+    # section's episodes that would be kept is unknown; stay with per-show requests.
+    if queried or kept < SECTION_EPISODES_MIN_SHOWS:
+        return False
+    return kept >= listed * SECTION_EPISODES_MIN_FRACTION
+
+
+def _fetch_section_episodes(
+    client: PlexClient,
+    section_key: str,
+    shows: list[MediaItem],
+) -> dict[str, list[MediaItem]] | None:
+    """Fetch all section episodes in one query and bucket them by show (None on failure)."""
+    try:
+        episodes = client.get_section_episodes(section_key)
+    except PlexError as exc:
+        LOGGER.warning("Section-wide episode fetch failed, falling back to per-show: %s", exc)
+        return None
+    wanted = {show.rating_key for show in shows}
+    by_show: dict[str, list[MediaItem]] = defaultdict(list)
+    for episode in episodes:
+        if episode.show_rating_key in wanted:
+            by_show[episode.show_rating_key].append(episode)
+    return by_show
+
+
 def _build_movie_groups(
     client: PlexClient,
-    movie_config: dict,
+    plan: PlaylistPlan,
     now: dt.datetime,
+    sections: dict[str, LibrarySection] | None = None,
 ) -> tuple[list[MediaGroup], int]:
-    section = client.get_section_by_title(movie_config.get("library", ""))
-    query = parse_query_string(movie_config.get("query", ""))
+    section = _resolve_section(client, plan.movie_library, sections)
+    query = plan.movie_query
 
-    cutoff = cutoff_from_days(movie_config.get("filters", {}).get("exclude_watched_days"), now)
-    unwatched_only = bool(movie_config.get("filters", {}).get("unwatched_only"))
+    cutoff = cutoff_from_days(plan.movie_exclude_watched_days, now)
+    unwatched_only = plan.movie_unwatched_only
 
-    if movie_config.get("collections_as_shows"):
+    if plan.collections_as_shows:
         collections = client.get_collections(section.key, query=query)
-        collections = _filter_titles(
-            collections,
-            include=ensure_list(movie_config.get("include_collections")),
-            exclude=ensure_list(movie_config.get("exclude_collections")),
-        )
+        collections = _apply_title_matchers(collections, plan.movie_include, plan.movie_exclude)
         groups = []
         for collection in collections:
             items = client.get_collection_items(collection.rating_key)
@@ -160,64 +297,128 @@ def _build_movie_groups(
 
 
 def _filter_titles(items: list[MediaItem], include: list[str], exclude: list[str]) -> list[MediaItem]:
-    include_patterns = [pattern.strip().lower() for pattern in include if pattern]
-    exclude_patterns = [pattern.strip().lower() for pattern in exclude if pattern]
+    return _apply_title_matchers(items, _title_matcher(include), _title_matcher(exclude))
 
-    def matches(patterns: list[str], title: str) -> bool:
-        if not patterns:
-            return True
-        lowered = title.lower()
-        return any(fnmatch.fnmatch(lowered, pattern) for pattern in patterns)
+
+def _apply_title_matchers(
+    items: list[MediaItem],
+    include: TitleMatcher | None,
+    exclude: TitleMatcher | None,
+) -> list[MediaItem]:
+    if include is None and exclude is None:
+        return list(items)
 
     results: list[MediaItem] = []
     for item in items:
-        title = item.title or ""
-        if include_patterns and not matches(include_patterns, title):
+        lowered = (item.title or "").lower()
+        if include is not None and not _title_matches(include, lowered):
             continue
-        if exclude_patterns and matches(exclude_patterns, title):
+        if exclude is not None and _title_matches(exclude, lowered):
             continue
         results.append(item)
     return results
 
 
+def _title_matcher(patterns: object | None) -> TitleMatcher | None:
+    return _compile_title_patterns(tuple(pattern.strip().lower() for pattern in ensure_list(patterns) if pattern))
+
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+@lru_cache(maxsize=64)
+def _compile_title_patterns(patterns: tuple[str, ...]) -> TitleMatcher | None:
+    """Split patterns into exact titles and a compiled glob alternation (None when empty).
+
+    Patterns and titles are both lowered up front, so matching is case-sensitive on the
+    lowered text, i.e. ``fnmatch.fnmatchcase`` semantics with no per-call ``os.path.normcase``.
+    """
+    if not patterns:
+        return None
+    literals = frozenset(pattern for pattern in patterns if _GLOB_CHARS.isdisjoint(pattern))
+    globs = [pattern for pattern in patterns if not _GLOB_CHARS.isdisjoint(pattern)]
+    glob_re = re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in globs)) if globs else None
+    return literals, glob_re
+
+
+def _title_matches(matcher: TitleMatcher, lowered: str) -> bool:
+    literals, glob_re = matcher
+    if lowered in literals:
+        return True
+    return glob_re is not None and glob_re.match(lowered) is not None
+
+
 def _filter_watched(
-    items: list[MediaItem],
+    items: Iterable[MediaItem],
     cutoff: dt.datetime | None,
     unwatched_only: bool,
-) -> list[MediaItem]:
-    filtered = []
+) -> Iterator[MediaItem]:
+    """Yield items that pass the watch-history filters.
+
+    The filter flags are loop-invariant, so branch once and run a specialized loop.
+    """
+    if cutoff is None:
+        if unwatched_only:
+            for item in items:
+                if not item.view_count:
+                    yield item
+        else:
+            yield from items
+        return
+
+    if unwatched_only:
+        for item in items:
+            if item.view_count:
+                continue
+            last_viewed = item.last_viewed_at
+            if last_viewed is None or last_viewed < cutoff:
+                yield item
+        return
+
     for item in items:
-        if unwatched_only and item.view_count:
-            continue
-        if cutoff and item.last_viewed_at and item.last_viewed_at >= cutoff:
-            continue
-        filtered.append(item)
-    return filtered
+        last_viewed = item.last_viewed_at
+        if last_viewed is None or last_viewed < cutoff:
+            yield item
+
+
+_MIN_DATE = dt.date.min
 
 
+# sorted()/heapq.nsmallest() call these once per item (decorate-sort-undecorate),
+# so keep them to plain local reads with no repeated global lookups.
 def _episode_sort_key(item: MediaItem) -> tuple:
-    season = item.season_index if item.season_index is not None else 0
-    episode = item.episode_index if item.episode_index is not None else 0
-    date = item.originally_available_at or dt.date.min
-    return (season, episode, date, item.title)
+    season = item.season_index
+    episode = item.episode_index
+    return (
+        0 if season is None else season,
+        0 if episode is None else episode,
+        item.originally_available_at or _MIN_DATE,
+        item.title,
+    )
 
 
 def _movie_sort_key(item: MediaItem) -> tuple:
-    date = item.originally_available_at or dt.date.min
-    return (date, item.title)
+    return (item.originally_available_at or _MIN_DATE, item.title)
 
 
 def _create_rng(seed: str | None, now: dt.datetime) -> random.Random:
+    # Callers mutate the RNG, so only the seed value is derived/cached, never the instance.
     if not seed:
         return random.Random()
     seed_value = seed.strip().lower()
     if seed_value == "daily":
-        return random.Random(int(now.strftime("%Y%m%d")))
+        return random.Random(now.year * 10000 + now.month * 100 + now.day)
     if seed_value == "weekly":
-        return random.Random(int(now.strftime("%G%V")))
+        iso_year, iso_week, _ = now.isocalendar()
+        return random.Random(iso_year * 100 + iso_week)
     if seed_value == "monthly":
-        return random.Random(int(now.strftime("%Y%m")))
+        return random.Random(now.year * 100 + now.month)
+    return random.Random(_static_seed(seed_value))
+
+
+@lru_cache(maxsize=32)
+def _static_seed(seed_value: str) -> int | str:
     try:
-        return random.Random(int(seed_value))
+        return int(seed_value)
     except ValueError:
-        return random.Random(seed_value)
+        return seed_value
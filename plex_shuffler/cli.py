@@ -5,12 +5,13 @@ from __future__ import annotations
 import argparse
 import logging
 import random
+import sys
 import time
 
-from plex_shuffler.builder import build_playlist_items
+from plex_shuffler.builder import build_playlist_items, index_sections, plan_playlist
 from plex_shuffler.config import ConfigError, load_config, validate_config
 from plex_shuffler.plex_client import PlexClient
-from plex_shuffler.playlist import sync_playlist
+from plex_shuffler.playlist import sync_playlist, sync_state_path
 from plex_shuffler.utils import now_utc
 
 LOGGER = logging.getLogger(__name__)
@@ -65,14 +66,24 @@ def main() -> int:
         interval = args.interval_minutes or int(config.get("schedule", {}).get("interval_minutes", 0) or 0)
         jitter = int(config.get("schedule", {}).get("jitter_seconds", 0) or 0)
 
+        # Config is fixed for the life of the process, so derive each playlist's plan once
+        # instead of on every scheduled tick.
+        playlist_filters = {name.strip().lower() for name in args.playlist if name}
+        selected = [
+            (playlist_cfg, plan_playlist(playlist_cfg))
+            for playlist_cfg in config["playlists"]
+            if not playlist_filters or playlist_cfg.get("name").strip().lower() in playlist_filters
+        ]
+
+        state_path = sync_state_path(args.config)
+
         def run_once() -> None:
             now = now_utc()
-            playlist_filters = {name.strip().lower() for name in args.playlist if name}
-            for playlist_cfg in config["playlists"]:
+            # One /library/sections lookup per tick, shared by every playlist.
+            sections = index_sections(client.get_sections()) if selected else None
+            for playlist_cfg, plan in selected:
                 name = playlist_cfg.get("name")
-                if playlist_filters and name.strip().lower() not in playlist_filters:
-                    continue
-                items, stats = build_playlist_items(client, playlist_cfg, now)
+                items, stats = build_playlist_items(client, plan, now, sections=sections)
                 LOGGER.info(
                     "Built playlist %s: %s shows, %s episodes, %s movies, %s total",
                     name,
@@ -91,6 +102,7 @@ def main() -> int:
                         items=items,
                         mode=output_cfg.get("mode", "replace"),
                         chunk_size=int(output_cfg.get("chunk_size", 200) or 200),
+                        state_path=state_path,
                     )
 
         if not args.loop:
@@ -122,12 +134,15 @@ def main() -> int:
 
 
 def _print_items(items: list) -> None:
-    for item in items:
-        if item.type == "episode":
-            season = item.season_index or 0
-            episode = item.episode_index or 0
-            print(f"{item.show_title} S{season:02d}E{episode:02d} - {item.title}")
-        elif item.type == "movie":
-            print(f"Movie - {item.title}")
-        else:
-            print(item.title)
+    if not items:
+        return
+    lines = [_format_item(item) for item in items]
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _format_item(item) -> str:
+    if item.type == "episode":
+        return f"{item.show_title} S{item.season_index or 0:02d}E{item.episode_index or 0:02d} - {item.title}"
+    if item.type == "movie":
+        return f"Movie - {item.title}"
+    return item.title
@@ -4,70 +4,91 @@ from __future__ import annotations
 
 import json
 import os
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Any
 
 from plex_shuffler.utils import merge_dicts
 
-DEFAULTS: dict[str, Any] = {
-    "plex": {
-        "url": "http://localhost:32400",
-        "token": "",
-        "timeout_seconds": 30,
-        "client_id": "",
-    },
-    "schedule": {
-        "interval_minutes": 0,
-        "jitter_seconds": 30,
-    },
-    "playlists": [],
-}
-
-DEFAULT_PLAYLIST: dict[str, Any] = {
-    "name": "",
-    "description": "",
-    "tv": {
-        "library": "",
-        "query": "",
-        "include_titles": [],
-        "exclude_titles": [],
-        "episode_filters": {
-            "unwatched_only": False,
-            "exclude_watched_days": 0,
-            "max_per_show": 0,
+
+def _fresh_defaults() -> dict[str, Any]:
+    """Return new top-level defaults; merged configs are edited in place by callers."""
+    return {
+        "plex": {
+            "url": "http://localhost:32400",
+            "token": "",
+            "timeout_seconds": 30,
+            "client_id": "",
         },
-        "order": {
-            "strategy": "rounds",
-            "chunk_size": 1,
-            "seed": "",
+        "schedule": {
+            "interval_minutes": 0,
+            "jitter_seconds": 30,
         },
-    },
-    "movies": {
-        "enabled": False,
-        "library": "",
-        "query": "",
-        "collections_as_shows": False,
-        "include_collections": [],
-        "exclude_collections": [],
-        "order": {
-            "strategy": "rounds",
-            "chunk_size": 1,
-            "seed": "",
+        "playlists": [],
+    }
+
+
+DEFAULTS: dict[str, Any] = _fresh_defaults()
+
+
+def _fresh_default_playlist() -> dict[str, Any]:
+    """Return a new default playlist dict with no nested objects shared between calls."""
+    return {
+        "name": "",
+        "description": "",
+        "tv": {
+            "library": "",
+            "query": "",
+            "include_titles": [],
+            "exclude_titles": [],
+            "episode_filters": {
+                "unwatched_only": False,
+                "exclude_watched_days": 0,
+                "max_per_show": 0,
+            },
+            "order": {
+                "strategy": "rounds",
+                "chunk_size": 1,
+                "seed": "",
+            },
         },
-        "ratio": {
-            "every_episodes": 0,
-            "max_movies": 0,
+        "movies": {
+            "enabled": False,
+            "library": "",
+            "query": "",
+            "collections_as_shows": False,
+            "include_collections": [],
+            "exclude_collections": [],
+            "order": {
+                "strategy": "rounds",
+                "chunk_size": 1,
+                "seed": "",
+            },
+            "ratio": {
+                "every_episodes": 0,
+                "max_movies": 0,
+            },
+            "filters": {
+                "unwatched_only": False,
+                "exclude_watched_days": 0,
+            },
         },
-        "filters": {
-            "unwatched_only": False,
-            "exclude_watched_days": 0,
+        "output": {
+            "mode": "replace",
+            "limit_items": 0,
+            "chunk_size": 200,
         },
-    },
-    "output": {
-        "mode": "replace",
-        "limit_items": 0,
-        "chunk_size": 200,
-    },
-}
+    }
+
+
+DEFAULT_PLAYLIST: dict[str, Any] = _fresh_default_playlist()
+
+
+ORDER_STRATEGIES = frozenset({"rounds", "round_robin", "random"})
+OUTPUT_MODES = frozenset({"replace", "append"})
+
+# Shared read-only stand-in for missing/invalid config sections during validation.
+_EMPTY_SECTION: Mapping[str, Any] = MappingProxyType({})
 
 
 class ConfigError(ValueError):
@@ -102,7 +123,11 @@ def _require_positive_int(errors: list[str], path: str, value: Any) -> None:
         errors.append(f"{path} must be > 0")
 
 
-def _require_enum(errors: list[str], path: str, value: Any, allowed: set[str]) -> None:
+def _as_section(value: Any) -> Mapping[str, Any]:
+    return value if isinstance(value, dict) else _EMPTY_SECTION
+
+
+def _require_enum(errors: list[str], path: str, value: Any, allowed: frozenset[str]) -> None:
     if value is None:
         return
     raw = _as_str(value).strip()
@@ -125,13 +150,13 @@ def _require_list_of_strings(errors: list[str], path: str, value: Any) -> None:
 
 
 def default_playlist(name: str = "New Playlist") -> dict[str, Any]:
-    playlist = merge_dicts(DEFAULT_PLAYLIST, {})
+    playlist = _fresh_default_playlist()
     playlist["name"] = name
     return playlist
 
 
 def default_config() -> dict[str, Any]:
-    return merge_dicts(DEFAULTS, {"playlists": [default_playlist()]})
+    return merge_dicts(_fresh_defaults(), {"playlists": [default_playlist()]})
 
 
 def _resolve_token(raw_token: str) -> str:
@@ -149,14 +174,38 @@ def _resolve_token(raw_token: str) -> str:
 
 
 def _normalize_playlist(raw: dict[str, Any]) -> dict[str, Any]:
-    return merge_dicts(DEFAULT_PLAYLIST, raw)
+    """Overlay a raw playlist onto fresh defaults.
+
+    The default schema is at most three dicts deep (playlist -> section -> group) and the
+    innermost groups hold only scalars, so a fixed two-level walk plus ``dict.update``
+    matches ``merge_dicts`` without generic recursion.
+    """
+    if not isinstance(raw, dict):
+        return raw
+    playlist = _fresh_default_playlist()
+    for key, value in raw.items():
+        section = playlist.get(key)
+        if not (isinstance(section, dict) and isinstance(value, dict)):
+            playlist[key] = value
+            continue
+        for sub_key, sub_value in value.items():
+            group = section.get(sub_key)
+            if isinstance(group, dict) and isinstance(sub_value, dict):
+                group.update(sub_value)
+            else:
+                section[sub_key] = sub_value
+    return playlist
 
 
-def load_config(path: str) -> dict[str, Any]:
+def _read_json_file(path: str) -> Any:
     with open(path, "r", encoding="utf-8") as handle:
-        raw = json.load(handle)
+        return json.loads(handle.read())
+
 
-    config = merge_dicts(DEFAULTS, raw)
+def load_config(path: str) -> dict[str, Any]:
+    raw = _read_json_file(path)
+
+    config = merge_dicts(_fresh_defaults(), raw)
     playlists = []
     for entry in raw.get("playlists", []):
         playlists.append(_normalize_playlist(entry))
@@ -170,10 +219,9 @@ def load_config_raw(path: str) -> dict[str, Any]:
     if not os.path.exists(path):
         return default_config()
 
-    with open(path, "r", encoding="utf-8") as handle:
-        raw = json.load(handle)
+    raw = _read_json_file(path)
 
-    config = merge_dicts(DEFAULTS, raw)
+    config = merge_dicts(_fresh_defaults(), raw)
     playlists = []
     for entry in raw.get("playlists", []):
         playlists.append(_normalize_playlist(entry))
@@ -184,9 +232,10 @@ def load_config_raw(path: str) -> dict[str, Any]:
 
 
 def save_config(path: str, config: dict[str, Any]) -> None:
+    # json.dump() issues one write() per encoder chunk; encode first and write once.
+    payload = json.dumps(config, indent=2, sort_keys=False) + "\n"
     with open(path, "w", encoding="utf-8") as handle:
-        json.dump(config, handle, indent=2, sort_keys=False)
-        handle.write("\n")
+        handle.write(payload)
 
 
 def apply_plex_overrides(config: dict[str, Any], plex_url: str | None) -> dict[str, Any]:
@@ -223,37 +272,39 @@ def validate_config(config: dict[str, Any]) -> None:
         if not isinstance(playlist, dict):
             errors.append(f"{base} must be an object")
             continue
-        name = playlist.get("name")
-        if not name:
+        if not playlist.get("name"):
             errors.append(f"{base}.name is required")
-        tv = playlist.get("tv", {})
-        if not tv.get("library"):
+
+        tv = _as_section(playlist.get("tv"))
+        tv_get = tv.get
+        if not tv_get("library"):
             errors.append(f"{base}.tv.library is required")
 
-        _require_list_of_strings(errors, f"{base}.tv.include_titles", tv.get("include_titles"))
-        _require_list_of_strings(errors, f"{base}.tv.exclude_titles", tv.get("exclude_titles"))
+        _require_list_of_strings(errors, f"{base}.tv.include_titles", tv_get("include_titles"))
+        _require_list_of_strings(errors, f"{base}.tv.exclude_titles", tv_get("exclude_titles"))
 
-        episode_filters = tv.get("episode_filters", {}) if isinstance(tv.get("episode_filters"), dict) else {}
+        episode_filters = _as_section(tv_get("episode_filters"))
         _require_non_negative_int(errors, f"{base}.tv.episode_filters.exclude_watched_days", episode_filters.get("exclude_watched_days"))
         _require_non_negative_int(errors, f"{base}.tv.episode_filters.max_per_show", episode_filters.get("max_per_show"))
 
-        tv_order = tv.get("order", {}) if isinstance(tv.get("order"), dict) else {}
-        _require_enum(errors, f"{base}.tv.order.strategy", tv_order.get("strategy"), {"rounds", "round_robin", "random"})
+        tv_order = _as_section(tv_get("order"))
+        _require_enum(errors, f"{base}.tv.order.strategy", tv_order.get("strategy"), ORDER_STRATEGIES)
         _require_positive_int(errors, f"{base}.tv.order.chunk_size", tv_order.get("chunk_size"))
 
-        movies = playlist.get("movies", {})
-        if movies.get("enabled") and not movies.get("library"):
-            errors.append(f"{base}.movies.library is required when movies.enabled=true")
+        raw_movies = playlist.get("movies")
+        if isinstance(raw_movies, dict):
+            movies_get = raw_movies.get
+            if movies_get("enabled") and not movies_get("library"):
+                errors.append(f"{base}.movies.library is required when movies.enabled=true")
 
-        if isinstance(movies, dict):
-            _require_list_of_strings(errors, f"{base}.movies.include_collections", movies.get("include_collections"))
-            _require_list_of_strings(errors, f"{base}.movies.exclude_collections", movies.get("exclude_collections"))
+            _require_list_of_strings(errors, f"{base}.movies.include_collections", movies_get("include_collections"))
+            _require_list_of_strings(errors, f"{base}.movies.exclude_collections", movies_get("exclude_collections"))
 
-            movie_order = movies.get("order", {}) if isinstance(movies.get("order"), dict) else {}
-            _require_enum(errors, f"{base}.movies.order.strategy", movie_order.get("strategy"), {"rounds", "round_robin", "random"})
+            movie_order = _as_section(movies_get("order"))
+            _require_enum(errors, f"{base}.movies.order.strategy", movie_order.get("strategy"), ORDER_STRATEGIES)
             _require_positive_int(errors, f"{base}.movies.order.chunk_size", movie_order.get("chunk_size"))
 
-            ratio = movies.get("ratio", {}) if isinstance(movies.get("ratio"), dict) else {}
+            ratio = _as_section(movies_get("ratio"))
             every = ratio.get("every_episodes")
             max_movies = ratio.get("max_movies")
             _require_non_negative_int(errors, f"{base}.movies.ratio.every_episodes", every)
@@ -262,12 +313,12 @@ def validate_config(config: dict[str, Any]) -> None:
                 if not (_is_int(every) and every > 0):
                     errors.append(f"{base}.movies.ratio.max_movies requires movies.ratio.every_episodes > 0")
 
-            movie_filters = movies.get("filters", {}) if isinstance(movies.get("filters"), dict) else {}
+            movie_filters = _as_section(movies_get("filters"))
             _require_non_negative_int(errors, f"{base}.movies.filters.exclude_watched_days", movie_filters.get("exclude_watched_days"))
 
-        output_cfg = playlist.get("output", {})
+        output_cfg = playlist.get("output")
         if isinstance(output_cfg, dict):
-            _require_enum(errors, f"{base}.output.mode", output_cfg.get("mode"), {"replace", "append"})
+            _require_enum(errors, f"{base}.output.mode", output_cfg.get("mode"), OUTPUT_MODES)
             _require_non_negative_int(errors, f"{base}.output.limit_items", output_cfg.get("limit_items"))
             _require_positive_int(errors, f"{base}.output.chunk_size", output_cfg.get("chunk_size"))
 
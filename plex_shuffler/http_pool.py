@@ -0,0 +1,228 @@
+"""Keep-alive HTTP connections on top of the standard library's http.client."""
+
+from __future__ import annotations
+
+import base64
+import http.client
+import select
+import threading
+from dataclasses import dataclass
+from email.message import Message
+from urllib.parse import unquote, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+# Errors that mean a reused keep-alive socket was closed by the server while idle.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.ResponseNotReady,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+# Methods that are safe to send again when a reused socket fails after the request went out.
+# PUT is left out: Plex's PUT /playlists/{id}/items appends, so a repeat duplicates items.
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "DELETE"})
+
+
+class _RequestNotSent(Exception):
+    """The socket failed while sending, so the server cannot have acted on the request."""
+
+
+@dataclass(frozen=True)
+class PooledResponse:
+    status: int
+    headers: Message
+    body: bytes
+
+
+class ConnectionPool:
+    """Per-thread persistent connections to a single scheme/host/port.
+
+    ``http.client`` connections are not thread-safe, so each thread keeps its own socket;
+    repeated requests from the same thread reuse it instead of reconnecting (and
+    re-handshaking TLS) every time. Sockets left behind by threads that have exited are
+    closed the next time a connection is opened, so long-lived pools used from short-lived
+    threads (one per web request) do not accumulate them.
+
+    Proxies come from the environment like ``urlopen``'s (``HTTPS_PROXY``, ``NO_PROXY``...):
+    https is tunnelled with CONNECT, plain http is sent to the proxy in absolute form.
+    """
+
+    def __init__(self, url: str, timeout: float = 30) -> None:
+        parts = urlsplit(url)
+        self.url = url
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        try:
+            self.port = parts.port
+        except ValueError:
+            self.host, self.port = None, None
+        self.timeout = timeout
+        self._proxy = _proxy_for(self.scheme, self.host)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[tuple[threading.Thread, http.client.HTTPConnection]] = []
+
+    def request(self, method: str, url: str, headers: dict[str, str] | None = None) -> PooledResponse:
+        """Send a request and read the full response body.
+
+        Raises ``OSError``/``http.client.HTTPException`` on transport failures; HTTP error
+        statuses are returned, not raised.
+        """
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        headers = dict(headers or {})
+        if self._proxy is not None and self.scheme == "http":
+            target = f"{self.scheme}://{parts.netloc}{target}"
+            if self._proxy[2]:
+                headers["Proxy-Authorization"] = self._proxy[2]
+        idempotent = method.upper() in _IDEMPOTENT_METHODS
+
+        connection, reused = self._connection()
+        if reused and not idempotent and _peer_closed(connection):
+            # A write cannot be retried once sent, so drop a socket the server already closed.
+            self._discard(connection)
+            connection, reused = self._connection()
+        try:
+            return self._send(connection, method, target, headers)
+        except _RequestNotSent as exc:
+            self._discard(connection)
+            if not reused:
+                raise exc.__cause__ from None
+        except _STALE_CONNECTION_ERRORS:
+            self._discard(connection)
+            # The request went out; the server may have acted on it before dropping the socket.
+            if not reused or not idempotent:
+                raise
+        # The server dropped an idle keep-alive socket; retry once on a fresh one.
+        connection, _ = self._connection()
+        try:
+            return self._send(connection, method, target, headers)
+        except _RequestNotSent as exc:
+            self._discard(connection)
+            raise exc.__cause__ from None
+        except BaseException:
+            self._discard(connection)
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _send(
+        self,
+        connection: http.client.HTTPConnection,
+        method: str,
+        target: str,
+        headers: dict[str, str],
+    ) -> PooledResponse:
+        try:
+            connection.request(method, target, headers=headers)
+        except _STALE_CONNECTION_ERRORS as exc:
+            raise _RequestNotSent() from exc
+        except BaseException:
+            self._discard(connection)
+            raise
+        try:
+            response = connection.getresponse()
+            body = response.read()
+        except _STALE_CONNECTION_ERRORS:
+            raise
+        except BaseException:
+            self._discard(connection)
+            raise
+        if response.will_close:
+            self._discard(connection)
+        return PooledResponse(status=response.status, headers=response.headers, body=body)
+
+    def _connection(self) -> tuple[http.client.HTTPConnection, bool]:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            return connection, True
+        if self.scheme not in ("http", "https") or not self.host:
+            raise http.client.InvalidURL(f"unsupported URL: {self.url!r}")
+        if self._proxy is not None:
+            proxy_host, proxy_port, proxy_auth = self._proxy
+            if self.scheme == "https":
+                connection = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=self.timeout)
+                connection.set_tunnel(
+                    self.host,
+                    self.port,
+                    headers={"Proxy-Authorization": proxy_auth} if proxy_auth else None,
+                )
+            else:
+                connection = http.client.HTTPConnection(proxy_host, proxy_port, timeout=self.timeout)
+        elif self.scheme == "https":
+            connection = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        else:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self._local.connection = connection
+        with self._lock:
+            orphaned = [conn for owner, conn in self._connections if not owner.is_alive()]
+            self._connections = [(owner, conn) for owner, conn in self._connections if owner.is_alive()]
+            self._connections.append((threading.current_thread(), connection))
+        for conn in orphaned:
+            conn.close()
+        return connection, False
+
+    def _discard(self, connection: http.client.HTTPConnection) -> None:
+        connection.close()
+        if getattr(self._local, "connection", None) is connection:
+            self._local.connection = None
+        with self._lock:
+            self._connections = [(owner, conn) for owner, conn in self._connections if conn is not connection]
+
+
+def _proxy_for(scheme: str, host: str | None) -> tuple[str, int, str | None] | None:
+    """Return (host, port, Proxy-Authorization value) for the environment's proxy, if any."""
+    proxy = getproxies().get(scheme)
+    if not proxy or not host or proxy_bypass(host):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    parts = urlsplit(proxy)
+    if not parts.hostname:
+        return None
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        return None
+    auth = None
+    if parts.username is not None:
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        auth = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+    return parts.hostname, port, auth
+
+
+def _peer_closed(connection: http.client.HTTPConnection) -> bool:
+    """True when an idle keep-alive socket is readable, i.e. the server closed it (or sent junk)."""
+    sock = connection.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+_POOLS: dict[tuple[str, str, int | None, float], ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def shared_pool(url: str, timeout: float = 30) -> ConnectionPool:
+    """Return a process-wide pool for the URL's origin (used for plex.tv endpoints)."""
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.hostname or "", parts.port, timeout)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = ConnectionPool(url, timeout=timeout)
+            _POOLS[key] = pool
+        return pool
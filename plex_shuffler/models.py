@@ -6,19 +6,20 @@ from dataclasses import dataclass
 import datetime as dt
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LibrarySection:
     key: str
     title: str
     type: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MediaItem:
     rating_key: str
     title: str
     type: str
     show_title: str | None = None
+    show_rating_key: str | None = None
     season_index: int | None = None
     episode_index: int | None = None
     collection_title: str | None = None
@@ -27,15 +28,16 @@ class MediaItem:
     last_viewed_at: dt.datetime | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MediaGroup:
     name: str
     items: list[MediaItem]
     source: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PlaylistInfo:
     rating_key: str
     title: str
     playlist_type: str
+    leaf_count: int | None = None
@@ -2,11 +2,16 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import os
+from pathlib import Path
+from typing import Any
 
 from plex_shuffler.models import MediaItem, PlaylistInfo
 from plex_shuffler.plex_client import PlexClient
-from plex_shuffler.utils import chunked
+from plex_shuffler.utils import chunked, normalize_title, write_json_atomic
 
 LOGGER = logging.getLogger(__name__)
 
@@ -17,39 +22,98 @@ def sync_playlist(
     items: list[MediaItem],
     mode: str = "replace",
     chunk_size: int = 200,
+    state_path: str | None = None,
 ) -> PlaylistInfo | None:
+    """Write items to a Plex playlist.
+
+    When ``state_path`` is set and mode is ``replace``, the digest of the last synced item
+    order is persisted there and an identical rebuild skips all Plex writes.
+    """
     if not items:
         LOGGER.warning("Playlist %s has no items; skipping", name)
         return None
 
     existing = _find_playlist(client, name)
     mode = (mode or "replace").lower()
+    rating_keys = [item.rating_key for item in items]
+
+    state: dict[str, Any] | None = None
+    digest = ""
+    if state_path and mode == "replace":
+        state = load_sync_state(state_path)
+        digest = playlist_digest(rating_keys)
+        if existing and _is_unchanged(state.get(name), existing, digest, len(rating_keys)):
+            LOGGER.info("Playlist %s is unchanged; skipping sync", name)
+            return existing
 
     if existing and mode == "replace":
         LOGGER.info("Deleting existing playlist: %s", name)
         client.delete_playlist(existing.rating_key)
         existing = None
 
-    rating_keys = [item.rating_key for item in items]
     chunks = chunked(rating_keys, chunk_size)
 
     playlist = existing
     if not playlist:
         LOGGER.info("Creating playlist %s with %s items", name, len(items))
-        playlist = client.create_playlist(name, chunks[0])
+        playlist = client.create_playlist(name, next(chunks))
     else:
         LOGGER.info("Appending to existing playlist %s", name)
 
-    for chunk in chunks[1:]:
+    for chunk in chunks:
         client.add_playlist_items(playlist.rating_key, chunk)
 
+    if state is not None:
+        state[name] = {"rating_key": playlist.rating_key, "digest": digest, "count": len(rating_keys)}
+        save_sync_state(state_path, state)
+
     return playlist
 
 
+def sync_state_path(config_path: str) -> str:
+    """Return the sync state file stored next to a config file."""
+    root, _ = os.path.splitext(config_path)
+    return f"{root}.state.json"
+
+
+def playlist_digest(rating_keys: list[str]) -> str:
+    return hashlib.blake2b("\n".join(rating_keys).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def load_sync_state(path: str) -> dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            state = json.loads(handle.read())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as exc:
+        LOGGER.warning("Ignoring unreadable sync state %s: %s", path, exc)
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_sync_state(path: str, state: dict[str, Any]) -> None:
+    try:
+        write_json_atomic(Path(path), state)
+    except OSError as exc:
+        LOGGER.warning("Unable to write sync state %s: %s", path, exc)
+
+
+def _is_unchanged(entry: Any, existing: PlaylistInfo, digest: str, count: int) -> bool:
+    if not isinstance(entry, dict):
+        return False
+    if entry.get("rating_key") != existing.rating_key or entry.get("digest") != digest:
+        return False
+    if entry.get("count") != count:
+        return False
+    # leafCount catches items added/removed in Plex since the last sync.
+    return existing.leaf_count is None or existing.leaf_count == count
+
+
 def _find_playlist(client: PlexClient, name: str) -> PlaylistInfo | None:
     playlists = client.get_playlists(title=name)
-    lowered = name.strip().lower()
+    lowered = normalize_title(name)
     for playlist in playlists:
-        if playlist.title.strip().lower() == lowered:
+        if normalize_title(playlist.title) == lowered:
             return playlist
     return None
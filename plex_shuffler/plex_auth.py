@@ -2,13 +2,20 @@
 
 from __future__ import annotations
 
+import copy
+import hashlib
 import json
 import logging
+import threading
+import time
 from dataclasses import dataclass
+from http.client import HTTPException
+from pathlib import Path
 from typing import Any
-from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode, quote
-from urllib.request import Request, urlopen
+
+from plex_shuffler.http_pool import shared_pool
+from plex_shuffler.utils import read_json_file, user_cache_dir, write_json_atomic
 
 LOGGER = logging.getLogger(__name__)
 
@@ -17,9 +24,18 @@ PLEX_AUTH_URL = "https://app.plex.tv/auth"
 PLEX_USER_URL = "https://plex.tv/api/v2/user"
 PLEX_RESOURCES_URL = "https://plex.tv/api/v2/resources"
 
+# How long plex.tv account/resource lookups are reused for the same token.
+USER_CACHE_TTL = 7 * 24 * 3600
+RESOURCES_CACHE_TTL = 3600
+# Claimed PINs answer repeat polls for about as long as plex.tv keeps a PIN alive.
+CLAIMED_PIN_TTL = 30 * 60
+CLAIMED_PIN_CACHE_SIZE = 32
+
 
 class PlexAuthError(RuntimeError):
-    pass
+    def __init__(self, message: str, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
 
 
 @dataclass(frozen=True)
@@ -70,17 +86,32 @@ def check_pin(
     device_name: str,
     version: str,
 ) -> PlexPin:
+    with _CACHE_LOCK:
+        claimed = _CLAIMED_PINS.get((pin_id, client_id))
+    if claimed is not None and claimed[0] > time.time():
+        return claimed[1]
+
     headers = _plex_headers(client_id, product, platform, device, device_name, version)
     data = _request_json(f"{PLEX_PIN_URL}/{pin_id}", headers=headers)
 
     auth_token = data.get("authToken")
-    return PlexPin(
+    pin = PlexPin(
         pin_id=int(data.get("id")),
         code=data.get("code"),
         expires_at=data.get("expiresAt"),
         auth_url="",
         auth_token=auth_token,
     )
+    if auth_token:
+        # A claimed PIN never changes again; answer further polls without plex.tv.
+        now = time.time()
+        with _CACHE_LOCK:
+            for key in [key for key, (expires_at, _) in _CLAIMED_PINS.items() if expires_at <= now]:
+                del _CLAIMED_PINS[key]
+            _CLAIMED_PINS[(pin_id, client_id)] = (now + CLAIMED_PIN_TTL, pin)
+            while len(_CLAIMED_PINS) > CLAIMED_PIN_CACHE_SIZE:
+                del _CLAIMED_PINS[next(iter(_CLAIMED_PINS))]
+    return pin
 
 
 def fetch_user(
@@ -92,9 +123,14 @@ def fetch_user(
     device_name: str,
     version: str,
 ) -> dict[str, Any]:
+    cached = _cache_get("user", token, client_id)
+    if cached is not None:
+        return cached
     headers = _plex_headers(client_id, product, platform, device, device_name, version)
     headers["X-Plex-Token"] = token
-    return _request_json(PLEX_USER_URL, headers=headers)
+    data = _strip_tokens(_request_token_json(PLEX_USER_URL, headers=headers, token=token))
+    _cache_put("user", token, client_id, data, USER_CACHE_TTL)
+    return data
 
 
 def fetch_resources(
@@ -106,13 +142,29 @@ def fetch_resources(
     device_name: str,
     version: str,
 ) -> list[dict[str, Any]]:
+    cached = _cache_get("resources", token, client_id)
+    if cached is not None:
+        return cached
     headers = _plex_headers(client_id, product, platform, device, device_name, version)
     headers["X-Plex-Token"] = token
     params = urlencode({"includeHttps": "1", "includeRelay": "1", "includeIPv6": "1"})
-    data = _request_json(f"{PLEX_RESOURCES_URL}?{params}", headers=headers)
-    if isinstance(data, list):
-        return data
-    return []
+    data = _request_token_json(f"{PLEX_RESOURCES_URL}?{params}", headers=headers, token=token)
+    resources = _strip_tokens(data) if isinstance(data, list) else []
+    _cache_put("resources", token, client_id, resources, RESOURCES_CACHE_TTL)
+    return resources
+
+
+def clear_auth_cache(token: str | None = None) -> None:
+    """Forget cached plex.tv lookups in memory and on disk (only ``token``'s, when given)."""
+    global _auth_cache_loaded
+    if token is not None:
+        _cache_forget_token(token)
+        return
+    with _CACHE_LOCK:
+        _CLAIMED_PINS.clear()
+        _AUTH_CACHE.clear()
+        _auth_cache_loaded = True
+        _persist_auth_cache()
 
 
 def build_auth_url(
@@ -159,18 +211,130 @@ def _plex_headers(
 
 
 def _request_json(url: str, headers: dict[str, str], method: str = "GET") -> dict[str, Any]:
-    request = Request(url, headers=headers, method=method)
     try:
-        with urlopen(request, timeout=20) as response:
-            payload = response.read()
-    except HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace") if exc.fp else ""
-        raise PlexAuthError(f"Plex auth error {exc.code} for {url}: {body}") from exc
-    except URLError as exc:
+        response = shared_pool(url, timeout=20).request(method, url, headers=headers)
+    except (OSError, HTTPException) as exc:
         raise PlexAuthError(f"Plex auth connection error for {url}: {exc}") from exc
+    payload = response.body
+    if response.status >= 400:
+        body = payload.decode("utf-8", errors="replace")
+        raise PlexAuthError(f"Plex auth error {response.status} for {url}: {body}", status=response.status)
 
     try:
-        return json.loads(payload.decode("utf-8"))
-    except json.JSONDecodeError as exc:
+        # json.loads detects the encoding of bytes itself (and tolerates a UTF-8 BOM).
+        return json.loads(payload)
+    except ValueError as exc:  # JSONDecodeError or UnicodeDecodeError
         snippet = payload[:200].decode("utf-8", errors="replace")
         raise PlexAuthError(f"Invalid Plex auth response: {snippet}") from exc
+
+
+def _request_token_json(url: str, headers: dict[str, str], token: str) -> Any:
+    try:
+        return _request_json(url, headers=headers)
+    except PlexAuthError as exc:
+        if exc.status == 401:
+            # Revoked or rotated token: drop everything cached for it so the next call refetches.
+            _cache_forget_token(token)
+        raise
+
+
+# Cached plex.tv lookups, keyed by (kind, token digest, client id) -> (expires_at, payload).
+# Mirrored to the user cache dir so restarts reuse them. Payloads are stored without their
+# credential fields (see _strip_tokens), and the token itself only appears as a digest.
+_AUTH_CACHE: dict[tuple[str, str, str], tuple[float, Any]] = {}
+_auth_cache_loaded = False
+# (pin id, client id) -> (expires_at, pin); insertion order doubles as age order.
+_CLAIMED_PINS: dict[tuple[int, str], tuple[float, PlexPin]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _strip_tokens(payload: Any) -> Any:
+    """Return a copy of a plex.tv payload without ``authToken``/``accessToken``-style keys."""
+    if isinstance(payload, dict):
+        return {
+            key: _strip_tokens(value)
+            for key, value in payload.items()
+            if not (isinstance(key, str) and (key.endswith("Token") or key.lower() == "token"))
+        }
+    if isinstance(payload, list):
+        return [_strip_tokens(value) for value in payload]
+    return payload
+
+
+def _auth_cache_path() -> Path:
+    return user_cache_dir() / "plex_auth.json"
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_get(kind: str, token: str, client_id: str) -> Any | None:
+    key = (kind, _token_digest(token), client_id)
+    with _CACHE_LOCK:
+        _load_auth_cache()
+        entry = _AUTH_CACHE.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del _AUTH_CACHE[key]
+            return None
+        return copy.deepcopy(payload)
+
+
+def _cache_put(kind: str, token: str, client_id: str, payload: Any, ttl: float) -> None:
+    key = (kind, _token_digest(token), client_id)
+    with _CACHE_LOCK:
+        _load_auth_cache()
+        _AUTH_CACHE[key] = (time.time() + ttl, _strip_tokens(payload))
+        _persist_auth_cache()
+
+
+def _cache_forget_token(token: str) -> None:
+    digest = _token_digest(token)
+    with _CACHE_LOCK:
+        _load_auth_cache()
+        stale = [key for key in _AUTH_CACHE if key[1] == digest]
+        for key in stale:
+            del _AUTH_CACHE[key]
+        if stale:
+            _persist_auth_cache()
+
+
+def _load_auth_cache() -> None:
+    global _auth_cache_loaded
+    if _auth_cache_loaded:
+        return
+    _auth_cache_loaded = True
+    data = read_json_file(_auth_cache_path())
+    if not isinstance(data, list):
+        return
+    now = time.time()
+    scrubbed = False
+    for entry in data:
+        try:
+            kind, digest, client_id, expires_at, payload = entry
+        except (TypeError, ValueError):
+            continue
+        if isinstance(expires_at, (int, float)) and expires_at > now:
+            cleaned = _strip_tokens(payload)
+            scrubbed = scrubbed or cleaned != payload
+            _AUTH_CACHE[(str(kind), str(digest), str(client_id))] = (float(expires_at), cleaned)
+    if scrubbed:
+        # Files written before tokens were stripped still hold them; rewrite without.
+        _persist_auth_cache()
+
+
+def _persist_auth_cache() -> None:
+    now = time.time()
+    entries = [
+        [kind, digest, client_id, expires_at, payload]
+        for (kind, digest, client_id), (expires_at, payload) in _AUTH_CACHE.items()
+        if expires_at > now
+    ]
+    path = _auth_cache_path()
+    try:
+        write_json_atomic(path, entries)
+    except OSError as exc:
+        LOGGER.debug("Unable to persist Plex auth cache %s: %s", path, exc)
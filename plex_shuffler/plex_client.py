@@ -4,20 +4,46 @@ from __future__ import annotations
 
 import datetime as dt
 import logging
-from typing import Iterable
-from urllib.error import HTTPError, URLError
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException
+from pathlib import Path
+from typing import Generator, Iterable, Iterator, Sequence
 from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 import xml.etree.ElementTree as ET
 
 from plex_shuffler import __version__
+from plex_shuffler.http_pool import ConnectionPool
 from plex_shuffler.models import LibrarySection, MediaItem, PlaylistInfo
+from plex_shuffler.utils import normalize_title, read_json_file, user_cache_dir, write_json_atomic
 
 LOGGER = logging.getLogger(__name__)
 
+# Seconds a PlexClient reuses its section list when resolving libraries by title.
+SECTIONS_CACHE_TTL = 60
+
+# Most rating keys sent in one playlist URI, which keeps request URLs well under 8 KB.
+PLAYLIST_URI_BATCH_SIZE = 200
+
+# Conditional-GET cache shared by all clients in the process, keyed by (token, url). Only
+# small metadata listings opt in (sections, collections, filter values); episode and
+# movie pages are never kept. Bounded by total body bytes and by the largest body kept.
+ETAG_CACHE_MAX_BYTES = 4 * 1024 * 1024
+ETAG_CACHE_MAX_BODY = 256 * 1024
+_ETAG_CACHE: OrderedDict[tuple[str, str], tuple[str, bytes]] = OrderedDict()
+_etag_cache_bytes = 0
+_ETAG_LOCK = threading.Lock()
+
+# Bytes fed to the pull parser between event drains in PlexClient._iter_entries.
+_PARSE_CHUNK_SIZE = 64 * 1024
+
 
 class PlexError(RuntimeError):
-    pass
+    def __init__(self, message: str, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
 
 
 class PlexClient:
@@ -33,6 +59,20 @@ class PlexClient:
         self.timeout = timeout
         self.client_identifier = client_identifier
         self._machine_identifier: str | None = None
+        self._machine_identifier_cached = False
+        self._pool = ConnectionPool(self.base_url, timeout=timeout)
+        self._sections_cache: tuple[float, dict[str, LibrarySection]] | None = None
+        self._headers = {
+            "X-Plex-Token": token,
+            "X-Plex-Product": "Plex Shuffler Studio",
+            "X-Plex-Version": __version__,
+            "X-Plex-Client-Identifier": client_identifier,
+            "Accept": "application/xml",
+        }
+
+    def close(self) -> None:
+        """Close pooled keep-alive connections to the Plex server."""
+        self._pool.close()
 
     @staticmethod
     def _truncate_body(body: str, limit: int = 800) -> str:
@@ -48,82 +88,116 @@ class PlexClient:
         path: str,
         params: Iterable[tuple[str, str]] | None = None,
         method: str = "GET",
+        conditional: bool = False,
     ) -> ET.Element:
+        url, data = self._request_bytes(path, params=params, method=method, conditional=conditional)
+        try:
+            return ET.fromstring(data)
+        except ET.ParseError as exc:
+            raise _invalid_response(url, data) from exc
+
+    def _request_bytes(
+        self,
+        path: str,
+        params: Iterable[tuple[str, str]] | None = None,
+        method: str = "GET",
+        conditional: bool = False,
+    ) -> tuple[str, bytes]:
+        """Send a request; ``conditional`` GETs revalidate a cached body with its ETag."""
         url = f"{self.base_url}{path}"
         if params:
             url = f"{url}?{urlencode(list(params), doseq=True)}"
 
-        headers = {
-            "X-Plex-Token": self.token,
-            "X-Plex-Product": "Plex Shuffler Studio",
-            "X-Plex-Version": __version__,
-            "X-Plex-Client-Identifier": self.client_identifier,
-            "Accept": "application/xml",
-        }
+        headers = self._headers
+        conditional = conditional and method == "GET"
+        cached = self._etag_lookup(url) if conditional else None
+        if cached is not None:
+            headers = {**headers, "If-None-Match": cached[0]}
 
-        request = Request(url, headers=headers, method=method)
         try:
-            with urlopen(request, timeout=self.timeout) as response:
-                data = response.read()
-        except HTTPError as exc:
-            body = exc.read().decode("utf-8", errors="replace") if exc.fp else ""
-            body = self._truncate_body(body)
-            raise PlexError(f"Plex API error {exc.code} for {url}: {body}") from exc
-        except URLError as exc:
+            response = self._pool.request(method, url, headers=headers)
+        except (OSError, HTTPException) as exc:
             raise PlexError(f"Plex API connection error for {url}: {exc}") from exc
-
-        try:
-            return ET.fromstring(data)
-        except ET.ParseError as exc:
-            snippet = data[:200].decode("utf-8", errors="replace")
-            raise PlexError(f"Invalid Plex API response from {url}: {snippet}") from exc
-
-    def _request_pages(
+        if response.status == 304 and cached is not None:
+            return url, cached[1]
+        data = response.body
+        if response.status >= 400:
+            body = self._truncate_body(data.decode("utf-8", errors="replace"))
+            raise PlexError(f"Plex API error {response.status} for {url}: {body}", status=response.status)
+        if conditional:
+            self._etag_store(url, response.headers.get("ETag"), data)
+        return url, data
+
+    def _etag_lookup(self, url: str) -> tuple[str, bytes] | None:
+        key = (self.token, url)
+        with _ETAG_LOCK:
+            entry = _ETAG_CACHE.get(key)
+            if entry is not None:
+                _ETAG_CACHE.move_to_end(key)
+            return entry
+
+    def _etag_store(self, url: str, etag: str | None, data: bytes) -> None:
+        """Remember a validator for conditional GETs; LRU bounded by total body bytes."""
+        global _etag_cache_bytes
+        key = (self.token, url)
+        with _ETAG_LOCK:
+            previous = _ETAG_CACHE.pop(key, None)
+            if previous is not None:
+                _etag_cache_bytes -= len(previous[1])
+            if not etag or len(data) > ETAG_CACHE_MAX_BODY:
+                return
+            _ETAG_CACHE[key] = (etag, data)
+            _etag_cache_bytes += len(data)
+            while _etag_cache_bytes > ETAG_CACHE_MAX_BYTES:
+                _, (_, evicted) = _ETAG_CACHE.popitem(last=False)
+                _etag_cache_bytes -= len(evicted)
+
+    def _iter_entries(
         self,
         path: str,
+        tag: str,
         params: list[tuple[str, str]] | None = None,
         page_size: int = 200,
-    ) -> list[ET.Element]:
-        """Fetch one or more pages for a Plex container response.
+        conditional: bool = False,
+    ) -> Iterator[ET.Element]:
+        """Yield the container's ``tag`` children one at a time across all pages.
 
         Plex supports pagination via query params:
         - X-Plex-Container-Start
         - X-Plex-Container-Size
+
+        Each page is pull-parsed and every child is detached once consumed, so large
+        ``allLeaves``/``all`` responses never hold a full DOM (with all the nested
+        ``Media``/``Part``/``Stream`` elements) in memory at once.
         """
+        start: int | None = 0
+        while start is not None:
+            url, data = self._request_bytes(
+                path, params=_page_params(params, start, page_size), conditional=conditional
+            )
+            attrib = yield from _iter_children(url, data, tag)
+            start = _next_page_start(attrib, start)
 
-        start = 0
-        pages: list[ET.Element] = []
-        while True:
-            page_params: list[tuple[str, str]] = list(params or [])
-            page_params.append(("X-Plex-Container-Start", str(start)))
-            page_params.append(("X-Plex-Container-Size", str(page_size)))
-            root = self._request(path, params=page_params)
-            pages.append(root)
-
-            total_raw = root.attrib.get("totalSize") or root.attrib.get("size")
-            try:
-                total = int(total_raw) if total_raw else 0
-            except ValueError:
-                total = 0
-            if total <= 0:
-                break
-
-            size_raw = root.attrib.get("size")
-            try:
-                size = int(size_raw) if size_raw else 0
-            except ValueError:
-                size = 0
-            if size <= 0:
-                break
-
-            start += size
-            if start >= total:
-                break
-        return pages
+    def _iter_container(
+        self,
+        path: str,
+        tag: str,
+        params: list[tuple[str, str]] | None = None,
+        conditional: bool = False,
+    ) -> Iterator[ET.Element]:
+        """Like ``_iter_entries`` for small, unpaginated containers (sections, playlists)."""
+        url, data = self._request_bytes(path, params=params, conditional=conditional)
+        yield from _iter_children(url, data, tag)
 
     def _get_machine_identifier(self) -> str:
+        """Resolve the server machine identifier: instance -> process/disk cache -> /identity."""
         if self._machine_identifier:
             return self._machine_identifier
+        cached = _load_cached_machine_id(self.base_url)
+        if cached:
+            self._machine_identifier = cached
+            self._machine_identifier_cached = True
+            return cached
         root = self._request("/identity")
         machine_identifier = root.attrib.get("machineIdentifier")
         if not machine_identifier:
@@ -133,12 +207,22 @@ class PlexClient:
         if not machine_identifier:
             raise PlexError("Unable to determine Plex machine identifier from /identity")
         self._machine_identifier = machine_identifier
+        self._machine_identifier_cached = False
+        _save_cached_machine_id(self.base_url, machine_identifier)
         return self._machine_identifier
 
+    def _forget_machine_identifier(self) -> bool:
+        """Drop a cache-sourced identifier; returns True when a retry with /identity makes sense."""
+        if not self._machine_identifier_cached:
+            return False
+        _forget_cached_machine_id(self.base_url)
+        self._machine_identifier = None
+        self._machine_identifier_cached = False
+        return True
+
     def get_sections(self) -> list[LibrarySection]:
-        root = self._request("/library/sections")
         sections = []
-        for entry in root.findall("Directory"):
+        for entry in self._iter_container("/library/sections", "Directory", conditional=True):
             sections.append(
                 LibrarySection(
                     key=entry.attrib.get("key", ""),
@@ -149,85 +233,142 @@ class PlexClient:
         return sections
 
     def get_section_by_title(self, title: str) -> LibrarySection:
-        lowered = title.strip().lower()
-        for section in self.get_sections():
-            if section.title.strip().lower() == lowered:
+        """Resolve a library by title, reusing the section list for SECTIONS_CACHE_TTL seconds.
+
+        A miss against a cached list refetches once, so a newly added library is found.
+        """
+        lowered = normalize_title(title)
+        cached = self._sections_cache
+        if cached is not None and time.monotonic() - cached[0] < SECTIONS_CACHE_TTL:
+            section = cached[1].get(lowered)
+            if section is not None:
                 return section
-        raise PlexError(f"Library section not found: {title}")
+        section = self._refresh_sections().get(lowered)
+        if section is None:
+            raise PlexError(f"Library section not found: {title}")
+        return section
+
+    def _refresh_sections(self) -> dict[str, LibrarySection]:
+        by_title: dict[str, LibrarySection] = {}
+        for section in self.get_sections():
+            by_title.setdefault(normalize_title(section.title), section)
+        self._sections_cache = (time.monotonic(), by_title)
+        return by_title
 
-    def get_shows(self, section_key: str, query: list[tuple[str, str]] | None = None) -> list[MediaItem]:
+    def invalidate_sections(self) -> None:
+        """Forget the cached section list used by get_section_by_title."""
+        self._sections_cache = None
+
+    def get_shows(self, section_key: str, query: Sequence[tuple[str, str]] | None = None) -> list[MediaItem]:
         params = [("type", "2")]
         if query:
             params.extend(query)
         shows = []
-        for root in self._request_pages(f"/library/sections/{section_key}/all", params=params):
-            for entry in root.findall("Directory"):
-                if entry.attrib.get("type") != "show":
-                    continue
-                shows.append(
-                    MediaItem(
-                        rating_key=entry.attrib.get("ratingKey", ""),
-                        title=entry.attrib.get("title", ""),
-                        type="show",
-                    )
+        for entry in self._iter_entries(f"/library/sections/{section_key}/all", "Directory", params=params):
+            if entry.attrib.get("type") != "show":
+                continue
+            shows.append(
+                MediaItem(
+                    rating_key=entry.attrib.get("ratingKey", ""),
+                    title=entry.attrib.get("title", ""),
+                    type="show",
                 )
+            )
         return shows
 
-    def get_show_episodes(self, show_key: str, query: list[tuple[str, str]] | None = None) -> list[MediaItem]:
+    def get_show_episodes(self, show_key: str, query: Sequence[tuple[str, str]] | None = None) -> list[MediaItem]:
         params = []
         if query:
             params.extend(query)
         episodes = []
-        for root in self._request_pages(f"/library/metadata/{show_key}/allLeaves", params=params):
-            for entry in root.findall("Video"):
-                if entry.attrib.get("type") != "episode":
-                    continue
-                episodes.append(self._parse_episode(entry))
+        for entry in self._iter_entries(f"/library/metadata/{show_key}/allLeaves", "Video", params=params):
+            if entry.attrib.get("type") != "episode":
+                continue
+            episodes.append(self._parse_episode(entry))
         return episodes
 
-    def get_movies(self, section_key: str, query: list[tuple[str, str]] | None = None) -> list[MediaItem]:
+    def get_episodes_bulk(
+        self,
+        show_keys: Iterable[str],
+        query: Sequence[tuple[str, str]] | None = None,
+        max_workers: int = 8,
+    ) -> dict[str, list[MediaItem]]:
+        """Fetch episodes for many shows concurrently, keyed by show in input order.
+
+        Each worker thread keeps its own pooled keep-alive connection. Shows whose fetch
+        fails are logged and left out rather than failing the whole batch.
+        """
+        keys = list(dict.fromkeys(show_keys))
+        if not keys:
+            return {}
+        fetched: dict[str, list[MediaItem]] = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+            futures = [executor.submit(self.get_show_episodes, key, query) for key in keys]
+            for key, future in zip(keys, futures):
+                try:
+                    fetched[key] = future.result()
+                except Exception as exc:
+                    LOGGER.warning("Failed to fetch episodes for show %s: %s", key, exc)
+        return fetched
+
+    def get_section_episodes(
+        self,
+        section_key: str,
+        query: Sequence[tuple[str, str]] | None = None,
+    ) -> list[MediaItem]:
+        """Fetch every episode in a TV section with one paginated query."""
+        params = [("type", "4")]
+        if query:
+            params.extend(query)
+        episodes = []
+        for entry in self._iter_entries(f"/library/sections/{section_key}/all", "Video", params=params):
+            if entry.attrib.get("type") != "episode":
+                continue
+            episodes.append(self._parse_episode(entry))
+        return episodes
+
+    def get_movies(self, section_key: str, query: Sequence[tuple[str, str]] | None = None) -> list[MediaItem]:
         params = [("type", "1")]
         if query:
             params.extend(query)
         movies = []
-        for root in self._request_pages(f"/library/sections/{section_key}/all", params=params):
-            for entry in root.findall("Video"):
-                if entry.attrib.get("type") != "movie":
-                    continue
-                movies.append(self._parse_movie(entry))
+        for entry in self._iter_entries(f"/library/sections/{section_key}/all", "Video", params=params):
+            if entry.attrib.get("type") != "movie":
+                continue
+            movies.append(self._parse_movie(entry))
         return movies
 
-    def get_collections(self, section_key: str, query: list[tuple[str, str]] | None = None) -> list[MediaItem]:
+    def get_collections(self, section_key: str, query: Sequence[tuple[str, str]] | None = None) -> list[MediaItem]:
         params = []
         if query:
             params.extend(query)
         try:
-            roots = self._request_pages(f"/library/sections/{section_key}/collections", params=params)
+            return self._collect_collections(f"/library/sections/{section_key}/collections", params)
         except PlexError as exc:
             LOGGER.warning("Collections endpoint failed, retrying with fallback: %s", exc)
             fallback_params = list(params) + [("type", "18")]
-            roots = self._request_pages(f"/library/sections/{section_key}/all", params=fallback_params)
+            return self._collect_collections(f"/library/sections/{section_key}/all", fallback_params)
+
+    def _collect_collections(self, path: str, params: list[tuple[str, str]]) -> list[MediaItem]:
         collections = []
-        for root in roots:
-            for entry in root.findall("Directory"):
-                if entry.attrib.get("type") not in {"collection", "collectionGroup"}:
-                    continue
-                collections.append(
-                    MediaItem(
-                        rating_key=entry.attrib.get("ratingKey", ""),
-                        title=entry.attrib.get("title", ""),
-                        type="collection",
-                    )
+        for entry in self._iter_entries(path, "Directory", params=params, conditional=True):
+            if entry.attrib.get("type") not in {"collection", "collectionGroup"}:
+                continue
+            collections.append(
+                MediaItem(
+                    rating_key=entry.attrib.get("ratingKey", ""),
+                    title=entry.attrib.get("title", ""),
+                    type="collection",
                 )
+            )
         return collections
 
     def get_collection_items(self, collection_key: str) -> list[MediaItem]:
         items = []
-        for root in self._request_pages(f"/library/metadata/{collection_key}/children"):
-            for entry in root.findall("Video"):
-                if entry.attrib.get("type") != "movie":
-                    continue
-                items.append(self._parse_movie(entry))
+        for entry in self._iter_entries(f"/library/metadata/{collection_key}/children", "Video"):
+            if entry.attrib.get("type") != "movie":
+                continue
+            items.append(self._parse_movie(entry))
         return items
 
     def _get_section_facet_values(
@@ -242,7 +383,7 @@ class PlexClient:
             if type_value:
                 params.append(("type", type_value))
         try:
-            root = self._request(f"/library/sections/{section_key}/{source}", params=params)
+            root = self._request(f"/library/sections/{section_key}/{source}", params=params, conditional=True)
             return _parse_filter_options(root)
         except PlexError:
             if source == "collection":
@@ -277,14 +418,14 @@ class PlexClient:
         params: list[tuple[str, str]] = []
         if title:
             params.append(("title", title))
-        root = self._request("/playlists", params=params)
         playlists = []
-        for entry in root.findall("Playlist"):
+        for entry in self._iter_container("/playlists", "Playlist", params=params):
             playlists.append(
                 PlaylistInfo(
                     rating_key=entry.attrib.get("ratingKey", ""),
                     title=entry.attrib.get("title", ""),
                     playlist_type=entry.attrib.get("playlistType", ""),
+                    leaf_count=_parse_int(entry.attrib.get("leafCount")),
                 )
             )
         return playlists
@@ -296,55 +437,180 @@ class PlexClient:
         if not rating_keys:
             raise PlexError("Cannot create playlist without items")
 
+        first = rating_keys[:PLAYLIST_URI_BATCH_SIZE]
+        try:
+            playlist = self._post_playlist(title, first, list_type)
+        except PlexError as exc:
+            # A cached identifier may be stale (server reinstalled behind the same URL); Plex
+            # rejects such a URI outright. Anything else (timeouts, 5xx) may have created the
+            # playlist already, and POST /playlists is not idempotent, so it is not retried.
+            if exc.status not in (400, 404) or not self._forget_machine_identifier():
+                raise
+            playlist = self._post_playlist(title, first, list_type)
+
+        info = PlaylistInfo(
+            rating_key=playlist.attrib.get("ratingKey", ""),
+            title=playlist.attrib.get("title", title),
+            playlist_type=playlist.attrib.get("playlistType", list_type),
+        )
+        if len(rating_keys) > PLAYLIST_URI_BATCH_SIZE:
+            self.add_playlist_items(info.rating_key, rating_keys[PLAYLIST_URI_BATCH_SIZE:])
+        return info
+
+    def _post_playlist(self, title: str, rating_keys: list[str], list_type: str) -> ET.Element:
         machine_identifier = self._get_machine_identifier()
         uri = f"server://{machine_identifier}/com.plexapp.plugins.library/library/metadata/{','.join(rating_keys)}"
         params = [("uri", uri), ("type", list_type), ("title", title), ("smart", "0")]
         root = self._request("/playlists", params=params, method="POST")
-
         playlist = root.find("Playlist")
         if playlist is None:
             raise PlexError("Playlist creation failed: no playlist returned")
-
-        return PlaylistInfo(
-            rating_key=playlist.attrib.get("ratingKey", ""),
-            title=playlist.attrib.get("title", title),
-            playlist_type=playlist.attrib.get("playlistType", list_type),
-        )
+        return playlist
 
     def add_playlist_items(self, playlist_key: str, rating_keys: list[str]) -> None:
         if not rating_keys:
             return
         machine_identifier = self._get_machine_identifier()
-        uri = f"server://{machine_identifier}/com.plexapp.plugins.library/library/metadata/{','.join(rating_keys)}"
-        params = [("uri", uri)]
-        self._request(f"/playlists/{playlist_key}/items", params=params, method="PUT")
+        # Keep each PUT URL bounded; the batches reuse the same keep-alive connection.
+        for start in range(0, len(rating_keys), PLAYLIST_URI_BATCH_SIZE):
+            batch = rating_keys[start : start + PLAYLIST_URI_BATCH_SIZE]
+            uri = f"server://{machine_identifier}/com.plexapp.plugins.library/library/metadata/{','.join(batch)}"
+            self._request(f"/playlists/{playlist_key}/items", params=[("uri", uri)], method="PUT")
 
     @staticmethod
     def _parse_episode(entry: ET.Element) -> MediaItem:
+        # Called once per episode in large listings: bind the attribute lookup once.
+        get = entry.attrib.get
         return MediaItem(
-            rating_key=entry.attrib.get("ratingKey", ""),
-            title=entry.attrib.get("title", ""),
+            rating_key=get("ratingKey", ""),
+            title=get("title", ""),
             type="episode",
-            show_title=entry.attrib.get("grandparentTitle"),
-            season_index=_parse_int(entry.attrib.get("parentIndex")),
-            episode_index=_parse_int(entry.attrib.get("index")),
-            originally_available_at=_parse_date(entry.attrib.get("originallyAvailableAt")),
-            view_count=_parse_int(entry.attrib.get("viewCount")),
-            last_viewed_at=_parse_timestamp(entry.attrib.get("lastViewedAt")),
+            show_title=get("grandparentTitle"),
+            show_rating_key=get("grandparentRatingKey"),
+            season_index=_parse_int(get("parentIndex")),
+            episode_index=_parse_int(get("index")),
+            originally_available_at=_parse_date(get("originallyAvailableAt")),
+            view_count=_parse_int(get("viewCount")),
+            last_viewed_at=_parse_timestamp(get("lastViewedAt")),
         )
 
     @staticmethod
     def _parse_movie(entry: ET.Element) -> MediaItem:
+        get = entry.attrib.get
         return MediaItem(
-            rating_key=entry.attrib.get("ratingKey", ""),
-            title=entry.attrib.get("title", ""),
+            rating_key=get("ratingKey", ""),
+            title=get("title", ""),
             type="movie",
-            originally_available_at=_parse_date(entry.attrib.get("originallyAvailableAt")),
-            view_count=_parse_int(entry.attrib.get("viewCount")),
-            last_viewed_at=_parse_timestamp(entry.attrib.get("lastViewedAt")),
+            originally_available_at=_parse_date(get("originallyAvailableAt")),
+            view_count=_parse_int(get("viewCount")),
+            last_viewed_at=_parse_timestamp(get("lastViewedAt")),
         )
 
 
+_MACHINE_IDS: dict[str, str] = {}
+_MACHINE_IDS_LOCK = threading.Lock()
+
+
+def _machine_id_cache_path() -> Path:
+    return user_cache_dir() / "machine_ids.json"
+
+
+def _load_cached_machine_id(base_url: str) -> str | None:
+    with _MACHINE_IDS_LOCK:
+        cached = _MACHINE_IDS.get(base_url)
+        if cached:
+            return cached
+        data = read_json_file(_machine_id_cache_path())
+        value = data.get(base_url) if isinstance(data, dict) else None
+        if isinstance(value, str) and value:
+            _MACHINE_IDS[base_url] = value
+            return value
+    return None
+
+
+def _save_cached_machine_id(base_url: str, machine_identifier: str) -> None:
+    _update_machine_id_cache(base_url, machine_identifier)
+
+
+def _forget_cached_machine_id(base_url: str) -> None:
+    _update_machine_id_cache(base_url, None)
+
+
+def _update_machine_id_cache(base_url: str, machine_identifier: str | None) -> None:
+    path = _machine_id_cache_path()
+    with _MACHINE_IDS_LOCK:
+        if machine_identifier:
+            _MACHINE_IDS[base_url] = machine_identifier
+        else:
+            _MACHINE_IDS.pop(base_url, None)
+        data = read_json_file(path)
+        if not isinstance(data, dict):
+            data = {}
+        if machine_identifier:
+            data[base_url] = machine_identifier
+        else:
+            data.pop(base_url, None)
+        try:
+            write_json_atomic(path, data)
+        except OSError as exc:
+            LOGGER.debug("Unable to persist machine identifier cache %s: %s", path, exc)
+
+
+def _iter_children(url: str, data: bytes, tag: str) -> Generator[ET.Element, None, dict[str, str]]:
+    """Pull-parse a container body, yielding its ``tag`` children; returns the root attributes."""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: ET.Element | None = None
+    depth = 0
+    view = memoryview(data)
+    try:
+        for offset in range(0, len(view), _PARSE_CHUNK_SIZE):
+            parser.feed(view[offset : offset + _PARSE_CHUNK_SIZE])
+            for event, element in parser.read_events():
+                if event == "start":
+                    depth += 1
+                    if root is None:
+                        root = element
+                    continue
+                depth -= 1
+                if depth != 1:
+                    continue
+                if element.tag == tag:
+                    yield element
+                root.remove(element)
+        parser.close()
+    except ET.ParseError as exc:
+        raise _invalid_response(url, data) from exc
+    if root is None:
+        raise _invalid_response(url, data)
+    return root.attrib
+
+
+def _invalid_response(url: str, data: bytes) -> PlexError:
+    snippet = data[:200].decode("utf-8", errors="replace")
+    return PlexError(f"Invalid Plex API response from {url}: {snippet}")
+
+
+def _page_params(params: Sequence[tuple[str, str]] | None, start: int, page_size: int) -> list[tuple[str, str]]:
+    page_params: list[tuple[str, str]] = list(params or [])
+    page_params.append(("X-Plex-Container-Start", str(start)))
+    page_params.append(("X-Plex-Container-Size", str(page_size)))
+    return page_params
+
+
+def _next_page_start(attrib: dict[str, str], start: int) -> int | None:
+    """Return the offset of the next page, or None when the container is exhausted."""
+    total = _parse_int(attrib.get("totalSize") or attrib.get("size")) or 0
+    if total <= 0:
+        return None
+    size = _parse_int(attrib.get("size")) or 0
+    if size <= 0:
+        return None
+    start += size
+    if start >= total:
+        return None
+    return start
+
+
 def _parse_int(value: str | None) -> int | None:
     if not value:
         return None
@@ -390,18 +656,29 @@ def supported_facet_sources() -> list[str]:
     return sorted(set(_FACET_SOURCE_ALIASES.values()), key=str.lower)
 
 
+# Accepted spellings for a library media type -> Plex "type" query value.
+_MEDIA_TYPE_PARAMS: dict[str, str] = {
+    "movie": "1",
+    "movies": "1",
+    "1": "1",
+    "show": "2",
+    "shows": "2",
+    "tv": "2",
+    "2": "2",
+}
+
+_FILTER_OPTION_TAGS = frozenset({"Directory", "Tag"})
+
+
 def _media_type_param(media_type: str) -> str | None:
-    lowered = media_type.strip().lower()
-    if lowered in {"movie", "movies", "1"}:
-        return "1"
-    if lowered in {"show", "shows", "tv", "2"}:
-        return "2"
-    return None
+    return _MEDIA_TYPE_PARAMS.get(media_type.strip().lower())
 
 
 def _parse_filter_options(root: ET.Element) -> list[str]:
     values: set[str] = set()
-    for entry in root.findall("Directory") + root.findall("Tag"):
+    for entry in root:
+        if entry.tag not in _FILTER_OPTION_TAGS:
+            continue
         title = entry.attrib.get("title") or entry.attrib.get("tag") or entry.attrib.get("name")
         if title:
             values.add(title)
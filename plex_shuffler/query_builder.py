@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Literal
+from typing import AbstractSet, Any, Literal
 from urllib.parse import parse_qsl, urlencode
 
 from plex_shuffler.query_catalog import default_op_for_field, known_field_keys
@@ -13,7 +13,7 @@ ClauseOp = Literal["eq", "contains", "gte", "lte", "exists", "custom"]
 
 DEFAULT_KNOWN_FIELDS = known_field_keys()
 
-_ALLOWED_OPS: set[str] = {"eq", "contains", "gte", "lte", "exists", "custom"}
+_ALLOWED_OPS = frozenset({"eq", "contains", "gte", "lte", "exists", "custom"})
 
 
 @dataclass
@@ -38,7 +38,7 @@ class QueryState:
 def parse_query_string(
     query: str,
     *,
-    known_fields: set[str] | None = None,
+    known_fields: AbstractSet[str] | None = None,
     strict: bool = False,
 ) -> QueryState:
     trimmed = (query or "").strip()
@@ -49,7 +49,7 @@ def parse_query_string(
     if not pairs:
         return QueryState(mode="builder", groups=[], advanced_query="")
 
-    known = set(known_fields) if known_fields is not None else DEFAULT_KNOWN_FIELDS
+    known = known_fields if known_fields is not None else DEFAULT_KNOWN_FIELDS
     clauses, has_unknown = _pairs_to_clauses(pairs, known)
     if has_unknown and strict:
         return QueryState(mode="advanced", groups=[], advanced_query=trimmed)
@@ -137,7 +137,7 @@ def query_state_to_dict(state: QueryState) -> dict[str, Any]:
     }
 
 
-def _normalize_clause_key(raw_key: str, known_fields: set[str]) -> tuple[str, ClauseOp, bool]:
+def _normalize_clause_key(raw_key: str, known_fields: AbstractSet[str]) -> tuple[str, ClauseOp, bool]:
     key = (raw_key or "").strip()
     if not key:
         return "", "custom", True
@@ -159,21 +159,26 @@ def _normalize_clause_key(raw_key: str, known_fields: set[str]) -> tuple[str, Cl
 
 def _pairs_to_clauses(
     pairs: list[tuple[str, str]],
-    known_fields: set[str],
+    known_fields: AbstractSet[str],
 ) -> tuple[list[Clause], bool]:
     clauses: list[Clause] = []
+    # Repeated raw keys (genre=a&genre=b) skip normalization; distinct raw keys that
+    # normalize to the same (field, op) ("year>" vs "year >") still share a clause.
+    by_raw_key: dict[str, Clause] = {}
     index: dict[tuple[str, str], Clause] = {}
     has_unknown = False
     for raw_key, raw_value in pairs:
-        field_name, op, unknown = _normalize_clause_key(raw_key, known_fields)
-        value = (raw_value or "").strip()
-        if unknown:
-            has_unknown = True
-        clause_key = (field_name, op)
-        clause = index.get(clause_key)
+        clause = by_raw_key.get(raw_key)
         if clause is None:
-            clause = Clause(field=field_name, op=op, values=[])
-            index[clause_key] = clause
-            clauses.append(clause)
-        clause.values.append(value)
+            field_name, op, unknown = _normalize_clause_key(raw_key, known_fields)
+            if unknown:
+                has_unknown = True
+            clause_key = (field_name, op)
+            clause = index.get(clause_key)
+            if clause is None:
+                clause = Clause(field=field_name, op=op, values=[])
+                index[clause_key] = clause
+                clauses.append(clause)
+            by_raw_key[raw_key] = clause
+        clause.values.append((raw_value or "").strip())
     return clauses, has_unknown
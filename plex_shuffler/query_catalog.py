@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cache
 from typing import Any, Literal
 
 InputKind = Literal["text", "number", "boolean", "multiselect", "custom"]
@@ -111,32 +112,38 @@ QUERY_FIELD_CATALOG_V1: tuple[QueryField, ...] = (
     ),
 )
 
+_FIELD_INDEX: dict[str, QueryField] = {field.key: field for field in QUERY_FIELD_CATALOG_V1}
+
+
+# The catalog is immutable, so its API payloads are built once at import.
+_CATALOG_PAYLOADS_ALL: tuple[dict[str, Any], ...] = tuple(field.to_dict() for field in QUERY_FIELD_CATALOG_V1)
+_CATALOG_PAYLOADS_VERIFIED: tuple[dict[str, Any], ...] = tuple(
+    payload for payload in _CATALOG_PAYLOADS_ALL if payload["validation"] == "verified"
+)
+
 
 def catalog_for_api(*, include_unverified: bool = False) -> list[dict[str, Any]]:
-    fields = []
-    for field in QUERY_FIELD_CATALOG_V1:
-        if field.validation != "verified" and not include_unverified:
-            continue
-        fields.append(field.to_dict())
-    return fields
+    """Return catalog field payloads (shallow copies; treat nested ``ops`` lists as read-only)."""
+    payloads = _CATALOG_PAYLOADS_ALL if include_unverified else _CATALOG_PAYLOADS_VERIFIED
+    return [dict(payload) for payload in payloads]
 
 
-def known_field_keys() -> set[str]:
-    return {field.key for field in QUERY_FIELD_CATALOG_V1 if field.validation == "verified"}
+@cache
+def known_field_keys() -> frozenset[str]:
+    return frozenset(field.key for field in QUERY_FIELD_CATALOG_V1 if field.validation == "verified")
 
 
-def plex_option_sources() -> set[str]:
+@cache
+def plex_option_sources() -> frozenset[str]:
     sources = set()
     for field in QUERY_FIELD_CATALOG_V1:
         if not field.options_source:
             continue
         if field.options_source.startswith("plex:"):
             sources.add(field.options_source.split(":", 1)[1])
-    return sources
+    return frozenset(sources)
 
 
 def default_op_for_field(key: str) -> str:
-    for field in QUERY_FIELD_CATALOG_V1:
-        if field.key == key:
-            return field.ops[0]
-    return "eq"
+    field = _FIELD_INDEX.get(key)
+    return field.ops[0] if field is not None else "eq"
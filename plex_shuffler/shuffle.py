@@ -29,23 +29,30 @@ def interleave_movies(
     episodes: list[MediaItem],
     movies: list[MediaItem],
     every_episodes: int,
+    max_items: int = 0,
 ) -> list[MediaItem]:
+    """Insert one movie after every N episodes, stopping at max_items when it is > 0."""
     if not movies or not every_episodes or every_episodes <= 0:
+        if max_items > 0:
+            return episodes[:max_items]
         return episodes
 
+    # Movie k follows the k-th full block of episodes, so the output is built block by
+    # block with slices; leftover movies past the last full block are dropped.
+    block = every_episodes
+    limit = max_items if max_items > 0 else len(episodes) + len(movies)
+    blocks_with_movie = min(len(movies), len(episodes) // block)
     output: list[MediaItem] = []
-    movie_iter = iter(movies)
-    since_movie = 0
-
-    for episode in episodes:
-        output.append(episode)
-        since_movie += 1
-        if since_movie >= every_episodes:
-            try:
-                output.append(next(movie_iter))
-                since_movie = 0
-            except StopIteration:
-                since_movie = 0
+    for index in range(blocks_with_movie):
+        if len(output) >= limit:
+            break
+        start = index * block
+        output.extend(episodes[start : start + block])
+        output.append(movies[index])
+    else:
+        output.extend(episodes[blocks_with_movie * block :])
+    if len(output) > limit:
+        del output[limit:]
     return output
 
 
@@ -57,44 +64,53 @@ def flatten_groups(groups: Iterable[MediaGroup]) -> list[MediaItem]:
 
 
 def _rounds(groups: list[MediaGroup], rng: random.Random, chunk_size: int) -> list[MediaItem]:
-    remaining = [MediaGroup(group.name, list(group.items), group.source) for group in groups]
+    # Every group advances by the same chunk each round, so one offset tracks all of them
+    # and each chunk is copied with a single slice.
+    step = max(1, chunk_size)
+    live = [group.items for group in groups if group.items]
     output: list[MediaItem] = []
-    while True:
-        active = [group for group in remaining if group.items]
-        if not active:
-            break
-        rng.shuffle(active)
-        for group in active:
-            for _ in range(max(1, chunk_size)):
-                if not group.items:
-                    break
-                output.append(group.items.pop(0))
+    offset = 0
+    while live:
+        order = live[:]
+        rng.shuffle(order)
+        for items in order:
+            output.extend(items[offset : offset + step])
+        offset += step
+        live = [items for items in live if len(items) > offset]
     return output
 
 
 def _round_robin(groups: list[MediaGroup], rng: random.Random, chunk_size: int) -> list[MediaItem]:
-    remaining = [MediaGroup(group.name, list(group.items), group.source) for group in groups]
-    rng.shuffle(remaining)
+    step = max(1, chunk_size)
+    order = [group.items for group in groups]
+    rng.shuffle(order)
+    live = [items for items in order if items]
     output: list[MediaItem] = []
-    while True:
-        active = [group for group in remaining if group.items]
-        if not active:
-            break
-        for group in active:
-            for _ in range(max(1, chunk_size)):
-                if not group.items:
-                    break
-                output.append(group.items.pop(0))
+    offset = 0
+    while live:
+        for items in live:
+            output.extend(items[offset : offset + step])
+        offset += step
+        live = [items for items in live if len(items) > offset]
     return output
 
 
 def _random_pick(groups: list[MediaGroup], rng: random.Random) -> list[MediaItem]:
-    remaining = [MediaGroup(group.name, list(group.items), group.source) for group in groups]
+    """Pick a non-empty group uniformly at random and take its next item, until all are empty."""
+    # Read through each group with a cursor instead of copying its items; exhausted groups
+    # are deleted in place so the remaining order (and the seeded sequence) is unchanged.
+    active = [group.items for group in groups if group.items]
+    cursors = [0] * len(active)
     output: list[MediaItem] = []
-    while True:
-        active = [group for group in remaining if group.items]
-        if not active:
-            break
-        group = rng.choice(active)
-        output.append(group.items.pop(0))
+    while active:
+        index = rng.randrange(len(active))
+        items = active[index]
+        position = cursors[index]
+        output.append(items[position])
+        position += 1
+        if position < len(items):
+            cursors[index] = position
+        else:
+            del active[index]
+            del cursors[index]
     return output
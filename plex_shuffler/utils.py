@@ -3,26 +3,68 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Iterable
-from urllib.parse import parse_qsl
-
-
-def parse_query_string(query: str) -> list[tuple[str, str]]:
+import json
+import os
+import tempfile
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from urllib.parse import unquote_plus
+
+
+@lru_cache(maxsize=2048)
+def parse_query_string(query: str) -> tuple[tuple[str, str], ...]:
+    """Split a form-encoded query into pairs, like ``parse_qsl(query, keep_blank_values=True)``.
+
+    Results are immutable and memoized: the same few playlist queries are parsed on
+    every web preview/run, and 2048 short entries cost well under a megabyte.
+    """
     if not query:
-        return []
-    return [(key, value) for key, value in parse_qsl(query, keep_blank_values=True)]
+        return ()
+    pairs = [part.partition("=") for part in query.split("&") if part]
+    if "%" not in query and "+" not in query:
+        # Nothing to unquote (the common case for hand-written Plex filters).
+        return tuple((key, value) for key, _, value in pairs)
+    return tuple((unquote_plus(key), unquote_plus(value)) for key, _, value in pairs)
 
 
 def merge_dicts(base: dict, updates: dict) -> dict:
-    """Deep-merge two dictionaries without mutating inputs."""
+    """Deep-merge two dictionaries without mutating inputs.
+
+    Nested dicts are merged with an explicit worklist instead of recursion; only dicts on
+    a merge path are copied, other values are shared with the inputs.
+    """
     if not isinstance(base, dict) or not isinstance(updates, dict):
         return updates
+    # An empty side means a plain copy of the other (config overrides are often empty).
+    if not updates:
+        return dict(base)
+    if not base:
+        return dict(updates)
     merged = dict(base)
-    for key, value in updates.items():
-        if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-            merged[key] = merge_dicts(merged[key], value)
-        else:
-            merged[key] = value
+    stack = [(merged, updates)]
+    while stack:
+        target, source = stack.pop()
+        if not any(isinstance(value, dict) for value in source.values()):
+            # Leaf-only level: nothing to recurse into, so one C-level update does it all.
+            target.update(source)
+            continue
+        for key, value in source.items():
+            current = target.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                if current is value or current == value:
+                    # Unchanged subtree (e.g. a default echoed back): keep it as is; the
+                    # C-level comparison is far cheaper than merging key by key.
+                    continue
+                if not value or not current:
+                    target[key] = dict(current or value)
+                    continue
+                nested = dict(current)
+                target[key] = nested
+                stack.append((nested, value))
+            else:
+                target[key] = value
     return merged
 
 
@@ -34,36 +76,87 @@ def ensure_list(value: object | None) -> list:
     return [value]
 
 
+@lru_cache(maxsize=8192)
 def normalize_title(value: str) -> str:
+    """Case/whitespace-insensitive key for library and playlist titles (memoized)."""
     return value.strip().lower()
 
 
+_UTC = dt.timezone.utc
+
+
 def now_utc() -> dt.datetime:
-    return dt.datetime.now(dt.timezone.utc)
+    return dt.datetime.now(_UTC)
 
 
 def cutoff_from_days(days: int | float | None, now: dt.datetime) -> dt.datetime | None:
     if not days or days <= 0:
         return None
+    if type(days) is int:
+        return now - _whole_days(days)
     return now - dt.timedelta(days=float(days))
 
 
+@lru_cache(maxsize=64)
+def _whole_days(days: int) -> dt.timedelta:
+    return dt.timedelta(days=days)
+
+
 def clamp_items(items: list, limit: int | None) -> list:
-    if limit and limit > 0:
-        return items[:limit]
-    return items
+    """Return at most ``limit`` items; None or a limit <= 0 means "no limit" (as in config).
+
+    The input list itself is returned whenever no trimming is needed.
+    """
+    if not limit or limit <= 0 or limit >= len(items):
+        return items
+    return items[:limit]
 
 
-def chunked(seq: Iterable, size: int) -> list[list]:
+def chunked(seq: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to ``size`` items (everything in one list when size <= 0)."""
     if size <= 0:
-        return [list(seq)]
-    chunk = []
-    chunks: list[list] = []
-    for item in seq:
-        chunk.append(item)
-        if len(chunk) >= size:
-            chunks.append(chunk)
-            chunk = []
-    if chunk:
-        chunks.append(chunk)
-    return chunks
+        yield list(seq)
+        return
+    if isinstance(seq, list):
+        for start in range(0, len(seq), size):
+            yield seq[start : start + size]
+        return
+    iterator = iter(seq)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def user_cache_dir() -> Path:
+    """Return the per-user cache directory (override with PLEX_SHUFFLER_CACHE_DIR)."""
+    override = os.getenv("PLEX_SHUFFLER_CACHE_DIR", "").strip()
+    if override:
+        return Path(override)
+    if os.name == "nt":
+        base = os.getenv("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    else:
+        base = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "plex-shuffler-studio"
+
+
+def read_json_file(path: Path) -> Any | None:
+    """Load a JSON file, returning None when it is missing or unreadable."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_json_atomic(path: Path, payload: Any) -> None:
+    """Write JSON via a temp file + rename so concurrent readers never see partial data."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
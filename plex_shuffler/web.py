@@ -5,24 +5,31 @@ from __future__ import annotations
 import argparse
 import logging
 
-from plex_shuffler.web_server import run_web_server
-
-
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Plex Shuffler Studio web UI")
-    parser.add_argument("--config", required=True, help="Path to config.json")
-    parser.add_argument("--host", default="127.0.0.1", help="Host to bind")
-    parser.add_argument("--port", type=int, default=8181, help="Port to bind")
-    parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
-
-    args = parser.parse_args()
+# Built once so repeated in-process main() calls (tests, supervisors) reuse it.
+_PARSER = argparse.ArgumentParser(description="Plex Shuffler Studio web UI")
+_PARSER.add_argument("--config", required=True, help="Path to config.json")
+_PARSER.add_argument("--host", default="127.0.0.1", help="Host to bind")
+_PARSER.add_argument("--port", type=int, default=8181, help="Port to bind")
+_PARSER.add_argument(
+    "--warm-facets",
+    action="store_true",
+    help="Prefetch library facet values (genres, collections, ...) in the background at startup",
+)
+_PARSER.add_argument("--verbose", action="store_true", help="Enable debug logging")
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _PARSER.parse_args(argv)
 
     logging.basicConfig(
         level=logging.DEBUG if args.verbose else logging.INFO,
         format="%(asctime)s %(levelname)s %(message)s",
     )
 
-    run_web_server(args.config, args.host, args.port)
+    # Imported after argument parsing so --help and usage errors skip the server/client imports.
+    from plex_shuffler.web_server import run_web_server
+
+    run_web_server(args.config, args.host, args.port, warm_facets=args.warm_facets)
     return 0
 
 
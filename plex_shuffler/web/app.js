@@ -748,9 +748,9 @@ const loadAccount = async () => {
   }
 };
 
-const loadServers = async () => {
+const loadServers = async (refresh = false) => {
   try {
-    const data = await api("/api/plex/resources");
+    const data = await api(refresh ? "/api/plex/resources?refresh=1" : "/api/plex/resources");
     state.servers = data.servers || [];
     applyServers();
   } catch (err) {
@@ -980,6 +980,9 @@ const refreshLibraries = async () => {
     applyLibraries();
     await loadQueryOptions("tv");
     await loadQueryOptions("movies");
+    if (state.tokenSet) {
+      await loadServers(true);
+    }
     showToast("Libraries refreshed");
   } catch (err) {
     showToast(err.message);
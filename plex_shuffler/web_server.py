@@ -2,19 +2,34 @@
 
 from __future__ import annotations
 
+import datetime as dt
+import gzip
+import hashlib
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
+import stat
 import threading
+import time
 import uuid
-from collections.abc import Callable
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from http import HTTPStatus
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import SplitResult, urlsplit
 
 from plex_shuffler import __version__
-from plex_shuffler.builder import build_playlist_items
+from plex_shuffler.builder import BuildStats, build_playlist_items, index_sections
 from plex_shuffler.config import (
     apply_plex_overrides,
     default_config,
@@ -22,7 +37,15 @@ from plex_shuffler.config import (
     load_config_raw,
     save_config,
 )
-from plex_shuffler.plex_auth import PlexAuthError, check_pin, create_pin, fetch_resources, fetch_user
+from plex_shuffler.models import LibrarySection, MediaItem
+from plex_shuffler.plex_auth import (
+    PlexAuthError,
+    check_pin,
+    clear_auth_cache,
+    create_pin,
+    fetch_resources,
+    fetch_user,
+)
 from plex_shuffler.plex_client import (
     PlexClient,
     PlexError,
@@ -32,16 +55,47 @@ from plex_shuffler.plex_client import (
 from plex_shuffler.playlist import sync_playlist
 from plex_shuffler.query_builder import (
     DEFAULT_KNOWN_FIELDS,
+    QueryState,
     parse_query_string,
     query_state_from_dict,
     query_state_to_dict,
     serialize_query_state,
 )
 from plex_shuffler.query_catalog import catalog_for_api, plex_option_sources
-from plex_shuffler.utils import now_utc
+from plex_shuffler.utils import now_utc, read_json_file, user_cache_dir, write_json_atomic
+from plex_shuffler.utils import parse_query_string as split_query_pairs
 
 LOGGER = logging.getLogger(__name__)
 
+# Compact API responses: the default ", "/": " separators only add bytes on the wire.
+_JSON_SEPARATORS = (",", ":")
+
+
+# Enough workers for several browser tabs' worth of keep-alive connections (about 6 each).
+HTTP_WORKERS = 32
+
+_LIBRARY_FACETS_ROUTE = re.compile(r"/api/libraries/([^/]*)/facets/([^/]*)/*")
+
+# Facet values change only when the library does; bound the cache and let entries age out.
+FACET_CACHE_SIZE = 256
+FACET_CACHE_TTL = 300
+# Bump when the on-disk facet cache layout changes; older files are ignored.
+FACET_CACHE_VERSION = 1
+# Facets prefetched by --warm-facets: the query builder's multiselects, minus the large
+# per-person lists (actor/director) that are cheaper to load on demand.
+WARM_FACETS = ("genre", "collection", "contentRating", "studio")
+
+# Text assets are gzipped once per file version; images are already compressed.
+_COMPRESSIBLE_SUFFIXES = frozenset({".html", ".css", ".js", ".svg"})
+
+
+@dataclass(frozen=True)
+class StaticAsset:
+    data: bytes
+    gzipped: bytes | None = None
+    # Weak: the same tag covers the raw and gzip variants of one file version.
+    etag: str = ""
+
 
 class WebApp:
     def __init__(
@@ -52,78 +106,332 @@ class WebApp:
     ) -> None:
         self.config_path = Path(config_path)
         self.web_root = Path(web_root)
-        self._lock = threading.Lock()
-        self._facet_cache: dict[tuple[str, str], list[str]] = {}
+        # Resolved once: the containment check in _serve_static runs on every static request.
+        self._resolved_web_root = self.web_root.resolve()
+        # Separate locks so a slow config transaction never stalls cache lookups:
+        # _config_lock serializes read-modify-write cycles on the config file, the others
+        # guard their in-memory caches for a few dict operations each.
+        self._config_lock = threading.Lock()
+        self._facet_lock = threading.Lock()
+        self._static_lock = threading.Lock()
+        self._facet_cache: OrderedDict[tuple[str, str], tuple[float, tuple[str, ...]]] = OrderedDict()
         self._plex_client_factory = plex_client_factory
+        # Encoded /api/config body and its ETag, keyed by the config file's (mtime_ns, size).
+        self._config_response: tuple[tuple[int, int], bytes, str] | None = None
+        # Resolved config (load_config) keyed the same way; shared read-only between requests.
+        self._config_cache: tuple[tuple[int, int], dict[str, Any]] | None = None
+        self._static_cache: dict[Path, tuple[tuple[int, int], StaticAsset]] = {}
+        # Canonical URL path -> resolved path, so repeat hits skip Path.resolve(). Only paths
+        # that exist and are spelled exactly as resolved are kept: at most one key per file.
+        self._static_targets: dict[str, Path] = {}
+        # One client per (url, token, timeout, client id): its keep-alive pool and section
+        # cache then survive across API requests instead of being rebuilt for each one.
+        self._client_lock = threading.Lock()
+        self._client: tuple[tuple[str, str, int, str], PlexClient] | None = None
+        # In-flight preview builds by playlist index, with the playlist config they build, so
+        # concurrent previews of the same unchanged playlist share one set of Plex fetches.
+        self._preview_lock = threading.Lock()
+        self._preview_inflight: dict[int, tuple[dict[str, Any], Future]] = {}
 
     def create_plex_client(self, plex_cfg: dict[str, Any]) -> PlexClient:
-        """Create a PlexClient from config or a test override."""
+        """Return the shared PlexClient for this config (or a test override)."""
         if self._plex_client_factory:
             return self._plex_client_factory(plex_cfg)
-        return PlexClient(
-            base_url=plex_cfg.get("url", ""),
-            token=plex_cfg.get("token", ""),
-            timeout=int(plex_cfg.get("timeout_seconds", 30) or 30),
-            client_identifier=(plex_cfg.get("client_id") or "plex-shuffler-studio").strip() or "plex-shuffler-studio",
+        key = (
+            plex_cfg.get("url", ""),
+            plex_cfg.get("token", ""),
+            int(plex_cfg.get("timeout_seconds", 30) or 30),
+            (plex_cfg.get("client_id") or "plex-shuffler-studio").strip() or "plex-shuffler-studio",
         )
-
-    def get_cached_facet_values(self, section_key: str, facet: str) -> list[str] | None:
-        """Return cached facet values for a section/facet pair."""
-        with self._lock:
-            return self._facet_cache.get((section_key, facet))
+        with self._client_lock:
+            if self._client is not None and self._client[0] == key:
+                return self._client[1]
+            # The previous client is only dropped, not closed: other workers may still be
+            # mid-request on it, and its idle sockets close once the last of them lets go.
+            client = PlexClient(base_url=key[0], token=key[1], timeout=key[2], client_identifier=key[3])
+            self._client = (key, client)
+        return client
+
+    def preview_playlist(
+        self,
+        client: PlexClient,
+        playlist_index: int,
+        playlist_cfg: dict[str, Any],
+    ) -> tuple[list[MediaItem], BuildStats]:
+        """Build a playlist for preview, joining an identical build already in flight.
+
+        Builds are shared only while the playlist config is the same object, i.e. the
+        config file has not changed in between (see ``load_config``). Callers must not
+        mutate the returned items.
+        """
+        with self._preview_lock:
+            inflight = self._preview_inflight.get(playlist_index)
+            if inflight is not None and inflight[0] is playlist_cfg:
+                future = inflight[1]
+                owner = False
+            else:
+                future = Future()
+                self._preview_inflight[playlist_index] = (playlist_cfg, future)
+                owner = True
+        if not owner:
+            return future.result()
+        try:
+            result = build_playlist_items(client, playlist_cfg, now_utc())
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._preview_lock:
+                current = self._preview_inflight.get(playlist_index)
+                if current is not None and current[1] is future:
+                    del self._preview_inflight[playlist_index]
+        future.set_result(result)
+        return result
+
+    def get_cached_facet_values(self, section_key: str, facet: str) -> tuple[str, ...] | None:
+        """Return cached facet values for a section/facet pair (None when missing or expired)."""
+        key = (section_key, facet)
+        with self._facet_lock:
+            entry = self._facet_cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= FACET_CACHE_TTL:
+                del self._facet_cache[key]
+                return None
+            self._facet_cache.move_to_end(key)
+            return entry[1]
 
     def set_cached_facet_values(self, section_key: str, facet: str, values: list[str]) -> None:
-        """Store facet values for a section/facet pair."""
-        with self._lock:
-            self._facet_cache[(section_key, facet)] = list(values)
+        """Store facet values for a section/facet pair, evicting the least recently used."""
+        with self._facet_lock:
+            self._facet_cache[(section_key, facet)] = (time.monotonic(), tuple(values))
+            self._facet_cache.move_to_end((section_key, facet))
+            while len(self._facet_cache) > FACET_CACHE_SIZE:
+                self._facet_cache.popitem(last=False)
+
+    def clear_facet_cache(self) -> None:
+        """Drop every cached facet list (the next lookup goes back to Plex)."""
+        with self._facet_lock:
+            self._facet_cache.clear()
+
+    def load_config(self) -> dict[str, Any]:
+        """Return the resolved config, reparsed only when the file's (mtime_ns, size) changes.
+
+        The dict is shared by concurrent requests, so callers must treat it as read-only;
+        read-modify-write cycles go through ``load_config_raw``/``save_config_raw``.
+        """
+        signature = _file_signature(self.config_path)
+        cached = self._config_cache
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        config = load_config(str(self.config_path))
+        if signature is not None:
+            self._config_cache = (signature, config)
+        return config
 
     def load_config_raw(self) -> dict[str, Any]:
         return load_config_raw(str(self.config_path))
 
     def save_config_raw(self, config: dict[str, Any]) -> None:
+        # Plain attribute stores, not under _config_lock: callers may already hold it while saving.
+        self._config_response = None
         save_config(str(self.config_path), config)
+        self._config_cache = None
 
-    def ensure_client_id(self, config: dict[str, Any]) -> str:
+    def ensure_client_id(self, config: dict[str, Any], save: bool = True) -> str:
         plex_cfg = config.setdefault("plex", {})
         client_id = (plex_cfg.get("client_id") or "").strip()
         if not client_id:
             client_id = uuid.uuid4().hex
             plex_cfg["client_id"] = client_id
-            self.save_config_raw(config)
+            if save:
+                self.save_config_raw(config)
         return client_id
 
+    def load_plex_credentials(self) -> tuple[str, str]:
+        """Return ``(token, client_id)`` from one config read, minting a client id if needed."""
+        with self._config_lock:
+            config = self.load_config_raw()
+            token = config.get("plex", {}).get("token") or ""
+            client_id = self.ensure_client_id(config)
+        return token, client_id
+
+    def warm_facet_cache(self, facets: Iterable[str] = WARM_FACETS, max_workers: int = 8) -> int:
+        """Prefetch facet values for every library section in parallel; return entries stored.
+
+        Failures are logged and skipped: warmup only saves the UI a round-trip later.
+        """
+        try:
+            config = self.load_config()
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Skipping facet warmup: %s", exc)
+            return 0
+        plex_cfg = config.get("plex", {})
+        if not plex_cfg.get("token"):
+            return 0
+        client = self.create_plex_client(plex_cfg)
+        try:
+            sections = client.get_sections()
+        except PlexError as exc:
+            LOGGER.warning("Skipping facet warmup: %s", exc)
+            return 0
+        sources = [source for source in map(normalize_facet_source, facets) if source]
+        jobs = [
+            (section.key, source)
+            for section in sections
+            for source in sources
+            if self.get_cached_facet_values(section.key, source) is None
+        ]
+        if not jobs:
+            return 0
+        stored = 0
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            futures = [
+                executor.submit(client.get_section_facet_values, section_key=key, facet=source)
+                for key, source in jobs
+            ]
+            for (key, source), future in zip(jobs, futures):
+                try:
+                    values = future.result()
+                except PlexError as exc:
+                    LOGGER.warning("Facet warmup failed for section %s/%s: %s", key, source, exc)
+                    continue
+                self.set_cached_facet_values(key, source, _normalize_facet_values(values))
+                stored += 1
+        return stored
+
+    def load_facet_cache(self, path: Path, server_url: str) -> None:
+        """Restore unexpired facet entries saved by ``save_facet_cache`` for the same server."""
+        data = read_json_file(path)
+        if not isinstance(data, dict) or data.get("version") != FACET_CACHE_VERSION:
+            return
+        if data.get("server") != server_url or not isinstance(data.get("entries"), list):
+            return
+        # Entries carry wall-clock save times; rebase them onto this process's monotonic clock.
+        now_wall, now_mono = time.time(), time.monotonic()
+        with self._facet_lock:
+            for entry in data["entries"]:
+                try:
+                    section_key, facet, saved_at, values = entry
+                    age = now_wall - float(saved_at)
+                except (TypeError, ValueError):
+                    continue
+                if not 0 <= age < FACET_CACHE_TTL or not isinstance(values, list):
+                    continue
+                cleaned = tuple(value for value in values if isinstance(value, str))
+                self._facet_cache[(str(section_key), str(facet))] = (now_mono - age, cleaned)
+            while len(self._facet_cache) > FACET_CACHE_SIZE:
+                self._facet_cache.popitem(last=False)
+
+    def save_facet_cache(self, path: Path, server_url: str) -> None:
+        """Write unexpired facet entries so a restarted server can skip re-querying Plex."""
+        now_wall, now_mono = time.time(), time.monotonic()
+        with self._facet_lock:
+            entries = [
+                [section_key, facet, now_wall - (now_mono - stored_at), list(values)]
+                for (section_key, facet), (stored_at, values) in self._facet_cache.items()
+                if now_mono - stored_at < FACET_CACHE_TTL
+            ]
+        write_json_atomic(path, {"version": FACET_CACHE_VERSION, "server": server_url, "entries": entries})
+
+    def static_target(self, path: str) -> Path | None:
+        """Map a URL path to an existing path under the web root, or None if missing or outside it."""
+        with self._static_lock:
+            target = self._static_targets.get(path)
+        if target is not None:
+            return target
+        root = self._resolved_web_root
+        try:
+            target = (root / path.lstrip("/")).resolve(strict=True)
+        except (OSError, RuntimeError):
+            return None
+        if not target.is_relative_to(root):
+            return None
+        if str(target) == f"{root}{path}":
+            with self._static_lock:
+                self._static_targets[path] = target
+        return target
+
+    def read_static(self, target: Path) -> StaticAsset | None:
+        """Return a static file's contents, cached per path until its (mtime_ns, size) changes."""
+        try:
+            st = target.stat()
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._static_lock:
+            cached = self._static_cache.get(target)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            data = target.read_bytes()
+        except OSError:
+            return None
+        asset = StaticAsset(data, _gzip_asset(target.suffix, data), f"W/{_etag(data)}")
+        with self._static_lock:
+            self._static_cache[target] = (signature, asset)
+        return asset
+
     def get_config_for_api(self) -> dict[str, Any]:
+        return _config_view(self.load_config_raw())
+
+    def get_config_response(self) -> tuple[bytes, str]:
+        """Return the encoded ``/api/config`` body and ETag, rebuilt only when the file changes."""
+        signature = _file_signature(self.config_path)
+        cached = self._config_response
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
         config = self.load_config_raw()
-        config_view = json.loads(json.dumps(config))
-        plex_cfg = config_view.setdefault("plex", {})
-        if plex_cfg.get("token"):
-            plex_cfg["token"] = ""
-        _attach_query_state(config_view)
-        return config_view
+        token_set = bool(config.get("plex", {}).get("token"))
+        payload = {
+            "config": _config_view(config),
+            "meta": {"token_set": token_set, "query_fields": catalog_for_api()},
+        }
+        data = _encode_json(payload)
+        etag = _etag(data)
+        if signature is not None:
+            self._config_response = (signature, data, etag)
+        return data, etag
 
 
 class PlexShufflerHandler(BaseHTTPRequestHandler):
     server_version = "PlexShufflerWeb/0.1"
+    # Keep-alive lets the browser reuse one connection (and one server thread) for the page,
+    # its assets and API polling; every response sets Content-Length. Idle sockets time out
+    # quickly so they do not hold a pool worker for long.
+    protocol_version = "HTTP/1.1"
+    timeout = 15
 
     def do_GET(self) -> None:
-        parsed = urlparse(self.path)
+        parsed = urlsplit(self.path)
         if parsed.path.startswith("/api/"):
             self._handle_api_get(parsed)
             return
         self._serve_static(parsed.path)
 
     def do_POST(self) -> None:
-        parsed = urlparse(self.path)
+        # Always consume the body: on a kept-alive connection, unread bytes would be parsed
+        # as the next request.
+        try:
+            length = int(self.headers.get("Content-Length", 0) or 0)
+        except ValueError:
+            self.close_connection = True
+            self._send_json({"error": "Invalid Content-Length"}, status=HTTPStatus.BAD_REQUEST)
+            return
+        self._body = self.rfile.read(length) if length > 0 else b""
+        parsed = urlsplit(self.path)
         if parsed.path.startswith("/api/"):
             self._handle_api_post(parsed.path)
             return
-        self._send_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
+        self._send_json_bytes(_NOT_FOUND_BODY, status=HTTPStatus.NOT_FOUND)
 
-    def _handle_api_get(self, parsed) -> None:
+    def _handle_api_get(self, parsed: SplitResult) -> None:
         path = parsed.path
-        query = parse_qs(parsed.query)
+        query = _query_values(parsed.query)
 
-        limit_raw = (query.get("limit", [""])[0] or "").strip()
+        limit_raw = query.get("limit", "")
         limit: int | None = None
         if limit_raw:
             try:
@@ -132,346 +440,350 @@ class PlexShufflerHandler(BaseHTTPRequestHandler):
                 self._send_json({"error": "Invalid limit"}, status=HTTPStatus.BAD_REQUEST)
                 return
             limit = max(1, min(200, limit))
-        if path == "/api/config":
-            app = self._app
-            config = app.get_config_for_api()
-            raw = app.load_config_raw()
-            token_set = bool(raw.get("plex", {}).get("token"))
-            meta = {"token_set": token_set, "query_fields": catalog_for_api()}
-            self._send_json({"config": config, "meta": meta})
-            return
-
-        if path == "/api/plex/account":
-            app = self._app
-            with app._lock:
-                config = app.load_config_raw()
-                plex_cfg = config.get("plex", {})
-                token = plex_cfg.get("token")
-                client_id = app.ensure_client_id(config)
-            if not token:
-                self._send_json({"error": "Plex token not set"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            try:
-                account = fetch_user(
-                    token=token,
-                    client_id=client_id,
-                    product="Plex Shuffler Studio",
-                    platform="Web",
-                    device="Browser",
-                    device_name="Plex Shuffler Studio",
-                    version=__version__,
-                )
-            except PlexAuthError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
-                return
-            self._send_json({"account": account})
-            return
 
-        if path == "/api/plex/resources":
-            app = self._app
-            with app._lock:
-                config = app.load_config_raw()
-                plex_cfg = config.get("plex", {})
-                token = plex_cfg.get("token")
-                client_id = app.ensure_client_id(config)
-            if not token:
-                self._send_json({"error": "Plex token not set"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            try:
-                resources = fetch_resources(
-                    token=token,
-                    client_id=client_id,
-                    product="Plex Shuffler Studio",
-                    platform="Web",
-                    device="Browser",
-                    device_name="Plex Shuffler Studio",
-                    version=__version__,
-                )
-            except PlexAuthError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+        route = self._GET_ROUTES.get(path)
+        if route is not None:
+            route(self, query, limit)
+            return
+        if path.startswith("/api/plex/pin/"):
+            self._get_plex_pin(path.rsplit("/", 1)[-1])
+            return
+        match = _LIBRARY_FACETS_ROUTE.fullmatch(path)
+        if match:
+            section_key, facet = match.groups()
+            if not section_key or not facet:
+                self._send_json({"values": [], "error": "section_key and facet are required"})
                 return
-            servers = _extract_servers(resources)
-            self._send_json({"servers": servers})
+            self._handle_facets_by_key(section_key, facet, limit=limit)
             return
+        self._send_json_bytes(_NOT_FOUND_BODY, status=HTTPStatus.NOT_FOUND)
 
-        if path == "/api/plex/options":
-            library = (query.get("library", [""])[0] or "").strip()
-            source = (query.get("source", [""])[0] or "").strip()
-            media_type = (query.get("media_type", [""])[0] or "").strip()
-            if not library or not source:
-                self._send_json({"error": "library and source are required"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            if source not in plex_option_sources():
-                self._send_json({"error": "Unsupported options source"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            try:
-                config = load_config(str(self._app.config_path))
-            except (OSError, ValueError) as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
-                return
-            plex_cfg = config.get("plex", {})
-            if not plex_cfg.get("token"):
-                self._send_json({"error": "Plex token not set"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            client = self._app.create_plex_client(plex_cfg)
-            try:
-                section = client.get_section_by_title(library)
-                options = client.get_filter_options(
-                    section_key=section.key,
-                    source=source,
-                    media_type=media_type or section.type,
-                )
-            except PlexError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
-                return
-            if limit is not None:
-                options = list(options)[:limit]
-            self._send_json({"options": options})
+    def _handle_api_post(self, path: str) -> None:
+        route = self._POST_ROUTES.get(path)
+        if route is None:
+            self._send_json_bytes(_NOT_FOUND_BODY, status=HTTPStatus.NOT_FOUND)
             return
+        route(self)
 
-        if path.startswith("/api/plex/pin/"):
-            pin_id_raw = path.rsplit("/", 1)[-1]
-            try:
-                pin_id = int(pin_id_raw)
-            except ValueError:
-                self._send_json({"error": "Invalid pin id"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            app = self._app
-            with app._lock:
-                config = app.load_config_raw()
-                client_id = app.ensure_client_id(config)
-            try:
-                pin = check_pin(
-                    pin_id=pin_id,
-                    client_id=client_id,
-                    product="Plex Shuffler Studio",
-                    platform="Web",
-                    device="Browser",
-                    device_name="Plex Shuffler Studio",
-                    version=__version__,
-                )
-            except PlexAuthError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
-                return
+    def _get_config(self, query: dict[str, str], limit: int | None) -> None:
+        data, etag = self._app.get_config_response()
+        self._send_json_bytes(data, etag=etag)
 
-            token_saved = False
-            if pin.auth_token:
-                with app._lock:
-                    config = app.load_config_raw()
-                    config.setdefault("plex", {})["token"] = pin.auth_token
-                    app.save_config_raw(config)
-                    token_saved = True
-            self._send_json({"pin_id": pin_id, "authorized": bool(pin.auth_token), "token_saved": token_saved})
-            return
-
-        if path == "/api/facets":
-            section_title = (query.get("section_title", [""])[0] or "").strip()
-            section_key = (query.get("section_key", [""])[0] or "").strip()
-            facet = (query.get("facet", [""])[0] or "").strip()
-            if not facet:
-                self._send_json({"values": [], "error": "facet is required"})
-                return
-            if section_key:
-                self._handle_facets_by_key(section_key, facet, limit=limit)
-                return
-            if not section_title:
-                self._send_json({"values": [], "error": "section_title or section_key is required"})
-                return
-            client, error = self._build_plex_client()
-            if error:
-                self._send_json({"values": [], "error": error})
-                return
-            try:
-                section = client.get_section_by_title(section_title)
-            except PlexError as exc:
-                self._send_json({"values": [], "error": str(exc)})
-                return
-            self._handle_facets_by_key(section.key, facet, client=client, limit=limit)
-            return
-
-        if path.startswith("/api/libraries/") and "/facets/" in path:
-            parts = path.strip("/").split("/")
-            if len(parts) == 5 and parts[0] == "api" and parts[1] == "libraries" and parts[3] == "facets":
-                section_key = parts[2]
-                facet = parts[4]
-                if not section_key or not facet:
-                    self._send_json({"values": [], "error": "section_key and facet are required"})
-                    return
-                self._handle_facets_by_key(section_key, facet, limit=limit)
-                return
+    def _get_plex_account(self, query: dict[str, str], limit: int | None) -> None:
+        token, client_id = self._app.load_plex_credentials()
+        if not token:
+            self._send_json_bytes(_TOKEN_NOT_SET_BODY, status=HTTPStatus.BAD_REQUEST)
+            return
+        if query.get("refresh") == "1":
+            clear_auth_cache(token)
+        try:
+            account = fetch_user(
+                token=token,
+                client_id=client_id,
+                product="Plex Shuffler Studio",
+                platform="Web",
+                device="Browser",
+                device_name="Plex Shuffler Studio",
+                version=__version__,
+            )
+        except PlexAuthError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+            return
+        self._send_json({"account": account})
 
-        if path == "/api/libraries":
-            try:
-                config = load_config(str(self._app.config_path))
-            except (OSError, ValueError) as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
-                return
-            plex_cfg = config.get("plex", {})
-            if not plex_cfg.get("token"):
-                self._send_json({"error": "Plex token not set"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            client = self._app.create_plex_client(plex_cfg)
-            try:
-                sections = client.get_sections()
-            except PlexError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
-                return
-            payload = [
-                {"key": section.key, "title": section.title, "type": section.type}
-                for section in sections
-            ]
-            self._send_json({"libraries": payload})
+    def _get_plex_resources(self, query: dict[str, str], limit: int | None) -> None:
+        token, client_id = self._app.load_plex_credentials()
+        if not token:
+            self._send_json_bytes(_TOKEN_NOT_SET_BODY, status=HTTPStatus.BAD_REQUEST)
+            return
+        if query.get("refresh") == "1":
+            # The servers panel asks for this after the user adds or removes a server.
+            clear_auth_cache(token)
+        try:
+            resources = fetch_resources(
+                token=token,
+                client_id=client_id,
+                product="Plex Shuffler Studio",
+                platform="Web",
+                device="Browser",
+                device_name="Plex Shuffler Studio",
+                version=__version__,
+            )
+        except PlexAuthError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
             return
+        servers = _extract_servers(resources)
+        self._send_json({"servers": servers})
+
+    def _get_plex_options(self, query: dict[str, str], limit: int | None) -> None:
+        library = query.get("library", "")
+        source = query.get("source", "")
+        media_type = query.get("media_type", "")
+        if not library or not source:
+            self._send_json({"error": "library and source are required"}, status=HTTPStatus.BAD_REQUEST)
+            return
+        if source not in plex_option_sources():
+            self._send_json({"error": "Unsupported options source"}, status=HTTPStatus.BAD_REQUEST)
+            return
+        try:
+            config = self._app.load_config()
+        except (OSError, ValueError) as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+            return
+        plex_cfg = config.get("plex", {})
+        if not plex_cfg.get("token"):
+            self._send_json_bytes(_TOKEN_NOT_SET_BODY, status=HTTPStatus.BAD_REQUEST)
+            return
+        client = self._app.create_plex_client(plex_cfg)
+        try:
+            section = client.get_section_by_title(library)
+            options = client.get_filter_options(
+                section_key=section.key,
+                source=source,
+                media_type=media_type or section.type,
+            )
+        except PlexError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+            return
+        if limit is not None:
+            options = options[:limit]
+        self._send_json({"options": options}, etag=True)
 
-        self._send_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
+    def _get_plex_pin(self, pin_id_raw: str) -> None:
+        try:
+            pin_id = int(pin_id_raw)
+        except ValueError:
+            self._send_json({"error": "Invalid pin id"}, status=HTTPStatus.BAD_REQUEST)
+            return
+        app = self._app
+        previous_token, client_id = app.load_plex_credentials()
+        try:
+            pin = check_pin(
+                pin_id=pin_id,
+                client_id=client_id,
+                product="Plex Shuffler Studio",
+                platform="Web",
+                device="Browser",
+                device_name="Plex Shuffler Studio",
+                version=__version__,
+            )
+        except PlexAuthError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+            return
 
-    def _handle_api_post(self, path: str) -> None:
-        if path == "/api/config":
-            payload = self._read_json() or {}
-            incoming = payload.get("config", payload)
-            if not isinstance(incoming, dict):
-                self._send_json({"error": "Invalid config payload"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            app = self._app
-            with app._lock:
-                current = app.load_config_raw()
-                incoming.setdefault("plex", {})
-                if not incoming["plex"].get("token"):
-                    incoming["plex"]["token"] = current.get("plex", {}).get("token", "")
-                if not incoming["plex"].get("client_id"):
-                    incoming["plex"]["client_id"] = current.get("plex", {}).get("client_id", "")
-                if not incoming.get("playlists"):
-                    incoming["playlists"] = default_config()["playlists"]
-                _apply_query_state(incoming)
-                app.save_config_raw(incoming)
-            self._send_json({"status": "saved"})
-            return
-
-        if path == "/api/plex/pin":
-            payload = self._read_json() or {}
-            plex_url = payload.get("plex_url") if isinstance(payload, dict) else None
-            app = self._app
-            with app._lock:
+        token_saved = False
+        if pin.auth_token:
+            with app._config_lock:
                 config = app.load_config_raw()
-                apply_plex_overrides(config, plex_url)
-                client_id = app.ensure_client_id(config)
+                config.setdefault("plex", {})["token"] = pin.auth_token
                 app.save_config_raw(config)
-            host = self.headers.get("Host", "localhost")
-            forward_url = f"http://{host}/"
-            try:
-                pin = create_pin(
-                    client_id=client_id,
-                    product="Plex Shuffler Studio",
-                    platform="Web",
-                    device="Browser",
-                    device_name="Plex Shuffler Studio",
-                    version=__version__,
-                    forward_url=forward_url,
-                )
-            except PlexAuthError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
-                return
-            self._send_json(
-                {
-                    "pin_id": pin.pin_id,
-                    "code": pin.code,
-                    "expires_at": pin.expires_at,
-                    "auth_url": pin.auth_url,
-                }
-            )
+                token_saved = True
+            if previous_token and previous_token != pin.auth_token:
+                # The old login's account and server lists no longer apply.
+                clear_auth_cache(previous_token)
+        self._send_json({"pin_id": pin_id, "authorized": bool(pin.auth_token), "token_saved": token_saved})
+
+    def _get_facets(self, query: dict[str, str], limit: int | None) -> None:
+        section_title = query.get("section_title", "")
+        section_key = query.get("section_key", "")
+        facet = query.get("facet", "")
+        if not facet:
+            self._send_json({"values": [], "error": "facet is required"})
             return
+        if section_key:
+            self._handle_facets_by_key(section_key, facet, limit=limit)
+            return
+        if not section_title:
+            self._send_json({"values": [], "error": "section_title or section_key is required"})
+            return
+        client, error = self._build_plex_client()
+        if error:
+            self._send_json({"values": [], "error": error})
+            return
+        try:
+            section = client.get_section_by_title(section_title)
+        except PlexError as exc:
+            self._send_json({"values": [], "error": str(exc)})
+            return
+        self._handle_facets_by_key(section.key, facet, client=client, limit=limit)
 
-        if path == "/api/preview":
-            payload = self._read_json() or {}
-            playlist_index = int(payload.get("playlist_index", 0) or 0)
-            limit = int(payload.get("limit", 30) or 30)
-            limit = max(1, min(200, limit))
-
-            try:
-                config = load_config(str(self._app.config_path))
-            except (OSError, ValueError) as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
-                return
-
-            playlists = config.get("playlists", [])
-            if not playlists or playlist_index >= len(playlists):
-                self._send_json({"error": "Playlist not found"}, status=HTTPStatus.BAD_REQUEST)
-                return
-
-            plex_cfg = config.get("plex", {})
-            if not plex_cfg.get("token"):
-                self._send_json({"error": "Plex token not set"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            client = self._app.create_plex_client(plex_cfg)
-            try:
-                items, stats = build_playlist_items(client, playlists[playlist_index], now_utc())
-            except PlexError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
-                return
+    def _get_libraries(self, query: dict[str, str], limit: int | None) -> None:
+        try:
+            config = self._app.load_config()
+        except (OSError, ValueError) as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+            return
+        plex_cfg = config.get("plex", {})
+        if not plex_cfg.get("token"):
+            self._send_json_bytes(_TOKEN_NOT_SET_BODY, status=HTTPStatus.BAD_REQUEST)
+            return
+        client = self._app.create_plex_client(plex_cfg)
+        try:
+            sections = client.get_sections()
+        except PlexError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+            return
+        payload = [
+            {"key": section.key, "title": section.title, "type": section.type}
+            for section in sections
+        ]
+        self._send_json({"libraries": payload}, etag=True)
+
+    def _post_config(self) -> None:
+        payload = self._read_json()
+        incoming = payload.get("config", payload)
+        if not isinstance(incoming, dict):
+            self._send_json({"error": "Invalid config payload"}, status=HTTPStatus.BAD_REQUEST)
+            return
+        app = self._app
+        with app._config_lock:
+            current = app.load_config_raw()
+            incoming.setdefault("plex", {})
+            if not incoming["plex"].get("token"):
+                incoming["plex"]["token"] = current.get("plex", {}).get("token", "")
+            if not incoming["plex"].get("client_id"):
+                incoming["plex"]["client_id"] = current.get("plex", {}).get("client_id", "")
+            if not incoming.get("playlists"):
+                incoming["playlists"] = default_config()["playlists"]
+            _apply_query_state(incoming)
+            app.save_config_raw(incoming)
+        self._send_json({"status": "saved"})
+
+    def _post_plex_pin(self) -> None:
+        payload = self._read_json()
+        plex_url = payload.get("plex_url")
+        app = self._app
+        with app._config_lock:
+            config = app.load_config_raw()
+            original_plex = dict(config.get("plex", {}))
+            apply_plex_overrides(config, plex_url)
+            client_id = app.ensure_client_id(config, save=False)
+            # One write at most, and none when the URL and client id were already set.
+            if config["plex"] != original_plex:
+                app.save_config_raw(config)
+        host = self.headers.get("Host", "localhost")
+        forward_url = f"http://{host}/"
+        try:
+            pin = create_pin(
+                client_id=client_id,
+                product="Plex Shuffler Studio",
+                platform="Web",
+                device="Browser",
+                device_name="Plex Shuffler Studio",
+                version=__version__,
+                forward_url=forward_url,
+            )
+        except PlexAuthError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+            return
+        self._send_json(
+            {
+                "pin_id": pin.pin_id,
+                "code": pin.code,
+                "expires_at": pin.expires_at,
+                "auth_url": pin.auth_url,
+            }
+        )
 
-            preview = [
-                {
-                    "type": item.type,
-                    "title": item.title,
-                    "show_title": item.show_title,
-                    "season": item.season_index,
-                    "episode": item.episode_index,
-                }
-                for item in items[:limit]
-            ]
-            self._send_json({"items": preview, "stats": stats.__dict__})
+    def _post_preview(self) -> None:
+        payload = self._read_json()
+        playlist_index = int(payload.get("playlist_index", 0) or 0)
+        limit = _preview_limit(payload)
+        loaded = self._load_playlists([playlist_index])
+        if loaded is None:
+            return
+        playlists, client = loaded
+        try:
+            items, stats = self._app.preview_playlist(client, playlist_index, playlists[playlist_index])
+        except PlexError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
             return
+        self._send_json(_preview_result(items, stats, limit))
 
-        if path == "/api/run":
-            payload = self._read_json() or {}
-            playlist_index = int(payload.get("playlist_index", 0) or 0)
+    def _post_run(self) -> None:
+        payload = self._read_json()
+        playlist_index = int(payload.get("playlist_index", 0) or 0)
+        loaded = self._load_playlists([playlist_index])
+        if loaded is None:
+            return
+        playlists, client = loaded
+        try:
+            result = _run_playlist(client, playlists[playlist_index], now_utc())
+        except PlexError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+            return
+        self._send_json(result)
 
-            try:
-                config = load_config(str(self._app.config_path))
-            except (OSError, ValueError) as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
-                return
+    def _post_preview_batch(self) -> None:
+        self._handle_playlist_batch(self._read_json(), run=False)
 
-            playlists = config.get("playlists", [])
-            if not playlists or playlist_index >= len(playlists):
-                self._send_json({"error": "Playlist not found"}, status=HTTPStatus.BAD_REQUEST)
-                return
+    def _post_run_batch(self) -> None:
+        self._handle_playlist_batch(self._read_json(), run=True)
 
-            plex_cfg = config.get("plex", {})
-            if not plex_cfg.get("token"):
-                self._send_json({"error": "Plex token not set"}, status=HTTPStatus.BAD_REQUEST)
-                return
-            client = self._app.create_plex_client(plex_cfg)
-            playlist_cfg = playlists[playlist_index]
-            name = playlist_cfg.get("name", "")
-            output_cfg = playlist_cfg.get("output", {})
-            try:
-                items, stats = build_playlist_items(client, playlist_cfg, now_utc())
-                playlist = sync_playlist(
-                    client,
-                    name=name,
-                    items=items,
-                    mode=output_cfg.get("mode", "replace"),
-                    chunk_size=int(output_cfg.get("chunk_size", 200) or 200),
-                )
-            except PlexError as exc:
-                self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
-                return
+    def _handle_playlist_batch(self, payload: dict[str, Any], *, run: bool) -> None:
+        """Preview or run several playlists with one config load, client and sections lookup.
 
+        ``playlist_indexes`` defaults to every playlist. A Plex failure in one playlist is
+        reported in its own result entry and does not stop the rest of the batch.
+        """
+        indexes = payload.get("playlist_indexes")
+        limit = _preview_limit(payload)
+        if indexes is not None and (
+            not isinstance(indexes, list) or not all(type(index) is int for index in indexes)
+        ):
             self._send_json(
-                {
-                    "status": "ok",
-                    "playlist": playlist.title if playlist else None,
-                    "stats": stats.__dict__,
-                }
+                {"error": "playlist_indexes must be a list of integers"},
+                status=HTTPStatus.BAD_REQUEST,
             )
             return
+        loaded = self._load_playlists(indexes)
+        if loaded is None:
+            return
+        playlists, client = loaded
+        if indexes is None:
+            indexes = list(range(len(playlists)))
 
-        self._send_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
+        now = now_utc()
+        try:
+            sections = index_sections(client.get_sections())
+        except PlexError as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_GATEWAY)
+            return
+        results = []
+        for index in indexes:
+            try:
+                if run:
+                    result = _run_playlist(client, playlists[index], now, sections)
+                else:
+                    items, stats = build_playlist_items(client, playlists[index], now, sections=sections)
+                    result = _preview_result(items, stats, limit)
+            except PlexError as exc:
+                result = {"error": str(exc)}
+            results.append({"playlist_index": index, **result})
+        self._send_json({"results": results})
+
+    def _load_playlists(self, indexes: list[int] | None) -> tuple[list[dict[str, Any]], PlexClient] | None:
+        """Load playlists and the Plex client, or send the error response and return None."""
+        try:
+            config = self._app.load_config()
+        except (OSError, ValueError) as exc:
+            self._send_json({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+            return None
+
+        playlists = config.get("playlists", [])
+        if not playlists or (indexes is not None and not all(0 <= index < len(playlists) for index in indexes)):
+            self._send_json({"error": "Playlist not found"}, status=HTTPStatus.BAD_REQUEST)
+            return None
+
+        plex_cfg = config.get("plex", {})
+        if not plex_cfg.get("token"):
+            self._send_json_bytes(_TOKEN_NOT_SET_BODY, status=HTTPStatus.BAD_REQUEST)
+            return None
+        return playlists, self._app.create_plex_client(plex_cfg)
 
     def _build_plex_client(self) -> tuple[PlexClient | None, str | None]:
         try:
-            config = load_config(str(self._app.config_path))
+            config = self._app.load_config()
         except (OSError, ValueError) as exc:
             return None, str(exc)
         plex_cfg = config.get("plex", {})
@@ -503,7 +815,7 @@ class PlexShufflerHandler(BaseHTTPRequestHandler):
             values = cached
             if limit is not None:
                 values = cached[:limit]
-            self._send_json({"values": values})
+            self._send_json({"values": values}, etag=True, headers={"X-Facet-Cache": "hit"})
             return
         if client is None:
             client, error = self._build_plex_client()
@@ -523,71 +835,303 @@ class PlexShufflerHandler(BaseHTTPRequestHandler):
         self._app.set_cached_facet_values(section_key, facet_source, values)
         if limit is not None:
             values = values[:limit]
-        self._send_json({"values": values})
+        self._send_json({"values": values}, etag=True, headers={"X-Facet-Cache": "miss"})
 
     def _serve_static(self, path: str) -> None:
         if path == "/":
             path = "/index.html"
-        web_root = self._app.web_root
-        target = (web_root / path.lstrip("/")).resolve()
-        if web_root.resolve() not in target.parents and target != web_root.resolve():
-            self._send_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
+        target = self._app.static_target(path)
+        asset = self._app.read_static(target) if target is not None else None
+        if asset is None:
+            self._send_json_bytes(_NOT_FOUND_BODY, status=HTTPStatus.NOT_FOUND)
             return
-        if not target.exists() or not target.is_file():
-            self._send_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
+        if _etag_matches(self.headers.get("If-None-Match"), asset.etag.removeprefix("W/")):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_static_validators(asset)
+            self.end_headers()
             return
         content_type = _guess_type(target.suffix)
-        try:
-            data = target.read_bytes()
-        except OSError:
-            self._send_json({"error": "Not found"}, status=HTTPStatus.NOT_FOUND)
-            return
+        data = asset.data
+        encoded = asset.gzipped is not None and _accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        if encoded:
+            data = asset.gzipped
 
         self.send_response(HTTPStatus.OK)
         self.send_header("Content-Type", content_type)
+        self._send_static_validators(asset)
+        if encoded:
+            self.send_header("Content-Encoding", "gzip")
         self.send_header("Content-Length", str(len(data)))
         self.end_headers()
         self.wfile.write(data)
 
-    def _read_json(self) -> dict[str, Any] | None:
-        length = int(self.headers.get("Content-Length", 0) or 0)
-        if length <= 0:
-            return None
-        data = self.rfile.read(length)
+    def _send_static_validators(self, asset: StaticAsset) -> None:
+        # Assets are not versioned by URL, so browsers must revalidate; a match costs a 304.
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("ETag", asset.etag)
+        if asset.gzipped is not None:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def _read_json(self) -> dict[str, Any]:
+        """Parse the request body as a JSON object; empty, invalid or non-object bodies give ``{}``."""
+        if not self._body:
+            return {}
         try:
-            return json.loads(data.decode("utf-8"))
-        except json.JSONDecodeError:
-            return None
+            # json.loads accepts bytes directly (and rejects undecodable input as ValueError).
+            payload = json.loads(self._body)
+        except ValueError:
+            return {}
+        return payload if isinstance(payload, dict) else {}
 
-    def _send_json(self, payload: dict[str, Any], status: HTTPStatus = HTTPStatus.OK) -> None:
-        data = json.dumps(payload).encode("utf-8")
+    def _send_json(
+        self,
+        payload: dict[str, Any],
+        status: HTTPStatus = HTTPStatus.OK,
+        etag: bool = False,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        data = _encode_json(payload)
+        self._send_json_bytes(data, status, etag=_etag(data) if etag else None, headers=headers)
+
+    def _send_json_bytes(
+        self,
+        data: bytes,
+        status: HTTPStatus = HTTPStatus.OK,
+        etag: str | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        if etag is not None and _etag_matches(self.headers.get("If-None-Match"), etag):
+            # The UI already holds this exact payload: skip the body.
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.send_header("Content-Length", str(len(data)))
         self.end_headers()
         self.wfile.write(data)
 
     def log_message(self, format: str, *args: Any) -> None:  # noqa: A003
-        LOGGER.info("%s - %s", self.address_string(), format % args)
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info("%s - %s", self.address_string(), format % args)
 
     @property
     def _app(self) -> WebApp:
         return self.server.app  # type: ignore[attr-defined]
 
+    # Exact-path routes; pin checks and library facet paths carry ids and are matched in
+    # _handle_api_get after this lookup misses.
+    _GET_ROUTES: dict[str, Callable[[PlexShufflerHandler, dict[str, str], int | None], None]] = {
+        "/api/config": _get_config,
+        "/api/plex/account": _get_plex_account,
+        "/api/plex/resources": _get_plex_resources,
+        "/api/plex/options": _get_plex_options,
+        "/api/facets": _get_facets,
+        "/api/libraries": _get_libraries,
+    }
+    _POST_ROUTES: dict[str, Callable[[PlexShufflerHandler], None]] = {
+        "/api/config": _post_config,
+        "/api/plex/pin": _post_plex_pin,
+        "/api/preview": _post_preview,
+        "/api/run": _post_run,
+        "/api/preview_batch": _post_preview_batch,
+        "/api/run_batch": _post_run_batch,
+    }
+
+
+class PlexShufflerWebServer(HTTPServer):
+    """HTTP server that hands connections to a fixed set of reusable daemon worker threads.
+
+    Unlike ThreadingHTTPServer this does not start a thread per connection; connections
+    beyond the worker count wait in the queue until a worker frees up.
+    """
 
-class PlexShufflerWebServer(ThreadingHTTPServer):
-    def __init__(self, server_address: tuple[str, int], handler_class: type[PlexShufflerHandler], app: WebApp):
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_class: type[PlexShufflerHandler],
+        app: WebApp,
+        max_workers: int | None = None,
+    ):
         super().__init__(server_address, handler_class)
         self.app = app
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"pss-http-{index}", daemon=True)
+            for index in range(max_workers or _http_worker_count())
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address) -> None:
+        self._requests.put((request, client_address))
+
+    def server_close(self) -> None:
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
+
+    def _work(self) -> None:
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+
+def _preview_limit(payload: dict[str, Any]) -> int:
+    limit = int(payload.get("limit", 30) or 30)
+    return max(1, min(200, limit))
+
+
+def _preview_result(items: list[MediaItem], stats: BuildStats, limit: int) -> dict[str, Any]:
+    preview = [
+        {
+            "type": item.type,
+            "title": item.title,
+            "show_title": item.show_title,
+            "season": item.season_index,
+            "episode": item.episode_index,
+        }
+        for item in items[:limit]
+    ]
+    return {"items": preview, "stats": stats.__dict__}
+
+
+def _run_playlist(
+    client: PlexClient,
+    playlist_cfg: dict[str, Any],
+    now: dt.datetime,
+    sections: dict[str, LibrarySection] | None = None,
+) -> dict[str, Any]:
+    """Build and sync one playlist; raises ``PlexError`` like the builder and sync do."""
+    output_cfg = playlist_cfg.get("output", {})
+    items, stats = build_playlist_items(client, playlist_cfg, now, sections=sections)
+    playlist = sync_playlist(
+        client,
+        name=playlist_cfg.get("name", ""),
+        items=items,
+        mode=output_cfg.get("mode", "replace"),
+        chunk_size=int(output_cfg.get("chunk_size", 200) or 200),
+    )
+    return {
+        "status": "ok",
+        "playlist": playlist.title if playlist else None,
+        "stats": stats.__dict__,
+    }
+
+
+def _http_worker_count() -> int:
+    """Worker threads for the web server (PLEX_SHUFFLER_HTTP_THREADS overrides the default 32)."""
+    try:
+        return max(1, int(os.getenv("PLEX_SHUFFLER_HTTP_THREADS", "") or HTTP_WORKERS))
+    except ValueError:
+        return HTTP_WORKERS
+
+
+def _encode_json(payload: dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators=_JSON_SEPARATORS).encode("ascii")
+
+
+# The most frequent fixed error bodies, encoded once instead of per response.
+_NOT_FOUND_BODY = _encode_json({"error": "Not found"})
+_TOKEN_NOT_SET_BODY = _encode_json({"error": "Plex token not set"})
+
+
+def _query_values(query: str) -> dict[str, str]:
+    """First non-blank value per parameter, stripped (the API never takes repeated keys).
+
+    Matches ``parse_qs(query)[key][0].strip()`` but reuses the memoized pair split, since the
+    UI repeats the same facet/option queries.
+    """
+    values: dict[str, str] = {}
+    for key, value in split_query_pairs(query):
+        if value and key not in values:
+            values[key] = value.strip()
+    return values
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    """Weak comparison against an If-None-Match list (``W/`` prefixes ignored)."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _file_signature(path: Path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _config_view(config: dict[str, Any]) -> dict[str, Any]:
+    """Turn a freshly loaded raw config into its API form (token hidden, query state attached)."""
+    plex_cfg = config.setdefault("plex", {})
+    if plex_cfg.get("token"):
+        plex_cfg["token"] = ""
+    _attach_query_state(config)
+    return config
 
 
 def _normalize_facet_values(values: list[str]) -> list[str]:
-    cleaned = [value.strip() for value in values if isinstance(value, str) and value.strip()]
-    return sorted(set(cleaned), key=str.lower)
+    # One strip per value; dict.fromkeys dedups in first-seen order, so case-only ties
+    # ("Drama"/"drama") sort deterministically instead of in set order.
+    unique = dict.fromkeys(stripped for value in values if isinstance(value, str) and (stripped := value.strip()))
+    return sorted(unique, key=str.lower)
+
+
+def _gzip_asset(suffix: str, data: bytes) -> bytes | None:
+    """Precompress a text asset; None when it is not compressible or does not shrink."""
+    if suffix.lower() not in _COMPRESSIBLE_SUFFIXES:
+        return None
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    return compressed if len(compressed) < len(data) else None
+
+
+def _accepts_gzip(header: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (an explicit entry beats ``*``)."""
+    qualities: dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
 
 
-def _guess_type(suffix: str) -> str:
-    return {
+_CONTENT_TYPES = MappingProxyType(
+    {
         ".html": "text/html; charset=utf-8",
         ".css": "text/css; charset=utf-8",
         ".js": "application/javascript; charset=utf-8",
@@ -596,7 +1140,12 @@ def _guess_type(suffix: str) -> str:
         ".jpg": "image/jpeg",
         ".jpeg": "image/jpeg",
         ".ico": "image/x-icon",
-    }.get(suffix.lower(), "application/octet-stream")
+    }
+)
+
+
+def _guess_type(suffix: str) -> str:
+    return _CONTENT_TYPES.get(suffix.lower(), "application/octet-stream")
 
 
 def _extract_servers(resources: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -619,25 +1168,21 @@ def _extract_servers(resources: list[dict[str, Any]]) -> list[dict[str, Any]]:
 
 
 def _pick_preferred_connection(connections: list[dict[str, Any]]) -> str:
-    if not connections:
-        return ""
-
-    def score(conn: dict[str, Any]) -> tuple[int, str]:
-        protocol = (conn.get("protocol") or "").lower()
-        is_https = protocol == "https"
-        relay = bool(conn.get("relay"))
-        local = bool(conn.get("local"))
-        base = 0
-        if is_https:
-            base += 4
-        if not relay:
-            base += 2
-        if not local:
-            base += 1
-        return (base, conn.get("uri", ""))
-
-    best = max(connections, key=score)
-    return best.get("uri", "")
+    """Prefer https, then direct over relay, then remote over local; ties go to the larger URI."""
+    best_key: tuple[int, str] | None = None
+    best_uri = ""
+    for conn in connections:
+        uri = conn.get("uri", "")
+        key = (
+            ((conn.get("protocol") or "").lower() == "https") << 2
+            | (not conn.get("relay")) << 1
+            | (not conn.get("local")),
+            uri,
+        )
+        # Strict ">" keeps the first of equal candidates, like max().
+        if best_key is None or key > best_key:
+            best_key, best_uri = key, uri
+    return best_uri
 
 
 def _attach_query_state(config: dict[str, Any]) -> None:
@@ -661,8 +1206,7 @@ def _attach_query_state_to_section(section: dict[str, Any]) -> None:
         if serialize_query_state(state) == (query or "").strip():
             section["query_state"] = query_state_to_dict(state)
             return
-    state = parse_query_string(query, known_fields=DEFAULT_KNOWN_FIELDS, strict=True)
-    section["query_state"] = query_state_to_dict(state)
+    section["query_state"] = query_state_to_dict(_parse_query_state((query or "").strip()))
 
 
 def _apply_query_state(config: dict[str, Any]) -> None:
@@ -685,26 +1229,79 @@ def _apply_query_state_to_section(section: dict[str, Any]) -> None:
         state = query_state_from_dict(raw_state)
         state_query = serialize_query_state(state)
         if state_query != current_query:
-            state = parse_query_string(current_query, known_fields=DEFAULT_KNOWN_FIELDS, strict=True)
             section["query"] = current_query
-            section["query_state"] = query_state_to_dict(state)
+            section["query_state"] = query_state_to_dict(_parse_query_state(current_query))
             return
         section["query"] = state_query
         section["query_state"] = query_state_to_dict(state)
         return
     section["query"] = current_query
-    state = parse_query_string(current_query, known_fields=DEFAULT_KNOWN_FIELDS, strict=True)
-    section["query_state"] = query_state_to_dict(state)
+    section["query_state"] = query_state_to_dict(_parse_query_state(current_query))
 
 
-def run_web_server(config_path: str, host: str, port: int) -> None:
+@lru_cache(maxsize=256)
+def _parse_query_state(query: str) -> QueryState:
+    # Playlists often share query strings. The cached state never leaves this module
+    # except through query_state_to_dict, which builds fresh dicts and lists.
+    return parse_query_string(query, known_fields=DEFAULT_KNOWN_FIELDS, strict=True)
+
+
+def _facet_cache_path() -> Path:
+    return user_cache_dir() / "facets.json"
+
+
+def _configured_server_url(app: WebApp) -> str:
+    try:
+        return (app.load_config_raw().get("plex", {}).get("url") or "").strip()
+    except (OSError, ValueError):
+        return ""
+
+
+@contextmanager
+def _background_log_writes() -> Iterator[None]:
+    """Hand root-logger records to a listener thread so request threads never wait on log I/O.
+
+    The existing root handlers move behind a ``QueueListener`` for the duration and are
+    restored afterwards; records still queued at exit are written before returning.
+    """
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    if not handlers:
+        yield
+        return
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    listener.start()
+    try:
+        yield
+    finally:
+        root.removeHandler(queue_handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        listener.stop()
+
+
+def run_web_server(config_path: str, host: str, port: int, warm_facets: bool = False) -> None:
     web_root = Path(__file__).resolve().parent / "web"
     app = WebApp(config_path=config_path, web_root=str(web_root))
+    app.load_facet_cache(_facet_cache_path(), _configured_server_url(app))
     server = PlexShufflerWebServer((host, port), PlexShufflerHandler, app)
+    if warm_facets:
+        # Background thread: the UI is usable immediately, warm entries just arrive early.
+        threading.Thread(target=app.warm_facet_cache, name="facet-warmup", daemon=True).start()
     LOGGER.info("Plex Shuffler Studio web UI running on http://%s:%s", host, port)
     try:
-        server.serve_forever()
+        with _background_log_writes():
+            server.serve_forever()
     except KeyboardInterrupt:
         LOGGER.info("Shutting down web server")
     finally:
         server.server_close()
+        try:
+            app.save_facet_cache(_facet_cache_path(), _configured_server_url(app))
+        except OSError as exc:
+            LOGGER.warning("Could not save facet cache: %s", exc)
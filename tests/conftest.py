@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep on-disk caches (machine ids, plex.tv lookups) out of the real user cache dir."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("PLEX_SHUFFLER_CACHE_DIR", str(cache_dir))
+    return cache_dir
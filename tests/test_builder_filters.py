@@ -0,0 +1,72 @@
+import datetime as dt
+from fnmatch import fnmatchcase
+
+from plex_shuffler.builder import _filter_titles, _filter_watched, _title_matcher, _title_matches
+from plex_shuffler.models import MediaItem
+
+
+def _show(title: str) -> MediaItem:
+    return MediaItem(rating_key=title, title=title, type="show")
+
+
+def test_filter_titles_include_and_exclude_globs() -> None:
+    shows = [_show("The Simpsons"), _show("Simpsons Shorts"), _show("Futurama"), _show("Nightly News")]
+
+    out = _filter_titles(shows, include=["*simpsons*", "Futurama"], exclude=["*shorts"])
+
+    assert [show.title for show in out] == ["The Simpsons", "Futurama"]
+
+
+def test_filter_titles_is_case_insensitive_and_trims_patterns() -> None:
+    shows = [_show("Bob's Burgers"), _show("BOJACK HORSEMAN")]
+
+    out = _filter_titles(shows, include=["  bo[jb]*  "], exclude=[])
+
+    assert [show.title for show in out] == ["Bob's Burgers", "BOJACK HORSEMAN"]
+
+
+def test_filter_titles_without_patterns_keeps_everything() -> None:
+    shows = [_show("A"), _show("B")]
+
+    assert _filter_titles(shows, include=[], exclude=["", None]) == shows
+
+
+def test_filter_titles_literal_patterns_require_exact_match() -> None:
+    shows = [_show("Futurama"), _show("Futurama: Bender's Game")]
+
+    out = _filter_titles(shows, include=["FUTURAMA"], exclude=[])
+
+    assert [show.title for show in out] == ["Futurama"]
+
+
+def _episode(key: str, view_count: int | None = None, last_viewed_at: dt.datetime | None = None) -> MediaItem:
+    return MediaItem(
+        rating_key=key,
+        title=key,
+        type="episode",
+        view_count=view_count,
+        last_viewed_at=last_viewed_at,
+    )
+
+
+def test_filter_watched_applies_unwatched_and_cutoff() -> None:
+    now = dt.datetime(2026, 1, 10, tzinfo=dt.timezone.utc)
+    cutoff = now - dt.timedelta(days=7)
+    episodes = [
+        _episode("fresh"),
+        _episode("old", view_count=1, last_viewed_at=now - dt.timedelta(days=30)),
+        _episode("recent", view_count=2, last_viewed_at=now - dt.timedelta(days=1)),
+    ]
+
+    assert [e.rating_key for e in _filter_watched(episodes, cutoff, False)] == ["fresh", "old"]
+    assert [e.rating_key for e in _filter_watched(episodes, None, True)] == ["fresh"]
+    assert [e.rating_key for e in _filter_watched(episodes, None, False)] == ["fresh", "old", "recent"]
+
+
+def test_title_matcher_agrees_with_fnmatchcase() -> None:
+    titles = ["the office (us)", "the office", "doctor who", "doctor who (2005)", "a/b", "[adult swim]"]
+    patterns = ["the office*", "doctor who", "*(20??)", "a/b", "[[]adult*", "d?ctor*"]
+    for pattern in patterns:
+        matcher = _title_matcher([pattern])
+        for title in titles:
+            assert _title_matches(matcher, title) == fnmatchcase(title, pattern), (pattern, title)
@@ -0,0 +1,143 @@
+import datetime as dt
+
+import pytest
+
+import plex_shuffler.builder as builder
+from plex_shuffler.builder import _build_tv_groups, plan_playlist
+from plex_shuffler.models import LibrarySection, MediaItem
+from plex_shuffler.plex_client import PlexError
+
+NOW = dt.datetime(2026, 1, 10, tzinfo=dt.timezone.utc)
+
+
+def _show(key: str) -> MediaItem:
+    return MediaItem(rating_key=key, title=f"Show {key}", type="show")
+
+
+def _episode(show: str, season: int, index: int) -> MediaItem:
+    return MediaItem(
+        rating_key=f"{show}-{season}-{index}",
+        title=f"{show} {season}x{index}",
+        type="episode",
+        show_rating_key=show,
+        season_index=season,
+        episode_index=index,
+    )
+
+
+class FakeTvClient:
+    def __init__(self, shows: list[MediaItem], episodes: list[MediaItem], section_error: bool = False) -> None:
+        self.shows = shows
+        self.episodes = episodes
+        self.section_error = section_error
+        self.section_calls = 0
+        self.show_calls = 0
+
+    def get_section_by_title(self, title: str) -> LibrarySection:
+        return LibrarySection(key="1", title=title, type="show")
+
+    def get_shows(self, section_key: str, query=None) -> list[MediaItem]:
+        return list(self.shows)
+
+    def get_section_episodes(self, section_key: str, query=None) -> list[MediaItem]:
+        self.section_calls += 1
+        if self.section_error:
+            raise PlexError("boom")
+        return list(self.episodes)
+
+    def get_show_episodes(self, show_key: str, query=None) -> list[MediaItem]:
+        self.show_calls += 1
+        return [episode for episode in self.episodes if episode.show_rating_key == show_key]
+
+    def get_episodes_bulk(self, show_keys, query=None) -> dict[str, list[MediaItem]]:
+        return {key: self.get_show_episodes(key, query) for key in show_keys}
+
+
+def _plan(max_per_show: int = 0):
+    return plan_playlist(
+        {"tv": {"library": "TV", "episode_filters": {"max_per_show": max_per_show}}}
+    )
+
+
+def test_tv_groups_use_single_section_query_for_many_shows(monkeypatch) -> None:
+    monkeypatch.setattr(builder, "SECTION_EPISODES_MIN_SHOWS", 2)
+    shows = [_show("a"), _show("b")]
+    episodes = [_episode("b", 1, 2), _episode("a", 2, 1), _episode("a", 1, 1), _episode("b", 1, 1), _episode("z", 1, 1)]
+    client = FakeTvClient(shows, episodes)
+
+    groups = _build_tv_groups(client, _plan(max_per_show=1), NOW)
+
+    assert client.section_calls == 1
+    assert client.show_calls == 0
+    assert [(group.name, [item.rating_key for item in group.items]) for group in groups] == [
+        ("Show a", ["a-1-1"]),
+        ("Show b", ["b-1-1"]),
+    ]
+
+
+def test_tv_groups_fall_back_to_per_show_fetches(monkeypatch) -> None:
+    monkeypatch.setattr(builder, "SECTION_EPISODES_MIN_SHOWS", 2)
+    shows = [_show("a"), _show("b")]
+    episodes = [_episode("a", 1, 2), _episode("a", 1, 1), _episode("b", 1, 1)]
+    client = FakeTvClient(shows, episodes, section_error=True)
+
+    groups = _build_tv_groups(client, _plan(), NOW)
+
+    assert client.show_calls == 2
+    assert [[item.rating_key for item in group.items] for group in groups] == [["a-1-1", "a-1-2"], ["b-1-1"]]
+
+
+@pytest.mark.parametrize(
+    "tv_config",
+    [
+        {"include_titles": ["Show a", "Show b"]},
+        {"query": "genre=Comedy"},
+    ],
+)
+def test_tv_groups_fetch_per_show_for_a_small_share_of_the_section(monkeypatch, tv_config) -> None:
+    monkeypatch.setattr(builder, "SECTION_EPISODES_MIN_SHOWS", 2)
+    shows = [_show(key) for key in "abcdefghij"]
+    client = FakeTvClient(shows, [_episode(key, 1, 1) for key in "abcdefghij"])
+    if "query" in tv_config:
+        client.shows = shows[:2]  # the server already narrowed the listing
+
+    groups = _build_tv_groups(client, plan_playlist({"tv": {"library": "TV", **tv_config}}), NOW)
+
+    assert client.section_calls == 0
+    assert client.show_calls == 2
+    assert [group.name for group in groups] == ["Show a", "Show b"]
+
+
+def test_tv_groups_fetch_per_show_for_few_shows() -> None:
+    client = FakeTvClient([_show("a")], [_episode("a", 1, 1)])
+
+    groups = _build_tv_groups(client, _plan(), NOW)
+
+    assert client.section_calls == 0
+    assert client.show_calls == 1
+    assert len(groups) == 1
+
+
+def test_tv_groups_resolve_section_from_shared_index() -> None:
+    client = FakeTvClient([_show("a")], [_episode("a", 1, 1)])
+    client.get_section_by_title = None  # must not be called when an index is supplied
+    sections = builder.index_sections([LibrarySection(key="1", title=" TV ", type="show")])
+
+    groups = _build_tv_groups(client, _plan(), NOW, sections)
+
+    assert len(groups) == 1
+
+
+def test_index_sections_keeps_first_section_on_title_clash() -> None:
+    sections = builder.index_sections(
+        [LibrarySection(key="1", title="TV", type="show"), LibrarySection(key="2", title=" tv ", type="show")]
+    )
+
+    assert sections == {"tv": LibrarySection(key="1", title="TV", type="show")}
+
+
+def test_tv_groups_missing_section_in_index_raises() -> None:
+    client = FakeTvClient([], [])
+
+    with pytest.raises(PlexError, match="Library section not found: TV"):
+        _build_tv_groups(client, _plan(), NOW, {})
@@ -0,0 +1,45 @@
+import datetime as dt
+import random
+
+from plex_shuffler.builder import _create_rng, plan_playlist
+from plex_shuffler.config import default_playlist
+
+
+def test_plan_playlist_precomputes_options() -> None:
+    playlist = default_playlist("Test")
+    playlist["tv"]["query"] = "genre=Animation&year>=2010"
+    playlist["tv"]["include_titles"] = ["The Simpsons", "*futurama*"]
+    playlist["tv"]["order"] = {"strategy": "random", "chunk_size": None, "seed": "daily"}
+    playlist["movies"]["ratio"] = {"every_episodes": 4, "max_movies": "2"}
+
+    plan = plan_playlist(playlist)
+
+    assert plan.tv_query == (("genre", "Animation"), ("year>", "2010"))
+    assert plan.tv_include is not None
+    assert plan.tv_include[0] == frozenset({"the simpsons"})
+    assert plan.tv_exclude is None
+    assert plan.tv_strategy == "random"
+    assert plan.tv_chunk_size == 1
+    assert plan.tv_seed == "daily"
+    assert plan.every_episodes == 4
+    assert plan.max_movies == 2
+    assert plan.movies_enabled is False
+
+
+def test_plan_playlist_tolerates_missing_sections() -> None:
+    plan = plan_playlist({"name": "Bare"})
+
+    assert plan.tv_library == ""
+    assert plan.tv_query == ()
+    assert plan.tv_strategy == "rounds"
+    assert plan.limit_items == 0
+
+
+def test_create_rng_buckets_match_calendar_formats() -> None:
+    now = dt.datetime(2027, 1, 1, 12, tzinfo=dt.timezone.utc)
+    for seed, fmt in (("daily", "%Y%m%d"), ("Weekly", "%G%V"), ("monthly", "%Y%m")):
+        expected = random.Random(int(now.strftime(fmt))).random()
+        assert _create_rng(seed, now).random() == expected
+
+    assert _create_rng(" 42 ", now).random() == random.Random(42).random()
+    assert _create_rng("abc", now).random() == random.Random("abc").random()
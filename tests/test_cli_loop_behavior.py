@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import plex_shuffler.cli as cli
+from plex_shuffler.models import MediaItem
 
 
 def test_run_without_loop_runs_once(monkeypatch):
@@ -34,7 +35,10 @@ def test_run_without_loop_runs_once(monkeypatch):
         def __init__(self, *args, **kwargs):
             pass
 
-    def fake_build_playlist_items(_client, _playlist_cfg, _now):
+        def get_sections(self):
+            return []
+
+    def fake_build_playlist_items(_client, _playlist_cfg, _now, sections=None):
         ran["count"] += 1
         return ([], type("Stats", (), {"shows": 0, "episodes": 0, "movies": 0, "total_items": 0})())
 
@@ -50,3 +54,15 @@ def test_run_without_loop_runs_once(monkeypatch):
 
     assert cli.main() == 0
     assert ran["count"] == 1
+
+
+def test_print_items_writes_one_line_per_item(capsys):
+    items = [
+        MediaItem(rating_key="1", title="Pilot", type="episode", show_title="Show", season_index=1, episode_index=2),
+        MediaItem(rating_key="2", title="Film", type="movie"),
+        MediaItem(rating_key="3", title="Clip", type="clip"),
+    ]
+
+    cli._print_items(items)
+
+    assert capsys.readouterr().out == "Show S01E02 - Pilot\nMovie - Film\nClip\n"
@@ -0,0 +1,76 @@
+import json
+
+from plex_shuffler.config import (
+    DEFAULT_PLAYLIST,
+    DEFAULTS,
+    _normalize_playlist,
+    default_playlist,
+    load_config,
+    load_config_raw,
+    save_config,
+)
+
+
+def test_default_playlist_does_not_share_nested_state() -> None:
+    first = default_playlist("A")
+    first["tv"]["include_titles"].append("Futurama")
+    first["tv"]["order"]["seed"] = "daily"
+
+    second = default_playlist("B")
+
+    assert second["tv"]["include_titles"] == []
+    assert second["tv"]["order"]["seed"] == ""
+    assert DEFAULT_PLAYLIST["tv"]["order"]["seed"] == ""
+
+
+def test_normalize_playlist_overlays_nested_values() -> None:
+    raw = {
+        "name": "Mix",
+        "tv": {"library": "TV", "order": {"seed": "weekly"}},
+        "movies": {"enabled": True, "ratio": {"every_episodes": 5}},
+        "custom": {"kept": True},
+    }
+
+    playlist = _normalize_playlist(raw)
+
+    assert playlist["name"] == "Mix"
+    assert playlist["tv"]["library"] == "TV"
+    assert playlist["tv"]["order"] == {"strategy": "rounds", "chunk_size": 1, "seed": "weekly"}
+    assert playlist["movies"]["ratio"] == {"every_episodes": 5, "max_movies": 0}
+    assert playlist["output"]["chunk_size"] == 200
+    assert playlist["custom"] == {"kept": True}
+
+
+def test_load_config_does_not_write_resolved_token_into_defaults(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"playlists": []}), encoding="utf-8")
+    monkeypatch.setenv("PLEX_TOKEN", "secret")
+
+    config = load_config(str(path))
+
+    assert config["plex"]["token"] == "secret"
+    assert DEFAULTS["plex"]["token"] == ""
+
+
+def test_load_config_raw_sections_are_independent_of_defaults(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"plex": dict(DEFAULTS["plex"]), "playlists": []}), encoding="utf-8")
+
+    config = load_config_raw(str(path))
+    config["plex"]["token"] = "from-pin"
+    config["schedule"]["interval_minutes"] = 5
+
+    assert DEFAULTS["plex"]["token"] == ""
+    assert DEFAULTS["schedule"]["interval_minutes"] == 0
+
+
+def test_config_reads_are_independent_and_see_saves(tmp_path) -> None:
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"playlists": [{"name": "A"}]}), encoding="utf-8")
+
+    first = load_config_raw(str(path))
+    first["playlists"][0]["name"] = "mutated"
+    assert load_config_raw(str(path))["playlists"][0]["name"] == "A"
+
+    save_config(str(path), {"playlists": [{"name": "B"}]})
+    assert load_config_raw(str(path))["playlists"][0]["name"] == "B"
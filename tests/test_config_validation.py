@@ -57,3 +57,15 @@ def test_validate_config_accepts_minimal_valid_config() -> None:
     }
 
     validate_config(good)
+
+
+def test_validate_config_tolerates_non_object_sections() -> None:
+    bad = {
+        "plex": {"url": "http://localhost:32400", "token": "token"},
+        "playlists": [{"name": "P", "tv": "TV Shows", "movies": None, "output": []}],
+    }
+
+    with pytest.raises(ConfigError) as exc:
+        validate_config(bad)
+
+    assert "playlists[1].tv.library is required" in str(exc.value)
@@ -0,0 +1,126 @@
+import http.client
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from plex_shuffler.http_pool import ConnectionPool, _peer_closed
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    posts = 0
+
+    def setup(self) -> None:
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self) -> None:
+        body = self.path.encode("utf-8")
+        self.send_response(404 if self.path == "/missing" else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path == "/drop":
+            # Close without a "Connection: close" header, like an idle keep-alive timeout.
+            self.close_connection = True
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).posts += 1
+        if self.path == "/accept-then-drop":
+            # The write was applied, but the socket dies before the response goes out.
+            self.close_connection = True
+            return
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args) -> None:  # noqa: A003
+        return
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _KeepAliveHandler.connections = 0
+        _KeepAliveHandler.posts = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.base_url = f"http://{host}:{port}"
+        self.pool = ConnectionPool(self.base_url, timeout=5)
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join(timeout=1)
+
+    def test_reuses_connection_within_thread(self) -> None:
+        first = self.pool.request("GET", f"{self.base_url}/a?x=1")
+        second = self.pool.request("GET", f"{self.base_url}/b")
+        self.assertEqual(first.body, b"/a?x=1")
+        self.assertEqual(second.body, b"/b")
+        self.assertEqual(_KeepAliveHandler.connections, 1)
+
+    def test_closes_connections_left_by_finished_threads(self) -> None:
+        worker = threading.Thread(target=self.pool.request, args=("GET", f"{self.base_url}/a"))
+        worker.start()
+        worker.join()
+        orphan = self.pool._connections[0][1]
+
+        self.pool.request("GET", f"{self.base_url}/b")
+
+        self.assertIsNone(orphan.sock)
+        self.assertEqual([owner for owner, _ in self.pool._connections], [threading.current_thread()])
+
+    def test_returns_error_status_without_raising(self) -> None:
+        response = self.pool.request("GET", f"{self.base_url}/missing")
+        self.assertEqual(response.status, 404)
+        self.assertEqual(self.pool.request("GET", f"{self.base_url}/ok").status, 200)
+
+    def test_reconnects_after_server_drops_idle_connection(self) -> None:
+        self.pool.request("GET", f"{self.base_url}/drop")
+        response = self.pool.request("GET", f"{self.base_url}/b")
+        self.assertEqual(response.body, b"/b")
+        self.assertEqual(_KeepAliveHandler.connections, 2)
+
+
+    def test_post_is_not_resent_after_it_reached_the_server(self) -> None:
+        self.pool.request("GET", f"{self.base_url}/a")
+
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.pool.request("POST", f"{self.base_url}/accept-then-drop")
+
+        self.assertEqual(_KeepAliveHandler.posts, 1)
+
+    def test_post_skips_idle_socket_closed_by_server(self) -> None:
+        self.pool.request("GET", f"{self.base_url}/drop")
+        connection = self.pool._local.connection
+        for _ in range(100):
+            if _peer_closed(connection):
+                break
+            threading.Event().wait(0.01)
+
+        response = self.pool.request("POST", f"{self.base_url}/playlists")
+
+        self.assertEqual(response.status, 201)
+        self.assertEqual(_KeepAliveHandler.posts, 1)
+        self.assertEqual(_KeepAliveHandler.connections, 2)
+
+    def test_sends_plain_http_through_environment_proxy(self) -> None:
+        with mock.patch.dict(os.environ, {"http_proxy": self.base_url, "no_proxy": ""}):
+            pool = ConnectionPool("http://plex.invalid:32400", timeout=5)
+        try:
+            response = pool.request("GET", "http://plex.invalid:32400/identity")
+        finally:
+            pool.close()
+
+        self.assertEqual(response.body, b"http://plex.invalid:32400/identity")
+
+
+if __name__ == "__main__":
+    unittest.main()
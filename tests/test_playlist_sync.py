@@ -0,0 +1,110 @@
+import os
+
+from plex_shuffler.models import MediaItem, PlaylistInfo
+from plex_shuffler.playlist import load_sync_state, save_sync_state, sync_playlist, sync_state_path
+
+
+class FakePlaylistClient:
+    def __init__(self) -> None:
+        self.playlists: list[PlaylistInfo] = []
+        self.calls: list[str] = []
+        self._next_key = 100
+        self._items: list[str] = []
+
+    def get_playlists(self, title: str | None = None) -> list[PlaylistInfo]:
+        return list(self.playlists)
+
+    def delete_playlist(self, playlist_key: str) -> None:
+        self.calls.append(f"delete:{playlist_key}")
+        self.playlists = [p for p in self.playlists if p.rating_key != playlist_key]
+
+    def create_playlist(self, title: str, rating_keys: list[str]) -> PlaylistInfo:
+        self.calls.append(f"create:{len(rating_keys)}")
+        self._next_key += 1
+        self._items = list(rating_keys)
+        return self._store(title)
+
+    def add_playlist_items(self, playlist_key: str, rating_keys: list[str]) -> None:
+        self.calls.append(f"add:{len(rating_keys)}")
+        self._items.extend(rating_keys)
+        title = self.playlists[-1].title
+        self.playlists = self.playlists[:-1]
+        self._store(title)
+
+    def _store(self, title: str) -> PlaylistInfo:
+        info = PlaylistInfo(str(self._next_key), title, "video", leaf_count=len(self._items))
+        self.playlists.append(info)
+        return info
+
+
+def _items(keys: list[str]) -> list[MediaItem]:
+    return [MediaItem(rating_key=key, title=key, type="episode") for key in keys]
+
+
+def test_sync_skips_unchanged_replace(tmp_path) -> None:
+    client = FakePlaylistClient()
+    state_path = sync_state_path(str(tmp_path / "config.json"))
+
+    first = sync_playlist(client, "Mix", _items(["1", "2", "3"]), chunk_size=2, state_path=state_path)
+    assert client.calls == ["create:2", "add:1"]
+
+    client.calls.clear()
+    second = sync_playlist(client, "Mix", _items(["1", "2", "3"]), chunk_size=2, state_path=state_path)
+    assert client.calls == []
+    assert second.rating_key == first.rating_key
+
+    sync_playlist(client, "Mix", _items(["3", "2", "1"]), chunk_size=2, state_path=state_path)
+    assert client.calls == [f"delete:{first.rating_key}", "create:2", "add:1"]
+
+
+def test_sync_rebuilds_when_plex_item_count_drifts(tmp_path) -> None:
+    client = FakePlaylistClient()
+    state_path = str(tmp_path / "state.json")
+
+    sync_playlist(client, "Mix", _items(["1", "2"]), state_path=state_path)
+    existing = client.playlists[0]
+    client.playlists = [PlaylistInfo(existing.rating_key, existing.title, "video", leaf_count=1)]
+    client.calls.clear()
+
+    sync_playlist(client, "Mix", _items(["1", "2"]), state_path=state_path)
+
+    assert client.calls == [f"delete:{existing.rating_key}", "create:2"]
+
+
+def test_sync_without_state_path_always_replaces() -> None:
+    client = FakePlaylistClient()
+    sync_playlist(client, "Mix", _items(["1"]))
+    client.calls.clear()
+
+    sync_playlist(client, "Mix", _items(["1"]))
+
+    assert client.calls == ["delete:101", "create:1"]
+
+
+def test_sync_state_path_sits_next_to_config() -> None:
+    assert sync_state_path("/etc/plex/config.json") == "/etc/plex/config.state.json"
+
+
+def test_append_mode_adds_every_chunk_to_existing_playlist() -> None:
+    client = FakePlaylistClient()
+    client.create_playlist("Mix", ["0"])
+    client.calls.clear()
+
+    sync_playlist(client, "Mix", _items(["1", "2", "3"]), mode="append", chunk_size=2)
+
+    assert client.calls == ["add:2", "add:1"]
+    assert client._items == ["0", "1", "2", "3"]
+
+
+def test_save_sync_state_never_leaves_a_partial_file(tmp_path, monkeypatch) -> None:
+    state_path = tmp_path / "config.state.json"
+    save_sync_state(str(state_path), {"Mix": {"digest": "a"}})
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    save_sync_state(str(state_path), {"Mix": {"digest": "b"}})
+
+    assert load_sync_state(str(state_path)) == {"Mix": {"digest": "a"}}
+    assert [path.name for path in tmp_path.iterdir()] == ["config.state.json"]
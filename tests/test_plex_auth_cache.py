@@ -0,0 +1,153 @@
+import json
+from email.message import Message
+
+import pytest
+
+import plex_shuffler.plex_auth as plex_auth
+from plex_shuffler.http_pool import ConnectionPool, PooledResponse
+from plex_shuffler.plex_auth import PlexAuthError, check_pin, clear_auth_cache, fetch_resources, fetch_user
+
+DEVICE = dict(product="P", platform="Web", device="Browser", device_name="P", version="1")
+
+
+@pytest.fixture
+def plex_tv(monkeypatch):
+    monkeypatch.setattr(plex_auth, "_AUTH_CACHE", {})
+    monkeypatch.setattr(plex_auth, "_CLAIMED_PINS", {})
+    monkeypatch.setattr(plex_auth, "_auth_cache_loaded", False)
+    state = {"calls": [], "status": 200, "pin_token": None}
+
+    def fake_request(self, method, url, headers=None):
+        state["calls"].append(url.split("?")[0])
+        if state["status"] != 200:
+            return PooledResponse(status=state["status"], headers=Message(), body=b"unauthorized")
+        if "/resources" in url:
+            payload = state.get("resources", [{"name": "Server", "provides": "server"}])
+        elif "/pins/" in url:
+            payload = {"id": 7, "code": "ABCD", "expiresAt": "soon", "authToken": state["pin_token"]}
+        else:
+            payload = state.get("user", {"username": "alice"})
+        return PooledResponse(status=200, headers=Message(), body=json.dumps(payload).encode("utf-8"))
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+    return state
+
+
+def test_fetch_user_and_resources_are_cached_across_restarts(plex_tv, isolated_cache_dir, monkeypatch) -> None:
+    assert fetch_user(token="tok", client_id="c", **DEVICE) == {"username": "alice"}
+    assert fetch_user(token="tok", client_id="c", **DEVICE) == {"username": "alice"}
+    fetch_resources(token="tok", client_id="c", **DEVICE)
+    fetch_resources(token="tok", client_id="c", **DEVICE)
+    assert len(plex_tv["calls"]) == 2
+
+    # A fresh process reloads the cache from disk; the raw token is never persisted.
+    assert "tok" not in (isolated_cache_dir / "plex_auth.json").read_text()
+    monkeypatch.setattr(plex_auth, "_AUTH_CACHE", {})
+    monkeypatch.setattr(plex_auth, "_auth_cache_loaded", False)
+    fetch_user(token="tok", client_id="c", **DEVICE)
+    assert len(plex_tv["calls"]) == 2
+
+    fetch_user(token="other", client_id="c", **DEVICE)
+    assert len(plex_tv["calls"]) == 3
+
+
+def test_cached_payloads_never_hold_tokens(plex_tv, isolated_cache_dir, monkeypatch) -> None:
+    plex_tv["user"] = {"username": "alice", "authToken": "user-secret"}
+    plex_tv["resources"] = [
+        {
+            "name": "Server",
+            "provides": "server",
+            "accessToken": "server-secret",
+            "connections": [{"uri": "https://a", "transientToken": "conn-secret"}],
+        }
+    ]
+
+    assert fetch_user(token="tok", client_id="c", **DEVICE) == {"username": "alice"}
+    resources = fetch_resources(token="tok", client_id="c", **DEVICE)
+    assert resources == [{"name": "Server", "provides": "server", "connections": [{"uri": "https://a"}]}]
+    assert "secret" not in (isolated_cache_dir / "plex_auth.json").read_text()
+
+    # Cache files written by older versions are scrubbed when loaded.
+    (isolated_cache_dir / "plex_auth.json").write_text(
+        json.dumps([["user", plex_auth._token_digest("tok"), "c", 4e9, {"username": "a", "authToken": "old-secret"}]])
+    )
+    monkeypatch.setattr(plex_auth, "_AUTH_CACHE", {})
+    monkeypatch.setattr(plex_auth, "_auth_cache_loaded", False)
+    assert fetch_user(token="tok", client_id="c", **DEVICE) == {"username": "a"}
+    assert "secret" not in (isolated_cache_dir / "plex_auth.json").read_text()
+
+
+def test_expired_entries_are_refetched(plex_tv, monkeypatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr(plex_auth.time, "time", lambda: clock[0])
+
+    fetch_resources(token="tok", client_id="c", **DEVICE)
+    clock[0] += plex_auth.RESOURCES_CACHE_TTL + 1
+    fetch_resources(token="tok", client_id="c", **DEVICE)
+
+    assert len(plex_tv["calls"]) == 2
+
+
+def test_unauthorized_response_invalidates_token(plex_tv) -> None:
+    fetch_user(token="tok", client_id="c", **DEVICE)
+    plex_auth._cache_put("user", "tok", "c", {"username": "alice"}, ttl=-1)  # force a refetch
+    plex_tv["status"] = 401
+
+    with pytest.raises(PlexAuthError) as excinfo:
+        fetch_user(token="tok", client_id="c", **DEVICE)
+
+    assert excinfo.value.status == 401
+    assert plex_auth._AUTH_CACHE == {}
+
+
+def test_claimed_pin_is_not_polled_again(plex_tv) -> None:
+    assert check_pin(pin_id=7, client_id="c", **DEVICE).auth_token is None
+    plex_tv["pin_token"] = "secret"
+    assert check_pin(pin_id=7, client_id="c", **DEVICE).auth_token == "secret"
+    assert check_pin(pin_id=7, client_id="c", **DEVICE).auth_token == "secret"
+
+    assert plex_tv["calls"].count(f"{plex_auth.PLEX_PIN_URL}/7") == 2
+
+
+def test_claimed_pins_expire_and_are_bounded(plex_tv, monkeypatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr(plex_auth.time, "time", lambda: clock[0])
+    monkeypatch.setattr(plex_auth, "CLAIMED_PIN_CACHE_SIZE", 2)
+    plex_tv["pin_token"] = "secret"
+
+    for pin_id in (1, 2, 3):
+        check_pin(pin_id=pin_id, client_id="c", **DEVICE)
+    assert list(plex_auth._CLAIMED_PINS) == [(2, "c"), (3, "c")]
+
+    clock[0] += plex_auth.CLAIMED_PIN_TTL + 1
+    check_pin(pin_id=3, client_id="c", **DEVICE)
+    assert plex_tv["calls"].count(f"{plex_auth.PLEX_PIN_URL}/3") == 2
+    assert list(plex_auth._CLAIMED_PINS) == [(3, "c")]
+
+
+def test_clear_auth_cache_for_one_token_keeps_the_others(plex_tv, isolated_cache_dir) -> None:
+    fetch_resources(token="tok", client_id="c", **DEVICE)
+    fetch_resources(token="other", client_id="c", **DEVICE)
+
+    clear_auth_cache("tok")
+    fetch_resources(token="tok", client_id="c", **DEVICE)
+    fetch_resources(token="other", client_id="c", **DEVICE)
+    assert len(plex_tv["calls"]) == 3
+
+    clear_auth_cache()
+    fetch_resources(token="other", client_id="c", **DEVICE)
+    assert len(plex_tv["calls"]) == 4
+    assert json.loads((isolated_cache_dir / "plex_auth.json").read_text())[0][1] == plex_auth._token_digest("other")
+
+
+def test_request_json_accepts_bom_and_rejects_invalid_bytes(monkeypatch) -> None:
+    bodies = iter([b'\xef\xbb\xbf{"id": 1}', b"\xff\xfe\xfa not json"])
+    monkeypatch.setattr(
+        ConnectionPool,
+        "request",
+        lambda self, method, url, headers=None: PooledResponse(status=200, headers=Message(), body=next(bodies)),
+    )
+
+    assert plex_auth._request_json("https://plex.tv/api/v2/x", headers={}) == {"id": 1}
+    with pytest.raises(PlexAuthError, match="Invalid Plex auth response"):
+        plex_auth._request_json("https://plex.tv/api/v2/x", headers={})
@@ -0,0 +1,74 @@
+import json
+from email.message import Message
+from urllib.parse import unquote
+
+import pytest
+
+import plex_shuffler.plex_client as plex_client
+from plex_shuffler.http_pool import ConnectionPool, PooledResponse
+from plex_shuffler.plex_client import PlexClient, PlexError
+
+
+@pytest.fixture
+def cache_dir(isolated_cache_dir, monkeypatch):
+    monkeypatch.setattr(plex_client, "_MACHINE_IDS", {})
+    isolated_cache_dir.mkdir()
+    return isolated_cache_dir
+
+
+def _install_fake_server(
+    monkeypatch,
+    machine_id: str,
+    calls: list[str],
+    reject_ids: frozenset[str] = frozenset(),
+    reject_status: int = 400,
+):
+    def fake_request(self, method, url, headers=None):
+        calls.append(f"{method} {url.split('?')[0]}")
+        if url.endswith("/identity"):
+            body = f'<MediaContainer machineIdentifier="{machine_id}" />'
+        elif any(f"server://{bad}/" in unquote(url) for bad in reject_ids):
+            return PooledResponse(status=reject_status, headers=Message(), body=b"bad uri")
+        else:
+            body = '<MediaContainer><Playlist ratingKey="9" title="Mix" /></MediaContainer>'
+        return PooledResponse(status=200, headers=Message(), body=body.encode("utf-8"))
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+
+
+def test_machine_identifier_is_persisted_across_clients(cache_dir, monkeypatch) -> None:
+    calls: list[str] = []
+    _install_fake_server(monkeypatch, "abc", calls)
+
+    PlexClient(base_url="http://plex", token="t").create_playlist("Mix", ["1"])
+    monkeypatch.setattr(plex_client, "_MACHINE_IDS", {})  # simulate a fresh process
+    PlexClient(base_url="http://plex", token="t").create_playlist("Mix", ["2"])
+
+    assert calls.count("GET http://plex/identity") == 1
+    assert json.loads((cache_dir / "machine_ids.json").read_text()) == {"http://plex": "abc"}
+
+
+def test_stale_cached_identifier_is_refreshed(cache_dir, monkeypatch) -> None:
+    (cache_dir / "machine_ids.json").write_text(json.dumps({"http://plex": "old"}))
+    calls: list[str] = []
+    _install_fake_server(monkeypatch, "new", calls, reject_ids={"old"})
+
+    playlist = PlexClient(base_url="http://plex", token="t").create_playlist("Mix", ["1"])
+
+    assert playlist.rating_key == "9"
+    assert calls == ["POST http://plex/playlists", "GET http://plex/identity", "POST http://plex/playlists"]
+    assert json.loads((cache_dir / "machine_ids.json").read_text()) == {"http://plex": "new"}
+
+
+@pytest.mark.parametrize("reject_status", [500, 503])
+def test_create_playlist_is_not_retried_after_server_errors(cache_dir, monkeypatch, reject_status) -> None:
+    (cache_dir / "machine_ids.json").write_text(json.dumps({"http://plex": "old"}))
+    calls: list[str] = []
+    _install_fake_server(monkeypatch, "new", calls, reject_ids={"old"}, reject_status=reject_status)
+
+    with pytest.raises(PlexError) as excinfo:
+        PlexClient(base_url="http://plex", token="t").create_playlist("Mix", ["1"])
+
+    # The server may already have created the playlist: a second POST could duplicate it.
+    assert excinfo.value.status == reject_status
+    assert calls == ["POST http://plex/playlists"]
@@ -1,10 +1,13 @@
-import io
-from types import SimpleNamespace
+from email.message import Message
+from urllib.parse import unquote
 
 import pytest
 
+from plex_shuffler.http_pool import ConnectionPool, PooledResponse
+from plex_shuffler.models import MediaItem
+from plex_shuffler.playlist import sync_playlist
 import plex_shuffler.plex_client as plex_client
-from plex_shuffler.plex_client import PlexClient
+from plex_shuffler.plex_client import PlexClient, PlexError
 
 
 def _xml_container(total_size: int, entries: list[str]) -> bytes:
@@ -16,18 +19,8 @@ def _xml_container(total_size: int, entries: list[str]) -> bytes:
     return "".join(parts).encode("utf-8")
 
 
-class _FakeResponse:
-    def __init__(self, payload: bytes):
-        self._payload = payload
-
-    def read(self) -> bytes:
-        return self._payload
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc, tb):
-        return False
+def _response(payload: bytes, status: int = 200) -> PooledResponse:
+    return PooledResponse(status=status, headers=Message(), body=payload)
 
 
 def test_get_movies_paginates(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -47,15 +40,15 @@ def test_get_movies_paginates(monkeypatch: pytest.MonkeyPatch) -> None:
         ],
     )
 
-    def fake_urlopen(request, timeout=0):
-        calls.append(request.full_url)
-        if "X-Plex-Container-Start=0" in request.full_url:
-            return _FakeResponse(page1)
-        if "X-Plex-Container-Start=2" in request.full_url:
-            return _FakeResponse(page2)
-        raise AssertionError(f"Unexpected URL: {request.full_url}")
+    def fake_request(self, method, url, headers=None):
+        calls.append(url)
+        if "X-Plex-Container-Start=0" in url:
+            return _response(page1)
+        if "X-Plex-Container-Start=2" in url:
+            return _response(page2)
+        raise AssertionError(f"Unexpected URL: {url}")
 
-    monkeypatch.setattr(plex_client, "urlopen", fake_urlopen)
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
 
     client = PlexClient(base_url="http://example", token="t")
     movies = client.get_movies("1")
@@ -70,12 +63,12 @@ def test_client_identifier_header(monkeypatch: pytest.MonkeyPatch) -> None:
 
     payload = _xml_container(0, [])
 
-    def fake_urlopen(request, timeout=0):
+    def fake_request(self, method, url, headers=None):
         nonlocal seen_headers
-        seen_headers = dict(request.header_items())
-        return _FakeResponse(payload)
+        seen_headers = dict(headers or {})
+        return _response(payload)
 
-    monkeypatch.setattr(plex_client, "urlopen", fake_urlopen)
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
 
     client = PlexClient(
         base_url="http://example",
@@ -86,3 +79,217 @@ def test_client_identifier_header(monkeypatch: pytest.MonkeyPatch) -> None:
 
     normalized = {str(k).lower(): v for k, v in seen_headers.items()}
     assert normalized.get("x-plex-client-identifier") == "my-client-id"
+
+
+def test_show_episodes_stream_across_small_parse_chunks(monkeypatch: pytest.MonkeyPatch) -> None:
+    media = '<Media id="1"><Part id="2" file="/x.mkv"><Stream id="3" /></Part></Media>'
+    page = _xml_container(
+        4,
+        [
+            f'<Video type="episode" ratingKey="e1" title="One" grandparentRatingKey="s1">{media}</Video>',
+            '<Directory type="season" ratingKey="x" />',
+            f'<Video type="episode" ratingKey="e2" title="Two">{media}</Video>',
+            '<Video type="clip" ratingKey="c1" title="Clip" />',
+        ],
+    )
+    monkeypatch.setattr(plex_client, "_PARSE_CHUNK_SIZE", 7)
+    monkeypatch.setattr(ConnectionPool, "request", lambda self, method, url, headers=None: _response(page))
+
+    episodes = PlexClient(base_url="http://example", token="t").get_show_episodes("s1")
+
+    assert [(e.rating_key, e.show_rating_key) for e in episodes] == [("e1", "s1"), ("e2", None)]
+
+
+def test_streamed_pages_report_invalid_xml(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        ConnectionPool, "request", lambda self, method, url, headers=None: _response(b"<MediaContainer><Video")
+    )
+
+    with pytest.raises(PlexError, match="Invalid Plex API response"):
+        PlexClient(base_url="http://example", token="t").get_movies("1")
+
+
+def test_get_episodes_bulk_keeps_input_order_and_skips_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_request(self, method, url, headers=None):
+        show_key = url.split("/library/metadata/", 1)[1].split("/", 1)[0]
+        if show_key == "bad":
+            return _response(b"nope", status=500)
+        return _response(_xml_container(1, [f'<Video type="episode" ratingKey="{show_key}-e1" title="E" />']))
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+
+    client = PlexClient(base_url="http://example", token="t")
+    by_show = client.get_episodes_bulk(["s3", "bad", "s1", "s2", "s1"], max_workers=3)
+
+    assert list(by_show) == ["s3", "s1", "s2"]
+    assert [e.rating_key for e in by_show["s1"]] == ["s1-e1"]
+
+
+def test_filter_options_read_directory_and_tag_children(monkeypatch: pytest.MonkeyPatch) -> None:
+    payload = (
+        b'<MediaContainer><Directory title="drama" /><Tag tag="Action" /><Directory title="drama" />'
+        b'<Hub title="ignored"><Directory title="nested" /></Hub><Tag name="comedy" /></MediaContainer>'
+    )
+    seen: list[str] = []
+
+    def fake_request(self, method, url, headers=None):
+        seen.append(url)
+        return _response(payload)
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+
+    client = PlexClient(base_url="http://example", token="t")
+    options = client.get_filter_options("1", "genre", media_type=" TV ")
+
+    assert options == ["Action", "comedy", "drama"]
+    assert seen == ["http://example/library/sections/1/genre?type=2"]
+
+
+def test_conditional_get_reuses_cached_body_on_304(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(plex_client, "_ETAG_CACHE", plex_client.OrderedDict())
+    monkeypatch.setattr(plex_client, "_etag_cache_bytes", 0)
+    payload = b'<MediaContainer><Directory key="1" title="TV" type="show" /></MediaContainer>'
+    seen: list[str | None] = []
+
+    def fake_request(self, method, url, headers=None):
+        etag = (headers or {}).get("If-None-Match")
+        seen.append(etag)
+        if etag == '"v1"':
+            return _response(b"", status=304)
+        message = Message()
+        message["ETag"] = '"v1"'
+        return PooledResponse(status=200, headers=message, body=payload)
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+
+    first = PlexClient(base_url="http://example", token="t").get_sections()
+    second = PlexClient(base_url="http://example", token="t").get_sections()
+    other_token = PlexClient(base_url="http://example", token="u").get_sections()
+
+    assert first == second == other_token
+    assert seen == [None, '"v1"', None]
+
+
+def test_conditional_cache_skips_listings_and_is_bounded_by_bytes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(plex_client, "_ETAG_CACHE", plex_client.OrderedDict())
+    monkeypatch.setattr(plex_client, "_etag_cache_bytes", 0)
+    monkeypatch.setattr(plex_client, "ETAG_CACHE_MAX_BYTES", 150)
+    sent: list[str | None] = []
+
+    def fake_request(self, method, url, headers=None):
+        sent.append((headers or {}).get("If-None-Match"))
+        message = Message()
+        message["ETag"] = '"v1"'
+        if "/genre" in url:
+            body = b'<MediaContainer><Directory title="' + url.rsplit("/", 2)[-2].encode() + b'" /></MediaContainer>'
+        else:
+            body = b'<MediaContainer size="1" totalSize="1"><Video type="episode" ratingKey="1" /></MediaContainer>'
+        return PooledResponse(status=200, headers=message, body=body)
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+    client = PlexClient(base_url="http://example", token="t")
+
+    client.get_show_episodes("9")
+    client.get_show_episodes("9")
+    assert sent == [None, None]
+    assert not plex_client._ETAG_CACHE
+
+    for section in ("1", "2", "3"):
+        client.get_section_facet_values(section, "genre")
+    # Each body is about 60 bytes: the oldest entry is evicted to stay within 150.
+    assert [url.split("/")[-2] for _, url in plex_client._ETAG_CACHE] == ["2", "3"]
+    assert plex_client._etag_cache_bytes == sum(len(body) for _, body in plex_client._ETAG_CACHE.values())
+
+
+def test_playlist_writes_are_batched(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(plex_client, "PLAYLIST_URI_BATCH_SIZE", 2)
+    calls: list[tuple[str, str]] = []
+
+    def fake_request(self, method, url, headers=None):
+        calls.append((method, unquote(url).rsplit("/metadata/", 1)[-1].split("&", 1)[0]))
+        if url.endswith("/identity"):
+            return _response(b'<MediaContainer machineIdentifier="abc" />')
+        return _response(b'<MediaContainer><Playlist ratingKey="9" title="Mix" /></MediaContainer>')
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+    monkeypatch.setattr(plex_client, "_MACHINE_IDS", {"http://example": "abc"})
+
+    client = PlexClient(base_url="http://example", token="t")
+    client.create_playlist("Mix", ["1", "2", "3", "4", "5"])
+
+    assert calls == [("POST", "1,2"), ("PUT", "3,4"), ("PUT", "5")]
+
+
+def test_section_lookup_reuses_cached_list_until_miss(monkeypatch: pytest.MonkeyPatch) -> None:
+    payloads = [
+        b'<MediaContainer><Directory key="1" title="TV Shows" type="show" /></MediaContainer>',
+        b'<MediaContainer><Directory key="1" title="TV Shows" type="show" />'
+        b'<Directory key="2" title="Movies" type="movie" /></MediaContainer>',
+    ]
+    calls: list[str] = []
+
+    def fake_request(self, method, url, headers=None):
+        calls.append(url)
+        return _response(payloads[min(len(calls), len(payloads)) - 1])
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+
+    client = PlexClient(base_url="http://example", token="t")
+    assert client.get_section_by_title(" tv shows ").key == "1"
+    assert client.get_section_by_title("TV Shows").key == "1"
+    assert len(calls) == 1
+    assert client.get_section_by_title("Movies").key == "2"
+    assert len(calls) == 2
+
+    client.invalidate_sections()
+    client.get_section_by_title("Movies")
+    assert len(calls) == 3
+    with pytest.raises(PlexError, match="Library section not found"):
+        client.get_section_by_title("Music")
+
+
+def test_get_collections_falls_back_to_typed_listing(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    def fake_request(self, method, url, headers=None):
+        calls.append(url.split("?", 1)[0])
+        if "/collections" in url:
+            return _response(b"gone", status=404)
+        return _response(
+            _xml_container(
+                2,
+                [
+                    '<Directory type="collection" ratingKey="c1" title="Heists" />',
+                    '<Directory type="genre" ratingKey="g1" title="Drama" />',
+                ],
+            )
+        )
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+
+    collections = PlexClient(base_url="http://example", token="t").get_collections("1")
+
+    assert [(c.rating_key, c.title) for c in collections] == [("c1", "Heists")]
+    assert calls == ["http://example/library/sections/1/collections", "http://example/library/sections/1/all"]
+
+
+def test_chunked_sync_resolves_machine_identifier_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    paths: list[str] = []
+
+    def fake_request(self, method, url, headers=None):
+        paths.append(url.split("?", 1)[0].rsplit("/", 1)[-1])
+        if url.endswith("/identity"):
+            return _response(b'<MediaContainer machineIdentifier="abc" />')
+        if method == "GET":
+            return _response(b"<MediaContainer />")
+        return _response(b'<MediaContainer><Playlist ratingKey="9" title="Mix" /></MediaContainer>')
+
+    monkeypatch.setattr(ConnectionPool, "request", fake_request)
+    monkeypatch.setattr(plex_client, "_MACHINE_IDS", {})
+
+    client = PlexClient(base_url="http://example", token="t")
+    items = [MediaItem(rating_key=str(key), title=str(key), type="episode") for key in range(7)]
+    sync_playlist(client, "Mix", items, chunk_size=2)
+
+    assert paths.count("identity") == 1
+    assert paths.count("items") == 3
@@ -8,63 +8,28 @@ from plex_shuffler.query_builder import (
     serialize_query_state,
 )
 
+# (query, expected builder clauses as (field, op, values)); an empty query has no groups.
+PARSE_CASES = [
+    ("", []),
+    ("genre=Animation&genre=Comedy", [("genre", "eq", ["Animation", "Comedy"])]),
+    ("  genre=Animation  &  year=2020  ", [("genre", "eq", ["Animation"]), ("year", "eq", ["2020"])]),
+    ("title=Kung Fu", [("title", "contains", ["Kung Fu"])]),
+    ("year>=2010&year<=2020", [("year", "gte", ["2010"]), ("year", "lte", ["2020"])]),
+    (
+        "year=2001&year>=2010&year >=2012&year=2002",
+        [("year", "eq", ["2001", "2002"]), ("year", "gte", ["2010", "2012"])],
+    ),
+]
 
-class QueryBuilderTests(unittest.TestCase):
-    def test_parse_empty_query_returns_builder(self):
-        state = parse_query_string("")
-        self.assertEqual(state.mode, "builder")
-        self.assertEqual(state.groups, [])
-        self.assertEqual(state.advanced_query, "")
-
-    def test_parse_repeated_keys_to_values(self):
-        state = parse_query_string("genre=Animation&genre=Comedy")
-        self.assertEqual(state.mode, "builder")
-        self.assertEqual(len(state.groups), 1)
-        clause = state.groups[0].clauses[0]
-        self.assertEqual(clause.field, "genre")
-        self.assertEqual(clause.op, "eq")
-        self.assertEqual(clause.values, ["Animation", "Comedy"])
-
-    def test_serialize_builder_repeats_keys(self):
-        state = QueryState(
-            mode="builder",
-            groups=[Group(clauses=[Clause(field="genre", op="eq", values=["Animation", "Comedy"])])],
-            advanced_query="",
-        )
-        self.assertEqual(serialize_query_state(state), "genre=Animation&genre=Comedy")
-
-    def test_serialize_advanced_trims_whitespace(self):
-        state = QueryState(mode="advanced", groups=[], advanced_query="  genre=Animation  ")
-        self.assertEqual(serialize_query_state(state), "genre=Animation")
-
-    def test_parse_trims_keys_and_values(self):
-        state = parse_query_string("  genre=Animation  &  year=2020  ")
-        clause_genre = state.groups[0].clauses[0]
-        clause_year = state.groups[0].clauses[1]
-        self.assertEqual(clause_genre.field, "genre")
-        self.assertEqual(clause_genre.values, ["Animation"])
-        self.assertEqual(clause_year.field, "year")
-        self.assertEqual(clause_year.values, ["2020"])
-
-    def test_parse_title_defaults_contains(self):
-        state = parse_query_string("title=Kung Fu")
-        clause = state.groups[0].clauses[0]
-        self.assertEqual(clause.field, "title")
-        self.assertEqual(clause.op, "contains")
-
-    def test_parse_year_range_ops(self):
-        state = parse_query_string("year>=2010&year<=2020")
-        clauses = state.groups[0].clauses
-        self.assertEqual(clauses[0].field, "year")
-        self.assertEqual(clauses[0].op, "gte")
-        self.assertEqual(clauses[0].values, ["2010"])
-        self.assertEqual(clauses[1].field, "year")
-        self.assertEqual(clauses[1].op, "lte")
-        self.assertEqual(clauses[1].values, ["2020"])
-
-    def test_serialize_year_range_ops(self):
-        state = QueryState(
-            mode="builder",
+# (state, expected query string)
+SERIALIZE_CASES = [
+    (
+        QueryState(groups=[Group(clauses=[Clause(field="genre", op="eq", values=["Animation", "Comedy"])])]),
+        "genre=Animation&genre=Comedy",
+    ),
+    (QueryState(mode="advanced", groups=[], advanced_query="  genre=Animation  "), "genre=Animation"),
+    (
+        QueryState(
             groups=[
                 Group(
                     clauses=[
@@ -72,14 +37,32 @@ class QueryBuilderTests(unittest.TestCase):
                         Clause(field="year", op="lte", values=["2020"]),
                     ]
                 )
-            ],
-            advanced_query="",
-        )
-        self.assertEqual(serialize_query_state(state), "year%3E=2010&year%3C=2020")
+            ]
+        ),
+        "year%3E=2010&year%3C=2020",
+    ),
+    (parse_query_string("genre=Animation&year=2020&genre=Comedy"), "genre=Animation&genre=Comedy&year=2020"),
+]
+
+
+class QueryBuilderTests(unittest.TestCase):
+    def test_parse_table(self):
+        for query, expected in PARSE_CASES:
+            with self.subTest(query=query):
+                state = parse_query_string(query)
+                self.assertEqual(state.mode, "builder")
+                self.assertEqual(state.advanced_query, "")
+                if not expected:
+                    self.assertEqual(state.groups, [])
+                    continue
+                self.assertEqual(len(state.groups), 1)
+                clauses = [(clause.field, clause.op, clause.values) for clause in state.groups[0].clauses]
+                self.assertEqual(clauses, expected)
 
-    def test_parse_interleaved_duplicates_uses_first_seen_order(self):
-        state = parse_query_string("genre=Animation&year=2020&genre=Comedy")
-        self.assertEqual(serialize_query_state(state), "genre=Animation&genre=Comedy&year=2020")
+    def test_serialize_table(self):
+        for state, expected in SERIALIZE_CASES:
+            with self.subTest(expected=expected):
+                self.assertEqual(serialize_query_state(state), expected)
 
     def test_parse_strict_unknown_field_forces_advanced(self):
         state = parse_query_string("unknown=1", known_fields={"genre"}, strict=True)
@@ -5,7 +5,13 @@ from plex_shuffler.shuffle import interleave_movies, shuffle_groups
 
 
 def _episode(show: str, index: int) -> MediaItem:
-    return MediaItem(rating_key=f"{show}-{index}", title=f"{show} ep {index}", type="episode", show_title=show)
+    return MediaItem(
+        rating_key=f"{show}-{index}",
+        title=f"{show} ep {index}",
+        type="episode",
+        show_title=show,
+        episode_index=index,
+    )
 
 
 def _movie(title: str) -> MediaItem:
@@ -23,9 +29,9 @@ def test_shuffle_groups_round_robin_preserves_per_group_order() -> None:
     out = shuffle_groups(groups, rng=rng, strategy="round_robin", chunk_size=1)
 
     # Within each show, episode order must remain sequential.
-    by_show: dict[str, list[int]] = {"A": [], "B": [], "C": []}
+    by_show: dict[str, list[int | None]] = {"A": [], "B": [], "C": []}
     for item in out:
-        by_show[item.show_title].append(int(item.rating_key.split("-")[-1]))
+        by_show[item.show_title].append(item.episode_index)
 
     assert by_show["A"] == [1, 2, 3]
     assert by_show["B"] == [1, 2]
@@ -68,9 +74,9 @@ def test_shuffle_groups_random_preserves_per_group_order() -> None:
     out = shuffle_groups(groups, rng=rng, strategy="random", chunk_size=1)
 
     # It can pick groups in any order, but each group is still FIFO.
-    by_show: dict[str, list[int]] = {"A": [], "B": [], "C": []}
+    by_show: dict[str, list[int | None]] = {"A": [], "B": [], "C": []}
     for item in out:
-        by_show[item.show_title].append(int(item.rating_key.split("-")[-1]))
+        by_show[item.show_title].append(item.episode_index)
 
     assert by_show["A"] == [1, 2]
     assert by_show["B"] == [1, 2]
@@ -103,3 +109,39 @@ def test_interleave_movies_noop_when_every_invalid() -> None:
 
     assert interleave_movies(episodes, movies, every_episodes=0) == episodes
     assert interleave_movies(episodes, movies, every_episodes=-1) == episodes
+
+
+def test_interleave_movies_stops_at_max_items() -> None:
+    episodes = [_episode("S", i) for i in range(1, 7)]
+    movies = [_movie("M1"), _movie("M2")]
+
+    out = interleave_movies(episodes, movies, every_episodes=2, max_items=5)
+
+    assert [item.title for item in out] == ["S ep 1", "S ep 2", "M1", "S ep 3", "S ep 4"]
+    assert interleave_movies(episodes, movies, every_episodes=0, max_items=3) == episodes[:3]
+
+
+def test_shuffle_groups_leave_input_groups_untouched() -> None:
+    groups = [
+        MediaGroup("A", [_episode("A", 1), _episode("A", 2)], "tv"),
+        MediaGroup("B", [_episode("B", 1)], "tv"),
+    ]
+
+    for strategy in ("rounds", "round_robin", "random"):
+        out = shuffle_groups(groups, rng=random.Random(7), strategy=strategy, chunk_size=2)
+        assert sorted(item.rating_key for item in out) == ["A-1", "A-2", "B-1"]
+
+    assert [len(group.items) for group in groups] == [2, 1]
+
+
+def test_shuffle_groups_random_keeps_group_order_and_seeded_sequence() -> None:
+    groups = [
+        MediaGroup("A", [_episode("A", i) for i in range(1, 5)], "tv"),
+        MediaGroup("B", [_episode("B", i) for i in range(1, 3)], "tv"),
+        MediaGroup("C", [_episode("C", 1)], "tv"),
+    ]
+
+    out = [item.rating_key for item in shuffle_groups(groups, rng=random.Random(5), strategy="random")]
+
+    assert [key for key in out if key.startswith("A")] == ["A-1", "A-2", "A-3", "A-4"]
+    assert out == [item.rating_key for item in shuffle_groups(groups, rng=random.Random(5), strategy="random")]
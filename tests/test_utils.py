@@ -0,0 +1,57 @@
+import datetime as dt
+from urllib.parse import parse_qsl
+
+from plex_shuffler.utils import (
+    chunked,
+    clamp_items,
+    cutoff_from_days,
+    normalize_title,
+    parse_query_string,
+)
+
+
+def test_parse_query_string_matches_parse_qsl() -> None:
+    queries = [
+        "",
+        "genre=Comedy",
+        "genre=Comedy&&year>=2010&unwatched",
+        "title=Kung+Fu&studio=A%26E&label=",
+        "bad=%zz&semi=a;b&=empty-key&k==v",
+        "name=%C3%A9t%C3%A9",
+    ]
+    for query in queries:
+        assert list(parse_query_string(query)) == parse_qsl(query, keep_blank_values=True), query
+
+
+def test_chunked_lists_and_iterables_agree() -> None:
+    items = list(range(7))
+
+    assert list(chunked(items, 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked(iter(items), 3)) == list(chunked(items, 3))
+    assert list(chunked(tuple(items), 3)) == list(chunked(items, 3))
+    assert list(chunked(items, 0)) == [items]
+    assert list(chunked([], 3)) == []
+
+
+def test_clamp_items_treats_non_positive_limits_as_unlimited() -> None:
+    items = [1, 2, 3]
+
+    assert clamp_items(items, 2) == [1, 2]
+    assert clamp_items(items, 3) is items
+    assert clamp_items(items, 0) is items
+    assert clamp_items(items, None) is items
+
+
+def test_cutoff_from_days_handles_int_and_fractional_days() -> None:
+    now = dt.datetime(2026, 1, 10, tzinfo=dt.timezone.utc)
+
+    assert cutoff_from_days(7, now) == dt.datetime(2026, 1, 3, tzinfo=dt.timezone.utc)
+    assert cutoff_from_days(0.5, now) == dt.datetime(2026, 1, 9, 12, tzinfo=dt.timezone.utc)
+    assert cutoff_from_days(0, now) is None
+    assert cutoff_from_days(None, now) is None
+
+
+def test_normalize_title_trims_and_lowercases_unicode() -> None:
+    assert normalize_title("  The Office (US) ") == "the office (us)"
+    assert normalize_title("\tAMÉLIE\n") == "amélie"
+    assert normalize_title("Ærø TV") == "ærø tv"
@@ -1,6 +1,24 @@
+import gzip
+import json
+import logging
+import tempfile
+import threading
 import unittest
+from concurrent.futures import Future
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs
 
 from plex_shuffler.config import apply_plex_overrides
+from plex_shuffler.plex_client import PlexClient
+from plex_shuffler import web_server
+from plex_shuffler.web_server import (
+    WebApp,
+    _accepts_gzip,
+    _normalize_facet_values,
+    _pick_preferred_connection,
+    _query_values,
+)
 
 
 class ApplyPlexOverridesTests(unittest.TestCase):
@@ -20,5 +38,294 @@ class ApplyPlexOverridesTests(unittest.TestCase):
         self.assertEqual(config["plex"]["url"], "https://plex.local")
 
 
+class ConfigForApiTests(unittest.TestCase):
+    def test_hides_token_and_attaches_query_state_on_fresh_copies(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "config.json"
+            config_path.write_text(
+                json.dumps(
+                    {
+                        "plex": {"url": "http://example.com", "token": "secret"},
+                        "playlists": [{"name": "Mix", "tv": {"query": "genre=Comedy"}}],
+                    }
+                ),
+                encoding="utf-8",
+            )
+            app = WebApp(config_path=str(config_path), web_root=temp_dir)
+
+            first = app.get_config_for_api()
+            first["playlists"][0]["name"] = "changed"
+            second = app.get_config_for_api()
+
+            self.assertEqual(second["plex"]["token"], "")
+            self.assertEqual(second["playlists"][0]["name"], "Mix")
+            self.assertIn("query_state", second["playlists"][0]["tv"])
+            self.assertEqual(app.load_config_raw()["plex"]["token"], "secret")
+
+    def test_config_response_is_reused_until_saved(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "config.json"
+            config_path.write_text(json.dumps({"plex": {"token": "secret"}, "playlists": []}), encoding="utf-8")
+            app = WebApp(config_path=str(config_path), web_root=temp_dir)
+
+            first, etag = app.get_config_response()
+            self.assertIs(app.get_config_response()[0], first)
+            self.assertTrue(etag.startswith('"'))
+            payload = json.loads(first)
+            self.assertTrue(payload["meta"]["token_set"])
+            self.assertEqual(payload["config"]["plex"]["token"], "")
+
+            config = app.load_config_raw()
+            config["plex"]["token"] = ""
+            app.save_config_raw(config)
+
+            data, new_etag = app.get_config_response()
+            self.assertFalse(json.loads(data)["meta"]["token_set"])
+            self.assertNotEqual(new_etag, etag)
+
+    def test_query_state_is_rebuilt_only_when_the_config_changes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "config.json"
+            config_path.write_text(
+                json.dumps({"playlists": [{"name": "Mix", "tv": {"query": "genre=Comedy"}}]}), encoding="utf-8"
+            )
+            app = WebApp(config_path=str(config_path), web_root=temp_dir)
+
+            with mock.patch.object(web_server, "_attach_query_state", wraps=web_server._attach_query_state) as attach:
+                app.get_config_response()
+                app.get_config_response()
+                self.assertEqual(attach.call_count, 1)
+
+                config = app.load_config_raw()
+                config["playlists"][0]["tv"]["query"] = "genre=Drama"
+                app.save_config_raw(config)
+                data, _ = app.get_config_response()
+
+            self.assertEqual(attach.call_count, 2)
+            self.assertEqual(json.loads(data)["config"]["playlists"][0]["tv"]["query"], "genre=Drama")
+
+    def test_load_config_reuses_parsed_config_until_saved(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "config.json"
+            config_path.write_text(json.dumps({"plex": {"token": "a"}, "playlists": []}), encoding="utf-8")
+            app = WebApp(config_path=str(config_path), web_root=temp_dir)
+
+            first = app.load_config()
+            self.assertIs(app.load_config(), first)
+
+            raw = app.load_config_raw()
+            raw["plex"]["token"] = "b"
+            app.save_config_raw(raw)
+
+            self.assertEqual(app.load_config()["plex"]["token"], "b")
+            config_path.unlink()
+            with self.assertRaises(OSError):
+                app.load_config()
+
+    def test_concurrent_previews_of_same_playlist_share_one_build(self):
+        app = WebApp(config_path="config.json", web_root=".")
+        playlist = {"name": "Cartoons"}
+        started, release, joined = threading.Event(), threading.Event(), threading.Event()
+        calls = []
+
+        def build(client, playlist_cfg, now):
+            calls.append(playlist_cfg)
+            started.set()
+            release.wait(5)
+            return ["item"], "stats"
+
+        original_result = Future.result
+
+        def result(future, timeout=None):
+            joined.set()
+            return original_result(future, timeout)
+
+        results = []
+        with mock.patch.object(web_server, "build_playlist_items", build), mock.patch.object(
+            Future, "result", result
+        ):
+            owner = threading.Thread(target=lambda: results.append(app.preview_playlist(None, 0, playlist)))
+            owner.start()
+            started.wait(5)
+            follower = threading.Thread(target=lambda: results.append(app.preview_playlist(None, 0, playlist)))
+            follower.start()
+            joined.wait(5)
+            release.set()
+            owner.join(5)
+            follower.join(5)
+
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(results, [(["item"], "stats")] * 2)
+            self.assertEqual(app._preview_inflight, {})
+            app.preview_playlist(None, 0, dict(playlist))
+            self.assertEqual(len(calls), 2)
+
+    def test_query_state_parse_is_shared_across_sections(self):
+        config = {
+            "playlists": [
+                {"tv": {"query": "genre=Comedy&year>=1990"}, "movies": {"query": "genre=Comedy&year>=1990"}},
+                {"tv": {"query": " genre=Comedy&year>=1990 "}, "movies": {"query": "genre=Comedy&year>=1990"}},
+            ]
+        }
+        web_server._parse_query_state.cache_clear()
+
+        web_server._apply_query_state(config)
+        states = [config["playlists"][0]["tv"], config["playlists"][0]["movies"], config["playlists"][1]["tv"]]
+
+        self.assertEqual(web_server._parse_query_state.cache_info().misses, 1)
+        self.assertEqual(states[0]["query_state"], states[2]["query_state"])
+        states[0]["query_state"]["groups"][0]["clauses"][0]["values"].append("Drama")
+        self.assertEqual(states[1]["query_state"]["groups"][0]["clauses"][0]["values"], ["Comedy"])
+
+    def test_create_plex_client_reuses_client_until_settings_change(self):
+        app = WebApp(config_path="config.json", web_root=".")
+        plex_cfg = {"url": "http://plex:32400", "token": "a", "client_id": "id"}
+
+        first = app.create_plex_client(plex_cfg)
+        self.assertIs(app.create_plex_client(dict(plex_cfg)), first)
+        with mock.patch.object(PlexClient, "close") as close:
+            second = app.create_plex_client({**plex_cfg, "token": "b"})
+
+        # Requests still running on the old client must not have their sockets closed.
+        close.assert_not_called()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.token, "b")
+
+    def test_load_plex_credentials_mints_client_id_once(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "config.json"
+            config_path.write_text(json.dumps({"plex": {"token": "secret"}, "playlists": []}), encoding="utf-8")
+            app = WebApp(config_path=str(config_path), web_root=temp_dir)
+
+            token, client_id = app.load_plex_credentials()
+            saved = config_path.read_text(encoding="utf-8")
+
+            self.assertEqual(token, "secret")
+            self.assertTrue(client_id)
+            self.assertEqual(app.load_plex_credentials(), (token, client_id))
+            self.assertEqual(config_path.read_text(encoding="utf-8"), saved)
+
+
+class BackgroundLogWritesTests(unittest.TestCase):
+    def test_records_reach_original_handlers_and_handlers_are_restored(self):
+        root = logging.getLogger()
+        records = []
+        handler = logging.Handler()
+        handler.emit = lambda record: records.append((record.getMessage(), threading.get_ident()))
+        with mock.patch.object(root, "handlers", [handler]):
+            with web_server._background_log_writes():
+                self.assertNotIn(handler, root.handlers)
+                web_server.LOGGER.warning("queued %s", "record")
+            self.assertEqual(root.handlers, [handler])
+        [(message, writer)] = records
+        self.assertEqual(message, "queued record")
+        self.assertNotEqual(writer, threading.get_ident())
+
+
+class FacetCacheTests(unittest.TestCase):
+    def test_entries_expire_and_least_recently_used_is_evicted(self):
+        app = WebApp(config_path="config.json", web_root=".")
+        clock = [1000.0]
+        with mock.patch.object(web_server.time, "monotonic", lambda: clock[0]), mock.patch.object(
+            web_server, "FACET_CACHE_SIZE", 2
+        ):
+            app.set_cached_facet_values("1", "genre", ["Comedy"])
+            app.set_cached_facet_values("1", "year", ["1999"])
+            self.assertEqual(app.get_cached_facet_values("1", "genre"), ("Comedy",))
+            app.set_cached_facet_values("2", "genre", ["Drama"])
+
+            self.assertIsNone(app.get_cached_facet_values("1", "year"))
+            self.assertEqual(app.get_cached_facet_values("1", "genre"), ("Comedy",))
+
+            clock[0] += web_server.FACET_CACHE_TTL
+            self.assertIsNone(app.get_cached_facet_values("1", "genre"))
+
+    def test_facet_cache_round_trips_through_disk_for_the_same_server(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "facets.json"
+            app = WebApp(config_path="config.json", web_root=temp_dir)
+            app.set_cached_facet_values("1", "genre", ["Comedy", "Drama"])
+            app.save_facet_cache(path, "http://plex:32400")
+
+            restored = WebApp(config_path="config.json", web_root=temp_dir)
+            restored.load_facet_cache(path, "http://plex:32400")
+            other = WebApp(config_path="config.json", web_root=temp_dir)
+            other.load_facet_cache(path, "http://other:32400")
+
+            self.assertEqual(restored.get_cached_facet_values("1", "genre"), ("Comedy", "Drama"))
+            self.assertIsNone(other.get_cached_facet_values("1", "genre"))
+
+            with mock.patch.object(web_server.time, "time", lambda: 10.0**10):
+                expired = WebApp(config_path="config.json", web_root=temp_dir)
+                expired.load_facet_cache(path, "http://plex:32400")
+            self.assertIsNone(expired.get_cached_facet_values("1", "genre"))
+
+    def test_normalize_facet_values_strips_dedups_and_sorts(self):
+        values = [" drama", "Comedy", "Drama", "", "  ", None, "Drama ", "comedy"]
+
+        self.assertEqual(_normalize_facet_values(values), ["Comedy", "comedy", "drama", "Drama"])
+
+
+class QueryValuesTests(unittest.TestCase):
+    def test_matches_first_parse_qs_value(self):
+        for query in ["", "limit=%2050+&facet=genre", "a=&a=x", "a=1&a=2", "flag", "x=%zz&k=+"]:
+            expected = {key: values[0].strip() for key, values in parse_qs(query).items()}
+            self.assertEqual(_query_values(query), expected, query)
+
+
+class PreferredConnectionTests(unittest.TestCase):
+    def test_prefers_https_direct_remote_then_larger_uri(self):
+        connections = [
+            {"protocol": "http", "local": False, "uri": "http://remote"},
+            {"protocol": "HTTPS", "local": True, "uri": "https://b.local"},
+            {"protocol": "https", "relay": True, "uri": "https://relay"},
+            {"protocol": "https", "local": True, "uri": "https://a.local"},
+        ]
+
+        self.assertEqual(_pick_preferred_connection(connections), "https://b.local")
+        self.assertEqual(_pick_preferred_connection(connections[:1]), "http://remote")
+        self.assertEqual(_pick_preferred_connection([]), "")
+
+
+class StaticAssetTests(unittest.TestCase):
+    def test_read_static_reuses_bytes_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            asset = Path(temp_dir) / "app.js"
+            asset.write_text("one", encoding="utf-8")
+            app = WebApp(config_path=str(Path(temp_dir) / "config.json"), web_root=temp_dir)
+
+            first = app.read_static(asset)
+            self.assertEqual(first.data, b"one")
+            self.assertIsNone(first.gzipped)
+            self.assertIs(app.read_static(asset), first)
+
+            asset.write_text("two!" * 100, encoding="utf-8")
+            second = app.read_static(asset)
+            self.assertEqual(second.data, b"two!" * 100)
+            self.assertEqual(gzip.decompress(second.gzipped), second.data)
+            self.assertIsNone(app.read_static(Path(temp_dir)))
+            self.assertIsNone(app.read_static(Path(temp_dir) / "missing.js"))
+
+    def test_static_target_memoizes_only_canonical_existing_paths(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            (Path(temp_dir) / "app.js").write_text("one", encoding="utf-8")
+            app = WebApp(config_path=str(Path(temp_dir) / "config.json"), web_root=temp_dir)
+            expected = (Path(temp_dir) / "app.js").resolve()
+
+            self.assertEqual(app.static_target("/app.js"), expected)
+            self.assertEqual(app.static_target("//app.js"), expected)
+            self.assertIsNone(app.static_target("/missing.js"))
+            self.assertIsNone(app.static_target("/../" + Path(temp_dir).name + "/../etc"))
+            self.assertEqual(list(app._static_targets), ["/app.js"])
+
+    def test_accepts_gzip_honours_quality(self):
+        self.assertTrue(_accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(_accepts_gzip("br;q=1.0, *;q=0.5"))
+        self.assertFalse(_accepts_gzip("gzip;q=0, br"))
+        self.assertTrue(_accepts_gzip("*;q=0, gzip"))
+        self.assertFalse(_accepts_gzip("identity"))
+        self.assertFalse(_accepts_gzip(""))
+
+
 if __name__ == "__main__":
     unittest.main()
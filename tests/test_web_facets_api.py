@@ -1,9 +1,12 @@
+import gzip
+import http.client
 import json
 import tempfile
 import threading
 import unittest
 from pathlib import Path
-from urllib.request import urlopen
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 from plex_shuffler.models import LibrarySection
 from plex_shuffler.plex_client import PlexError
@@ -19,13 +22,18 @@ class FakePlexClient:
         self.error_facets: set[str] = set()
         self.section_calls = 0
         self.facet_calls = 0
+        self.threads: list[str] = []
 
     def get_section_by_title(self, title: str) -> LibrarySection:
         self.section_calls += 1
+        self.threads.append(threading.current_thread().name)
         if title != self.section_title:
             raise PlexError(f"Library section not found: {title}")
         return LibrarySection(key=self.section_key, title=title, type=self.section_type)
 
+    def get_sections(self) -> list[LibrarySection]:
+        return [LibrarySection(key=self.section_key, title=self.section_title, type=self.section_type)]
+
     def get_section_facet_values(self, section_key: str, facet: str, media_type: str | None = None) -> list[str]:
         self.facet_calls += 1
         if facet in self.error_facets:
@@ -36,9 +44,10 @@ class FakePlexClient:
 
 
 class FacetsApiTests(unittest.TestCase):
-    def setUp(self) -> None:
-        self.temp_dir = tempfile.TemporaryDirectory()
-        config_path = Path(self.temp_dir.name) / "config.json"
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        config_path = Path(cls.temp_dir.name) / "config.json"
         config_path.write_text(
             json.dumps(
                 {
@@ -48,29 +57,44 @@ class FacetsApiTests(unittest.TestCase):
             ),
             encoding="utf-8",
         )
-        self.fake_client = FakePlexClient()
-        app = WebApp(
+        cls.app = WebApp(
             config_path=str(config_path),
-            web_root=self.temp_dir.name,
-            plex_client_factory=lambda _cfg: self.fake_client,
+            web_root=cls.temp_dir.name,
+            # Looked up per call, so the server always uses the current test's fake.
+            plex_client_factory=lambda _cfg: cls.fake_client,
         )
-        self.server = PlexShufflerWebServer(("127.0.0.1", 0), PlexShufflerHandler, app)
-        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
-        self.thread.start()
-        host, port = self.server.server_address
-        self.base_url = f"http://{host}:{port}"
+        cls.server = PlexShufflerWebServer(("127.0.0.1", 0), PlexShufflerHandler, cls.app)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        cls.thread.start()
+        host, port = cls.server.server_address
+        cls.base_url = f"http://{host}:{port}"
+        # One keep-alive connection for the JSON helpers; http.client reconnects on its own
+        # after a response that closes it.
+        cls.connection = http.client.HTTPConnection(host, port, timeout=5)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.connection.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=1)
+        cls.temp_dir.cleanup()
 
-    def tearDown(self) -> None:
-        self.server.shutdown()
-        self.server.server_close()
-        self.thread.join(timeout=1)
-        self.temp_dir.cleanup()
+    def setUp(self) -> None:
+        # The server is shared by the class; only the fake client and app caches are per test.
+        type(self).fake_client = FakePlexClient()
+        self.app.clear_facet_cache()
 
     def _fetch_json(self, path: str) -> tuple[int, dict[str, object]]:
-        with urlopen(f"{self.base_url}{path}") as response:
-            status = response.status
-            payload = json.loads(response.read().decode("utf-8"))
-        return status, payload
+        self.connection.request("GET", path)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def _facet_cache_header(self, path: str) -> str | None:
+        self.connection.request("GET", path)
+        response = self.connection.getresponse()
+        response.read()
+        return response.getheader("X-Facet-Cache")
 
     def test_facets_by_section_title_returns_sorted_unique_values(self) -> None:
         status, payload = self._fetch_json("/api/facets?section_title=TV%20Shows&facet=genre")
@@ -86,14 +110,14 @@ class FacetsApiTests(unittest.TestCase):
         self.assertFalse(payload.get("error"))
 
     def test_facets_caches_per_section_and_facet(self) -> None:
-        self._fetch_json("/api/libraries/1/facets/genre")
-        self._fetch_json("/api/libraries/1/facets/genre")
-        self.assertEqual(self.fake_client.facet_calls, 1)
+        self.assertEqual(self._facet_cache_header("/api/libraries/1/facets/genre"), "miss")
+        self.assertEqual(self._facet_cache_header("/api/libraries/1/facets/genre"), "hit")
+        self.assertEqual(self._facet_cache_header("/api/libraries/1/facets/studio"), "miss")
+        self.assertEqual(self.fake_client.facet_calls, 2)
 
     def test_facets_limit_does_not_change_cache_key(self) -> None:
-        self._fetch_json("/api/libraries/1/facets/genre?limit=1")
-        self._fetch_json("/api/libraries/1/facets/genre")
-        self.assertEqual(self.fake_client.facet_calls, 1)
+        self.assertEqual(self._facet_cache_header("/api/libraries/1/facets/genre?limit=1"), "miss")
+        self.assertEqual(self._facet_cache_header("/api/libraries/1/facets/genre"), "hit")
 
     def test_facets_unsupported_facet_returns_error(self) -> None:
         status, payload = self._fetch_json("/api/libraries/1/facets/notreal")
@@ -110,6 +134,110 @@ class FacetsApiTests(unittest.TestCase):
         self.assertIn("Simulated Plex failure", payload.get("error", ""))
         self.assertEqual(self.fake_client.facet_calls, 1)
 
+    def test_warm_facet_cache_prefetches_supported_facets(self) -> None:
+        app = self.server.app
+        self.fake_client.error_facets.add("studio")
+
+        stored = app.warm_facet_cache(["genre", "studio", "year"])
+
+        self.assertEqual(stored, 1)
+        self.assertEqual(app.get_cached_facet_values("1", "genre"), ("Comedy", "Drama"))
+        self.assertEqual(app.warm_facet_cache(["genre"]), 0)
+        status, payload = self._fetch_json("/api/libraries/1/facets/genre")
+        self.assertEqual(payload.get("values"), ["Comedy", "Drama"])
+        self.assertEqual(self.fake_client.facet_calls, 2)
+
+    def test_requests_run_on_reused_pool_workers(self) -> None:
+        app = self.server.app
+        server = PlexShufflerWebServer(("127.0.0.1", 0), PlexShufflerHandler, app, max_workers=1)
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        try:
+            host, port = server.server_address
+            for _ in range(3):
+                with urlopen(f"http://{host}:{port}/api/facets?section_title=TV%20Shows&facet=genre") as response:
+                    self.assertEqual(response.status, 200)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join(timeout=1)
+        self.assertEqual(self.fake_client.threads, ["pss-http-0"] * 3)
+
+    def test_static_assets_are_gzipped_and_revalidated(self) -> None:
+        body = "<html>" + "shuffle " * 200 + "</html>"
+        (Path(self.temp_dir.name) / "index.html").write_text(body, encoding="utf-8")
+
+        with urlopen(Request(f"{self.base_url}/", headers={"Accept-Encoding": "gzip"})) as response:
+            self.assertEqual(response.headers["Content-Encoding"], "gzip")
+            self.assertEqual(gzip.decompress(response.read()).decode("utf-8"), body)
+            etag = response.headers["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+
+        with urlopen(f"{self.base_url}/index.html") as response:
+            self.assertIsNone(response.headers["Content-Encoding"])
+            self.assertEqual(response.read().decode("utf-8"), body)
+
+        with self.assertRaises(HTTPError) as raised:
+            urlopen(Request(f"{self.base_url}/index.html", headers={"If-None-Match": etag}))
+        self.assertEqual(raised.exception.code, 304)
+
+        host, port = self.server.server_address
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        try:
+            connection.request("GET", "/../" + Path(self.temp_dir.name).name + "/index.html")
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(response.status, 200)
+            with tempfile.NamedTemporaryFile(dir=Path(self.temp_dir.name).parent, suffix=".txt") as outside:
+                connection.request("GET", "/../" + Path(outside.name).name)
+                response = connection.getresponse()
+                response.read()
+                self.assertEqual(response.status, 404)
+        finally:
+            connection.close()
+
+    def test_library_facets_route_requires_key_and_facet(self) -> None:
+        status, payload = self._fetch_json("/api/libraries//facets/genre")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload.get("error"), "section_key and facet are required")
+        status, payload = self._fetch_json("/api/libraries/1/facets/genre/")
+        self.assertEqual(payload.get("values"), ["Comedy", "Drama"])
+
+    def test_connection_is_kept_alive_between_requests(self) -> None:
+        host, port = self.server.server_address
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        try:
+            for _ in range(2):
+                connection.request("GET", "/api/facets?section_key=1&facet=genre")
+                response = connection.getresponse()
+                self.assertEqual(response.status, 200)
+                response.read()
+                self.assertFalse(response.will_close)
+
+            # An unused POST body must not be mistaken for the next request.
+            connection.request("POST", "/not-api", body=b"GET /ignored HTTP/1.1\r\n\r\n")
+            response = connection.getresponse()
+            response.read()
+            self.assertEqual(response.status, 404)
+
+            connection.request("GET", "/api/facets?section_key=1&facet=genre")
+            response = connection.getresponse()
+            self.assertEqual(json.loads(response.read())["values"], ["Comedy", "Drama"])
+        finally:
+            connection.close()
+        self.assertEqual(self.fake_client.facet_calls, 1)
+
+    def test_facets_revalidate_with_etag(self) -> None:
+        with urlopen(f"{self.base_url}/api/facets?section_key=1&facet=genre") as response:
+            etag = response.headers["ETag"]
+        self.assertTrue(etag)
+
+        request = Request(f"{self.base_url}/api/facets?section_key=1&facet=genre", headers={"If-None-Match": etag})
+        with self.assertRaises(HTTPError) as raised:
+            urlopen(request)
+        self.assertEqual(raised.exception.code, 304)
+        self.assertEqual(self.fake_client.facet_calls, 1)
+
 
 if __name__ == "__main__":
     unittest.main()
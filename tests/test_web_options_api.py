@@ -1,12 +1,16 @@
+import http.client
 import json
 import tempfile
 import threading
 import unittest
 from pathlib import Path
-from urllib.request import urlopen
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 from plex_shuffler.models import LibrarySection
 from plex_shuffler.plex_client import PlexError
+from plex_shuffler import web_server
 from plex_shuffler.web_server import PlexShufflerHandler, PlexShufflerWebServer, WebApp
 
 
@@ -38,9 +42,10 @@ class FakePlexClient:
 
 
 class OptionsApiTests(unittest.TestCase):
-    def setUp(self) -> None:
-        self.temp_dir = tempfile.TemporaryDirectory()
-        config_path = Path(self.temp_dir.name) / "config.json"
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        config_path = Path(cls.temp_dir.name) / "config.json"
         config_path.write_text(
             json.dumps(
                 {
@@ -50,29 +55,37 @@ class OptionsApiTests(unittest.TestCase):
             ),
             encoding="utf-8",
         )
-        self.fake_client = FakePlexClient()
-        app = WebApp(
+        cls.app = WebApp(
             config_path=str(config_path),
-            web_root=self.temp_dir.name,
-            plex_client_factory=lambda _cfg: self.fake_client,
+            web_root=cls.temp_dir.name,
+            # Looked up per call, so the server always uses the current test's fake.
+            plex_client_factory=lambda _cfg: cls.fake_client,
         )
-        self.server = PlexShufflerWebServer(("127.0.0.1", 0), PlexShufflerHandler, app)
-        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
-        self.thread.start()
-        host, port = self.server.server_address
-        self.base_url = f"http://{host}:{port}"
-
-    def tearDown(self) -> None:
-        self.server.shutdown()
-        self.server.server_close()
-        self.thread.join(timeout=1)
-        self.temp_dir.cleanup()
+        cls.server = PlexShufflerWebServer(("127.0.0.1", 0), PlexShufflerHandler, cls.app)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        cls.thread.start()
+        host, port = cls.server.server_address
+        cls.base_url = f"http://{host}:{port}"
+        # One keep-alive connection for the JSON helpers; http.client reconnects on its own
+        # after a response that closes it.
+        cls.connection = http.client.HTTPConnection(host, port, timeout=5)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.connection.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=1)
+        cls.temp_dir.cleanup()
+
+    def setUp(self) -> None:
+        # The server is shared by the class; only the fake client is per test.
+        type(self).fake_client = FakePlexClient()
 
     def _fetch_json(self, path: str) -> tuple[int, dict[str, object]]:
-        with urlopen(f"{self.base_url}{path}") as response:
-            status = response.status
-            payload = json.loads(response.read().decode("utf-8"))
-        return status, payload
+        self.connection.request("GET", path)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
 
     def test_options_returns_values(self) -> None:
         status, payload = self._fetch_json(
@@ -84,6 +97,23 @@ class OptionsApiTests(unittest.TestCase):
         self.assertEqual(self.fake_client.options_calls, 1)
         self.assertEqual(self.fake_client.last_media_type, "both")
 
+    def test_resources_refresh_drops_cached_plex_tv_lookups(self) -> None:
+        servers = [{"name": "Home", "provides": "server", "clientIdentifier": "abc", "connections": []}]
+        with (
+            mock.patch.object(web_server, "fetch_resources", return_value=servers) as fetch,
+            mock.patch.object(web_server, "clear_auth_cache") as clear,
+        ):
+            status, payload = self._fetch_json("/api/plex/resources")
+            self.assertEqual(status, 200)
+            clear.assert_not_called()
+
+            status, payload = self._fetch_json("/api/plex/resources?refresh=1")
+
+        self.assertEqual(status, 200)
+        self.assertEqual([server["name"] for server in payload["servers"]], ["Home"])
+        clear.assert_called_once_with("token")
+        self.assertEqual(fetch.call_count, 2)
+
     def test_options_limit_slices_values(self) -> None:
         status, payload = self._fetch_json(
             "/api/plex/options?library=TV%20Shows&source=genre&media_type=both&limit=2"
@@ -91,6 +121,15 @@ class OptionsApiTests(unittest.TestCase):
         self.assertEqual(status, 200)
         self.assertEqual(payload.get("options"), ["Drama", "Comedy"])
 
+    def test_options_revalidate_with_etag(self) -> None:
+        url = f"{self.base_url}/api/plex/options?library=TV%20Shows&source=genre"
+        with urlopen(url) as response:
+            etag = response.headers["ETag"]
+
+        with self.assertRaises(HTTPError) as raised:
+            urlopen(Request(url, headers={"If-None-Match": etag}))
+        self.assertEqual(raised.exception.code, 304)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,135 @@
+import http.client
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from plex_shuffler.models import LibrarySection, MediaItem
+from plex_shuffler.plex_client import PlexError
+from plex_shuffler.web_server import PlexShufflerHandler, PlexShufflerWebServer, WebApp
+
+
+class FakePlexClient:
+    def __init__(self) -> None:
+        self.sections_calls = 0
+        self.section_calls = 0
+
+    def get_sections(self) -> list[LibrarySection]:
+        self.sections_calls += 1
+        return [LibrarySection(key="1", title="TV Shows", type="show")]
+
+    def get_section_by_title(self, title: str) -> LibrarySection:
+        self.section_calls += 1
+        if title != "TV Shows":
+            raise PlexError(f"Library section not found: {title}")
+        return LibrarySection(key="1", title=title, type="show")
+
+    def get_shows(self, section_key: str, query=None) -> list[MediaItem]:
+        return [MediaItem(rating_key="s1", title="Futurama", type="show")]
+
+    def get_episodes_bulk(self, show_keys) -> dict[str, list[MediaItem]]:
+        return {
+            key: [
+                MediaItem(
+                    rating_key=f"{key}-e{index}",
+                    title=f"Episode {index}",
+                    type="episode",
+                    show_title="Futurama",
+                    show_rating_key=key,
+                    season_index=1,
+                    episode_index=index,
+                )
+                for index in (1, 2, 3)
+            ]
+            for key in show_keys
+        }
+
+
+class PlaylistBatchApiTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        config_path = Path(cls.temp_dir.name) / "config.json"
+        config_path.write_text(
+            json.dumps(
+                {
+                    "plex": {"url": "http://example.com", "token": "token", "timeout_seconds": 30},
+                    "playlists": [
+                        {"name": "Cartoons", "tv": {"library": "TV Shows"}},
+                        {"name": "Missing", "tv": {"library": "Anime"}},
+                    ],
+                }
+            ),
+            encoding="utf-8",
+        )
+        cls.app = WebApp(
+            config_path=str(config_path),
+            web_root=cls.temp_dir.name,
+            # Looked up per call, so the server always uses the current test's fake.
+            plex_client_factory=lambda _cfg: cls.fake_client,
+        )
+        cls.server = PlexShufflerWebServer(("127.0.0.1", 0), PlexShufflerHandler, cls.app)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        cls.thread.start()
+        host, port = cls.server.server_address
+        cls.base_url = f"http://{host}:{port}"
+        # One keep-alive connection for the JSON helpers; http.client reconnects on its own
+        # after a response that closes it.
+        cls.connection = http.client.HTTPConnection(host, port, timeout=5)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.connection.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=1)
+        cls.temp_dir.cleanup()
+
+    def setUp(self) -> None:
+        # The server is shared by the class; only the fake client is per test.
+        type(self).fake_client = FakePlexClient()
+
+    def _post_json(self, path: str, payload: object) -> tuple[int, dict[str, object]]:
+        body = json.dumps(payload).encode("utf-8")
+        self.connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_preview_batch_shares_sections_and_reports_failures_per_playlist(self) -> None:
+        status, payload = self._post_json("/api/preview_batch", {"limit": 2})
+
+        self.assertEqual(status, 200)
+        first, second = payload["results"]
+        self.assertEqual(first["playlist_index"], 0)
+        self.assertEqual([item["title"] for item in first["items"]], ["Episode 1", "Episode 2"])
+        self.assertEqual(first["stats"]["episodes"], 3)
+        self.assertEqual(second, {"playlist_index": 1, "error": "Library section not found: Anime"})
+        self.assertEqual(self.fake_client.sections_calls, 1)
+        self.assertEqual(self.fake_client.section_calls, 0)
+
+    def test_preview_batch_matches_single_preview(self) -> None:
+        _, single = self._post_json("/api/preview", {"playlist_index": 0})
+        _, batch = self._post_json("/api/preview_batch", {"playlist_indexes": [0]})
+
+        self.assertEqual(batch["results"], [{"playlist_index": 0, **single}])
+
+    def test_batch_rejects_bad_indexes(self) -> None:
+        status, payload = self._post_json("/api/run_batch", {"playlist_indexes": [0, 2]})
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["error"], "Playlist not found")
+
+        status, payload = self._post_json("/api/preview_batch", {"playlist_indexes": "0"})
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["error"], "playlist_indexes must be a list of integers")
+        self.assertEqual(self.fake_client.sections_calls, 0)
+
+    def test_non_object_body_is_treated_as_empty_payload(self) -> None:
+        status, payload = self._post_json("/api/preview_batch", [1])
+
+        self.assertEqual(status, 200)
+        self.assertEqual([result["playlist_index"] for result in payload["results"]], [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()